@@ -20,116 +20,14 @@
 # software solely pursuant to the terms of the relevant commercial agreement.
 
 import sys
+from typing import Optional, Sequence
 
 import colorama
-import shtab
 
-from croud.apikeys.commands import (
-    api_keys_create,
-    api_keys_delete,
-    api_keys_edit,
-    api_keys_list,
-)
-from croud.cloud_configurations.commands import (
-    cloud_configurations_get,
-    cloud_configurations_list,
-    cloud_configurations_set,
-)
-from croud.clusters.commands import (
-    clusters_delete,
-    clusters_deploy,
-    clusters_expand_storage,
-    clusters_get,
-    clusters_list,
-    clusters_restart_node,
-    clusters_scale,
-    clusters_set_backup_schedule,
-    clusters_set_deletion_protection,
-    clusters_set_ip_whitelist,
-    clusters_set_product,
-    clusters_set_suspended,
-    clusters_snapshots_list,
-    clusters_snapshots_restore,
-    clusters_subscription_update,
-    clusters_upgrade,
-    create_scheduled_job,
-    delete_scheduled_job,
-    edit_scheduled_job,
-    export_jobs_create,
-    export_jobs_delete,
-    export_jobs_list,
-    get_scheduled_job_log,
-    get_scheduled_jobs,
-    import_jobs_create_from_azure_blob_storage,
-    import_jobs_create_from_dynamodb,
-    import_jobs_create_from_file,
-    import_jobs_create_from_s3,
-    import_jobs_create_from_url,
-    import_jobs_delete,
-    import_jobs_list,
-)
 from croud.config import CONFIG
-from croud.config.commands import (
-    config_add_profile,
-    config_current_profile,
-    config_remove_profile,
-    config_set_profile,
-    config_show,
-)
-from croud.login import login
-from croud.logout import logout
-from croud.me import me, me_edit
-from croud.organizations.auditlogs.commands import auditlogs_list
-from croud.organizations.commands import (
-    org_credits_create,
-    org_credits_edit,
-    org_credits_expire,
-    org_credits_list,
-    org_customer_edit,
-    org_customer_get,
-    org_files_create,
-    org_files_delete,
-    org_files_get,
-    org_files_list,
-    org_secrets_create,
-    org_secrets_delete,
-    org_secrets_list,
-    organizations_create,
-    organizations_delete,
-    organizations_edit,
-    organizations_get,
-    organizations_list,
-)
-from croud.organizations.users.commands import (
-    org_users_add,
-    org_users_list,
-    org_users_remove,
-)
-from croud.parser import Argument, create_parser
+from croud.parser import Argument, LazyResolver, PrintCompletionAction, create_parser
 from croud.printer import print_error, print_info
-from croud.products.commands import products_list
-from croud.projects.commands import (
-    project_create,
-    project_delete,
-    project_edit,
-    projects_get,
-    projects_list,
-)
-from croud.projects.users.commands import (
-    project_users_add,
-    project_users_list,
-    project_users_remove,
-)
-from croud.regions.commands import regions_create, regions_delete, regions_list
-from croud.subscriptions.commands import (
-    subscription_delete,
-    subscriptions_create,
-    subscriptions_get,
-    subscriptions_list,
-)
 from croud.tools.spinner import HALO
-from croud.users.commands import users_delete, users_list
-from croud.users.roles.commands import roles_list
 from croud.util import asbool
 
 # Arguments common to all import-job create commands
@@ -188,7 +86,7 @@ import_job_create_common_file_args = [
 command_tree = {
     "me": {
         "help": "Print information about the current logged in user.",
-        "resolver": me,
+        "resolver": LazyResolver("croud.me", "me"),
         "commands": {
             "edit": {
                 "help": "Edit your own email address.",
@@ -198,13 +96,14 @@ command_tree = {
                         help="The new email address to use."
                     ),
                 ],
-                "resolver": me_edit,
+                "resolver": LazyResolver("croud.me", "me_edit"),
             },
         }
     },
     "login": {
         "help": "Log in to your CrateDB Cloud account.",
-        "resolver": login,
+        "resolver": LazyResolver("croud.login", "login"),
+        "omit": {"cache"},
         "extra_args": [
             Argument(
                 "--idp", type=str, required=True,
@@ -213,27 +112,35 @@ command_tree = {
             ),
         ],
     },
-    "logout": {"help": "Log out of your CrateDB Cloud account.", "resolver": logout},
+    "logout": {
+        "help": "Log out of your CrateDB Cloud account.",
+        "resolver": LazyResolver("croud.logout", "logout"),
+        "omit": {"cache"},
+    },
     "config": {
         "help": "Manage croud configuration.",
         "commands": {
             "show": {
                 "help": "Show the full configuration.",
-                "resolver": config_show,
-                "omit": {"sudo", "region", "format"},
+                "resolver": LazyResolver("croud.config.commands", "config_show"),
+                "omit": {"sudo", "region", "format", "cache"},
             },
             "profiles": {
                 "help": "Manage configuration profiles.",
                 "commands": {
                     "current": {
                         "help": "Print the current profile.",
-                        "resolver": config_current_profile,
-                        "omit": {"sudo", "region"},
+                        "resolver": LazyResolver(
+                            "croud.config.commands", "config_current_profile"
+                        ),
+                        "omit": {"sudo", "region", "cache"},
                     },
                     "use": {
                         "help": "Switch to a different profile.",
-                        "resolver": config_set_profile,
-                        "omit": {"sudo", "region"},
+                        "resolver": LazyResolver(
+                            "croud.config.commands", "config_set_profile"
+                        ),
+                        "omit": {"sudo", "region", "cache"},
                         "extra_args": [
                             Argument(
                                 "profile", type=str,
@@ -243,8 +150,10 @@ command_tree = {
                     },
                     "add": {
                         "help": "Add a new profile to your configuration.",
-                        "resolver": config_add_profile,
-                        "omit": {"sudo", "region", "format"},
+                        "resolver": LazyResolver(
+                            "croud.config.commands", "config_add_profile"
+                        ),
+                        "omit": {"sudo", "region", "format", "cache"},
                         "extra_args": [
                             Argument(
                                 "profile", type=str,
@@ -266,8 +175,10 @@ command_tree = {
                     },
                     "remove": {
                         "help": "Remove a profile from your configuration.",
-                        "resolver": config_remove_profile,
-                        "omit": {"sudo", "region", "format"},
+                        "resolver": LazyResolver(
+                            "croud.config.commands", "config_remove_profile"
+                        ),
+                        "omit": {"sudo", "region", "format", "cache"},
                         "extra_args": [
                             Argument(
                                 "profile", type=str,
@@ -324,7 +235,7 @@ command_tree = {
                              "The AWS secret access key for the given s3 bucket. "
                     ),
                 ],
-                "resolver": project_create,
+                "resolver": LazyResolver("croud.projects.commands", "project_create"),
             },
             "delete": {
                 "help": "Delete the specified project.",
@@ -335,7 +246,7 @@ command_tree = {
                     ),
                     Argument("-y", "--yes", action="store_true", default=False),
                 ],
-                "resolver": project_delete,
+                "resolver": LazyResolver("croud.projects.commands", "project_delete"),
             },
             "edit": {
                 "help": "Rename the specified project.",
@@ -349,7 +260,7 @@ command_tree = {
                         help="The new project name to use.",
                     ),
                 ],
-                "resolver": project_edit,
+                "resolver": LazyResolver("croud.projects.commands", "project_edit"),
             },
             "get": {
                 "help": (
@@ -361,7 +272,7 @@ command_tree = {
                         help="The ID of the project.",
                     ),
                 ],
-                "resolver": projects_get,
+                "resolver": LazyResolver("croud.projects.commands", "projects_get"),
             },
             "list": {
                 "help": (
@@ -374,7 +285,7 @@ command_tree = {
                         help="The organization ID to use.",
                     ),
                 ],
-                "resolver": projects_list,
+                "resolver": LazyResolver("croud.projects.commands", "projects_list"),
             },
             "users": {
                 "help": "Manage users in projects.",
@@ -399,7 +310,9 @@ command_tree = {
                                 ),
                             ),
                         ],
-                        "resolver": project_users_add,
+                        "resolver": LazyResolver(
+                            "croud.projects.users.commands", "project_users_add"
+                        ),
                     },
                     "list": {
                         "help": "List the users who have access to a project.",
@@ -409,7 +322,9 @@ command_tree = {
                                 help="The project ID to use.",
                             ),
                         ],
-                        "resolver": project_users_list,
+                        "resolver": LazyResolver(
+                            "croud.projects.users.commands", "project_users_list"
+                        ),
                     },
                     "remove": {
                         "help": "Remove a user from a project.",
@@ -423,7 +338,9 @@ command_tree = {
                                 help="The user email address or ID to use.",
                             ),
                         ],
-                        "resolver": project_users_remove,
+                        "resolver": LazyResolver(
+                            "croud.projects.users.commands", "project_users_remove"
+                        ),
                     },
                 },
             },
@@ -442,7 +359,7 @@ command_tree = {
                         help="The ID of the cluster.",
                     ),
                 ],
-                "resolver": clusters_get,
+                "resolver": LazyResolver("croud.clusters.commands", "clusters_get"),
             },
             "list": {
                 "help": "List all clusters the current user has access to.",
@@ -456,8 +373,18 @@ command_tree = {
                         "--org-id", type=str, required=False,
                         help="The organization ID to use.",
                     ),
+                    Argument(
+                        "--all-orgs", action="store_true", default=False,
+                        help="List the clusters of all organizations the current "
+                             "user is a member of.",
+                    ),
+                    Argument(
+                        "--concurrency", type=int, default=10,
+                        help="The maximum number of concurrent requests when "
+                             "listing the clusters of all organizations.",
+                    ),
                 ],
-                "resolver": clusters_list,
+                "resolver": LazyResolver("croud.clusters.commands", "clusters_list"),
             },
             "deploy": {
                 "help": "Deploy a new CrateDB cluster.",
@@ -553,15 +480,16 @@ command_tree = {
                              "Amount of memory to allocate (in MiB).",
                     ),
                 ],
-                "resolver": clusters_deploy,
+                "resolver": LazyResolver("croud.clusters.commands", "clusters_deploy"),
             },
             "scale": {
                 "help": "Scale an existing cluster up or down by changing the "
                         "number of nodes.",
                 "extra_args": [
                     Argument(
-                        "--cluster-id", type=str, required=True,
-                        help="The CrateDB cluster ID to use.",
+                        "--cluster-id", type=str, required=True, action="append",
+                        help="The CrateDB cluster ID to use. Repeat the argument "
+                             "to apply the change to several clusters at once.",
                     ),
                     Argument(
                         "--unit", type=int, required=True,
@@ -571,21 +499,22 @@ command_tree = {
                              "products available scale units.",
                     ),
                 ],
-                "resolver": clusters_scale,
+                "resolver": LazyResolver("croud.clusters.commands", "clusters_scale"),
             },
             "upgrade": {
                 "help": "Upgrade an existing CrateDB cluster to a later version.",
                 "extra_args": [
                     Argument(
-                        "--cluster-id", type=str, required=True,
-                        help="The CrateDB cluster ID to use.",
+                        "--cluster-id", type=str, required=True, action="append",
+                        help="The CrateDB cluster ID to use. Repeat the argument "
+                             "to apply the change to several clusters at once.",
                     ),
                     Argument(
                         "--version", type=str, required=True,
                         help="The CrateDB version to use.",
                     ),
                 ],
-                "resolver": clusters_upgrade
+                "resolver": LazyResolver("croud.clusters.commands", "clusters_upgrade")
             },
             "delete": {
                 "help": "Delete the specified cluster.",
@@ -596,7 +525,7 @@ command_tree = {
                     ),
                     Argument("-y", "--yes", action="store_true", default=False)
                 ],
-                "resolver": clusters_delete,
+                "resolver": LazyResolver("croud.clusters.commands", "clusters_delete"),
             },
             "restart-node": {
                 "help": "Restart a node in a CrateDB cluster.",
@@ -610,7 +539,9 @@ command_tree = {
                         help="The ordinal index of the node to restart.",
                     ),
                 ],
-                "resolver": clusters_restart_node,
+                "resolver": LazyResolver(
+                    "croud.clusters.commands", "clusters_restart_node"
+                ),
             },
             "set-deletion-protection": {
                 "help": "Change the deletion protection status of a cluster.",
@@ -625,7 +556,9 @@ command_tree = {
                         choices=[True, False],
                     ),
                 ],
-                "resolver": clusters_set_deletion_protection,
+                "resolver": LazyResolver(
+                    "croud.clusters.commands", "clusters_set_deletion_protection"
+                ),
             },
             "set-ip-whitelist": {
                 "help": "Set IP Network Whitelist in CIDR format (comma-separated).",
@@ -641,7 +574,9 @@ command_tree = {
                     ),
                     Argument("-y", "--yes", action="store_true", default=False)
                 ],
-                "resolver": clusters_set_ip_whitelist,
+                "resolver": LazyResolver(
+                    "croud.clusters.commands", "clusters_set_ip_whitelist"
+                ),
             },
             "expand-storage": {
                 "help": "Expand storage of a CrateDB cluster.",
@@ -655,14 +590,17 @@ command_tree = {
                         help="New size of attached disks (in GiB).",
                     )
                 ],
-                "resolver": clusters_expand_storage,
+                "resolver": LazyResolver(
+                    "croud.clusters.commands", "clusters_expand_storage"
+                ),
             },
             "set-suspended-state": {
                 "help": "Suspend or resume a CrateDB cluster.",
                 "extra_args": [
                     Argument(
-                        "--cluster-id", type=str, required=True,
-                        help="The CrateDB cluster ID to use.",
+                        "--cluster-id", type=str, required=True, action="append",
+                        help="The CrateDB cluster ID to use. Repeat the argument "
+                             "to apply the change to several clusters at once.",
                     ),
                     Argument(
                         "--value", type=lambda x: asbool(x),
@@ -670,7 +608,9 @@ command_tree = {
                         choices=[True, False],
                     ),
                 ],
-                "resolver": clusters_set_suspended,
+                "resolver": LazyResolver(
+                    "croud.clusters.commands", "clusters_set_suspended"
+                ),
             },
             "set-product": {
                 "help": "Change the cluster's product, which can be used to "
@@ -687,7 +627,9 @@ command_tree = {
                              "the list of available products.",
                     ),
                 ],
-                "resolver": clusters_set_product,
+                "resolver": LazyResolver(
+                    "croud.clusters.commands", "clusters_set_product"
+                ),
             },
             "set-backup-schedule": {
                 "help": "Change the cluster's backup schedule.",
@@ -703,7 +645,9 @@ command_tree = {
                              "least one value and can have up to 24, comma-separated."
                     )
                 ],
-                "resolver": clusters_set_backup_schedule,
+                "resolver": LazyResolver(
+                    "croud.clusters.commands", "clusters_set_backup_schedule"
+                ),
             },
             "snapshots": {
                 "help": "View and restore snapshots (backups)",
@@ -721,7 +665,9 @@ command_tree = {
                                      "(default: %(default)s)",
                             ),
                         ],
-                        "resolver": clusters_snapshots_list,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "clusters_snapshots_list"
+                        ),
                     },
                     "restore": {
                         "help": "Restore a snapshot of a cluster.",
@@ -768,7 +714,9 @@ command_tree = {
                                      "``analyzers`` or ``udfs``.",
                             ),
                         ],
-                        "resolver": clusters_snapshots_restore,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "clusters_snapshots_restore"
+                        ),
                     },
                 },
             },
@@ -792,7 +740,9 @@ command_tree = {
                                      "transferred to.",
                             ),
                         ],
-                        "resolver": clusters_subscription_update,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "clusters_subscription_update"
+                        ),
                     },
                 },
             },
@@ -814,7 +764,9 @@ command_tree = {
                                 help="The ID of the import job."
                             ),
                         ],
-                        "resolver": import_jobs_delete,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "import_jobs_delete"
+                        ),
                     },
                     "list": {
                         "help": "List all import jobs for a cluster.",
@@ -824,7 +776,9 @@ command_tree = {
                                 help="The cluster the import jobs belong to."
                             ),
                         ],
-                        "resolver": import_jobs_list,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "import_jobs_list"
+                        ),
                     },
                     "create": {
                         "help": "Import data from a file.",
@@ -841,7 +795,10 @@ command_tree = {
                                     ),
                                 ] + import_job_create_common_args
                                   + import_job_create_common_file_args,
-                                "resolver": import_jobs_create_from_url,
+                                "resolver": LazyResolver(
+                                    "croud.clusters.commands",
+                                    "import_jobs_create_from_url",
+                                ),
                             },
                             "from-file": {
                                 "help": "Create a data import job from a local or "
@@ -861,12 +818,34 @@ command_tree = {
                                         help="The file in your local filesystem that "
                                              "will be used. If not specified then "
                                              "``--file-id`` must be specified. "
-                                             "Please note the file will become visible "
-                                             "under ``croud organizations files list``."
+                                             "A directory or a quoted glob pattern "
+                                             "imports all matching files, with one "
+                                             "import job per file. "
+                                             "Please note the files will become "
+                                             "visible under ``croud organizations "
+                                             "files list``."
+                                    ),
+                                    Argument(
+                                        "--compress", action="store_true",
+                                        default=False,
+                                        help="Compress the file given by "
+                                             "``--file-path`` with gzip while it is "
+                                             "uploaded, and import it with gzip "
+                                             "compression. The file must not be "
+                                             "compressed already."
+                                    ),
+                                    Argument(
+                                        "--concurrency", type=int, default=4,
+                                        help="The maximum number of files that are "
+                                             "uploaded at the same time when "
+                                             "importing several files."
                                     ),
                                 ] + import_job_create_common_args
                                   + import_job_create_common_file_args,
-                                "resolver": import_jobs_create_from_file,
+                                "resolver": LazyResolver(
+                                    "croud.clusters.commands",
+                                    "import_jobs_create_from_file",
+                                ),
                             },
                             "from-s3": {
                                 "help": "Create a data import job on the specified "
@@ -897,7 +876,10 @@ command_tree = {
                                     ),
                                 ] + import_job_create_common_args
                                   + import_job_create_common_file_args,
-                                "resolver": import_jobs_create_from_s3,
+                                "resolver": LazyResolver(
+                                    "croud.clusters.commands",
+                                    "import_jobs_create_from_s3",
+                                ),
                             },
                             "from-dynamodb": {
                                 "help": "Create a data import job on the specified "
@@ -948,7 +930,10 @@ command_tree = {
                                         help="An AWS DynamoDB compatible endpoint."
                                     ),
                                 ] + import_job_create_common_args,
-                                "resolver": import_jobs_create_from_dynamodb,
+                                "resolver": LazyResolver(
+                                    "croud.clusters.commands",
+                                    "import_jobs_create_from_dynamodb",
+                                ),
                             },
                             "from-azure-blob-storage": {
                                 "help": "Create a data import job on the specified "
@@ -975,7 +960,10 @@ command_tree = {
                                     ),
                                 ] + import_job_create_common_args
                                   + import_job_create_common_file_args,
-                                "resolver": import_jobs_create_from_azure_blob_storage,
+                                "resolver": LazyResolver(
+                                    "croud.clusters.commands",
+                                    "import_jobs_create_from_azure_blob_storage",
+                                ),
                             },
                         },
                     },
@@ -999,7 +987,9 @@ command_tree = {
                                 help="The ID of the export job."
                             ),
                         ],
-                        "resolver": export_jobs_delete,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "export_jobs_delete"
+                        ),
                     },
                     "list": {
                         "help": "Lists all export jobs for a cluster.",
@@ -1009,7 +999,9 @@ command_tree = {
                                 help="The cluster the export jobs belong to."
                             ),
                         ],
-                        "resolver": export_jobs_list,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "export_jobs_list"
+                        ),
                     },
                     "create": {
                         "help": "Export data from a CrateDB cluster to a file. The "
@@ -1047,10 +1039,22 @@ command_tree = {
                                 required=False,
                                 help="The file on your local filesystem the data will "
                                      "be exported to. If not specified, you will "
-                                     "receive the URL to download the file.",
+                                     "receive the URL to download the file. Use "
+                                     "``-`` to write the file to stdout while it is "
+                                     "downloaded.",
+                            ),
+                            Argument(
+                                "--decompress",
+                                action="store_true",
+                                default=False,
+                                help="Decompress the file while writing it to "
+                                     "stdout, if it is compressed. Requires "
+                                     "``--save-as -``.",
                             ),
                         ],
-                        "resolver": export_jobs_create,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "export_jobs_create"
+                        ),
                     },
                 },
             },
@@ -1082,7 +1086,9 @@ command_tree = {
                                 help="Enable or disable the job."
                             )
                         ],
-                        "resolver": create_scheduled_job,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "create_scheduled_job"
+                        ),
                     },
                     "list": {
                         "help": "List the scheduled sql jobs for a cluster.",
@@ -1092,7 +1098,9 @@ command_tree = {
                                 help="The cluster of which jobs should be listed."
                             )
                         ],
-                        "resolver": get_scheduled_jobs,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "get_scheduled_jobs"
+                        ),
                     },
                     "logs": {
                         "help": "List the past executions of a scheduled sql job.",
@@ -1107,7 +1115,9 @@ command_tree = {
                                      "should be listed."
                             )
                         ],
-                        "resolver": get_scheduled_job_log,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "get_scheduled_job_log"
+                        ),
                     },
                     "delete": {
                         "help": "Delete specified scheduled sql job.",
@@ -1122,7 +1132,9 @@ command_tree = {
                                      "should be deleted."
                             ),
                         ],
-                        "resolver": delete_scheduled_job,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "delete_scheduled_job"
+                        ),
                     },
                     "edit": {
                         "help": "Edit specified scheduled sql job.",
@@ -1152,12 +1164,33 @@ command_tree = {
                                 help="Enable or disable the sql job."
                             ),
                         ],
-                        "resolver": edit_scheduled_job,
+                        "resolver": LazyResolver(
+                            "croud.clusters.commands", "edit_scheduled_job"
+                        ),
                     }
                 }
             },
         },
     },
+    "apply": {
+        "help": "Change the settings of many clusters at once to match a YAML "
+                "manifest.",
+        "extra_args": [
+            Argument(
+                "-f", "--file", type=str, required=True,
+                help="The path of the manifest file.",
+            ),
+            Argument(
+                "--dry-run", action="store_true", default=False,
+                help="Only print the changes that would be applied.",
+            ),
+            Argument(
+                "--concurrency", type=int, default=10,
+                help="The maximum number of concurrent requests.",
+            ),
+        ],
+        "resolver": LazyResolver("croud.apply", "apply"),
+    },
     "products": {
         "help": "Manage products. They represent the compute configuration and "
                 "the scale and storage options that you can choose from when "
@@ -1171,7 +1204,7 @@ command_tree = {
                         choices=["cluster", "storage"]
                     ),
                 ],
-                "resolver": products_list,
+                "resolver": LazyResolver("croud.products.commands", "products_list"),
             },
         },
     },
@@ -1192,7 +1225,9 @@ command_tree = {
                              "is for superusers only.",
                     ),
                 ],
-                "resolver": organizations_create,
+                "resolver": LazyResolver(
+                    "croud.organizations.commands", "organizations_create"
+                ),
             },
             "get": {
                 "help": (
@@ -1204,11 +1239,15 @@ command_tree = {
                         help="The ID of the organization.",
                     ),
                 ],
-                "resolver": organizations_get,
+                "resolver": LazyResolver(
+                    "croud.organizations.commands", "organizations_get"
+                ),
             },
             "list": {
                 "help": "List all organizations the current user has access to.",
-                "resolver": organizations_list,
+                "resolver": LazyResolver(
+                    "croud.organizations.commands", "organizations_list"
+                ),
             },
             "edit": {
                 "help": "Edit the specified organization.",
@@ -1228,7 +1267,9 @@ command_tree = {
                         help="The organization ID to use.",
                     ),
                 ],
-                "resolver": organizations_edit,
+                "resolver": LazyResolver(
+                    "croud.organizations.commands", "organizations_edit"
+                ),
             },
             "delete": {
                 "help": "Delete the specified organization.",
@@ -1239,7 +1280,9 @@ command_tree = {
                         help="The organization ID to use.",
                     ),
                 ],
-                "resolver": organizations_delete,
+                "resolver": LazyResolver(
+                    "croud.organizations.commands", "organizations_delete"
+                ),
             },
             "auditlogs": {
                 "help": "Show audit logs for an organization.",
@@ -1264,8 +1307,68 @@ command_tree = {
                                 "--org-id", type=str, required=False,
                                 help="The organization ID to use.",
                             ),
+                            Argument(
+                                "--stream", type=str, required=False,
+                                choices=["jsonl", "csv"],
+                                help="Write each page of events as soon as it is "
+                                     "fetched, in JSON Lines or CSV format, while "
+                                     "the next page is fetched in the background. "
+                                     "Use this to export large numbers of events.",
+                            ),
+                            Argument(
+                                "--cache", action="store_true", default=False,
+                                help="Store the fetched events in the local audit "
+                                     "log index for later use with `--offline`.",
+                            ),
+                            Argument(
+                                "--offline", action="store_true", default=False,
+                                help="Answer from the local audit log index "
+                                     "instead of the API. The index is populated "
+                                     "with `--cache`.",
+                            ),
+                            Argument(
+                                "--actor", type=str, required=False,
+                                help="Only show events of this actor ID. Only "
+                                     "supported with `--offline`.",
+                            ),
+                        ],
+                        # Audit events are not cached by the HTTP cache, and
+                        # ``--no-cache`` would be confused with ``--cache``
+                        "omit": {"cache"},
+                        "resolver": LazyResolver(
+                            "croud.organizations.auditlogs.commands", "auditlogs_list"
+                        ),
+                    },
+                    "sync": {
+                        "help": "Append all audit events that are newer than the "
+                                "last synced event to a local file in JSON Lines "
+                                "format.",
+                        "extra_args": [
+                            Argument(
+                                "--output", type=str, required=True,
+                                help="The file the audit events are appended to.",
+                            ),
+                            Argument(
+                                "--checkpoint", type=str, required=False,
+                                help="The file that stores the last synced event "
+                                     "per organization. Defaults to the output file "
+                                     "name with a `.checkpoint` suffix.",
+                            ),
+                            Argument(
+                                "--from", type=str, required=False, dest="from_",
+                                help="Only sync events from this point in time. "
+                                     "This is ignored if a checkpoint exists.",
+                                metavar="FROM",
+                            ),
+                            Argument(
+                                "--org-id", type=str, required=False,
+                                help="The organization ID to use.",
+                            ),
                         ],
-                        "resolver": auditlogs_list,
+                        "omit": {"format", "cache"},
+                        "resolver": LazyResolver(
+                            "croud.organizations.auditlogs.commands", "auditlogs_sync"
+                        ),
                     },
                 },
             },
@@ -1291,7 +1394,9 @@ command_tree = {
                                 help="The organization ID to use.",
                             ),
                         ],
-                        "resolver": org_users_add,
+                        "resolver": LazyResolver(
+                            "croud.organizations.users.commands", "org_users_add"
+                        ),
                     },
                     "list": {
                         "help": "List all users that are admins or members of an "
@@ -1302,7 +1407,9 @@ command_tree = {
                                 help="The organization ID to use.",
                             ),
                         ],
-                        "resolver": org_users_list,
+                        "resolver": LazyResolver(
+                            "croud.organizations.users.commands", "org_users_list"
+                        ),
                     },
                     "remove": {
                         "help": "Remove a user from an organization.",
@@ -1316,7 +1423,9 @@ command_tree = {
                                 help="The organization ID to use.",
                             ),
                         ],
-                        "resolver": org_users_remove,
+                        "resolver": LazyResolver(
+                            "croud.organizations.users.commands", "org_users_remove"
+                        ),
                     },
                 },
             },
@@ -1331,7 +1440,9 @@ command_tree = {
                                 help="The organization ID to use.",
                             ),
                         ],
-                        "resolver": org_secrets_list,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_secrets_list"
+                        ),
                     },
                     "create": {
                         "help": "Creates a new secret for the given organization.",
@@ -1386,7 +1497,9 @@ command_tree = {
                                      "provided.",
                             ),
                         ],
-                        "resolver": org_secrets_create,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_secrets_create"
+                        ),
                     },
                     "delete": {
                         "help": "Delete a secret from an organization.",
@@ -1400,7 +1513,9 @@ command_tree = {
                                 help="The secret ID to use.",
                             ),
                         ],
-                        "resolver": org_secrets_delete,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_secrets_delete"
+                        ),
                     },
                 }
             },
@@ -1422,7 +1537,9 @@ command_tree = {
                                 help="The ID of the file.",
                             ),
                         ],
-                        "resolver": org_files_get,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_files_get"
+                        ),
                     },
                     "list": {
                         "help": "List all files uploaded to this organization.",
@@ -1432,7 +1549,9 @@ command_tree = {
                                 help="The organization ID to use.",
                             ),
                         ],
-                        "resolver": org_files_list,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_files_list"
+                        ),
                     },
                     "create": {
                         "help": "Upload a new file to the organization.",
@@ -1452,7 +1571,9 @@ command_tree = {
                                      "used.",
                             ),
                         ],
-                        "resolver": org_files_create,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_files_create"
+                        ),
                     },
                     "delete": {
                         "help": "Delete a file uploaded to an organization.",
@@ -1466,7 +1587,9 @@ command_tree = {
                                 help="The ID of the file.",
                             ),
                         ],
-                        "resolver": org_files_delete,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_files_delete"
+                        ),
                     },
                 }
             },
@@ -1487,7 +1610,9 @@ command_tree = {
                                      "default only ``ACTIVE`` credits are listed.",
                             ),
                         ],
-                        "resolver": org_credits_list,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_credits_list"
+                        ),
                     },
                     "create": {
                         "help": "Create a new credit for an organization.",
@@ -1510,7 +1635,9 @@ command_tree = {
                                 help="The reason for creating this credit.",
                             ),
                         ],
-                        "resolver": org_credits_create,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_credits_create"
+                        ),
                     },
                     "edit": {
                         "help": "Edit the specified credit.",
@@ -1538,7 +1665,9 @@ command_tree = {
                                 help="The reason for creating this credit.",
                             ),
                         ],
-                        "resolver": org_credits_edit,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_credits_edit"
+                        ),
                     },
                     "expire": {
                         "help": "Expire a credit, making it unusable for paying for "
@@ -1553,7 +1682,9 @@ command_tree = {
                                 help="The credit ID to use.",
                             ),
                         ],
-                        "resolver": org_credits_expire,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_credits_expire"
+                        ),
                     },
                 }
             },
@@ -1571,7 +1702,9 @@ command_tree = {
                                 help="The organization ID to use.",
                             )
                         ],
-                        "resolver": org_customer_get,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_customer_get"
+                        ),
                     },
                     "edit": {
                         "help": "Edits the organization's customer information.",
@@ -1621,7 +1754,9 @@ command_tree = {
                                 help="The customer's tax ID type, e.g. 'eu_vat'.",
                             )
                         ],
-                        "resolver": org_customer_edit,
+                        "resolver": LazyResolver(
+                            "croud.organizations.commands", "org_customer_edit"
+                        ),
                     }
                 }
             }
@@ -1642,14 +1777,16 @@ command_tree = {
                         help="Only show users that are not part of any organization.",
                     )
                 ],
-                "resolver": users_list,
+                "resolver": LazyResolver("croud.users.commands", "users_list"),
             },
             "roles": {
                 "help": "Manage user roles.",
                 "commands": {
                     "list": {
                         "help": "List all available roles.",
-                        "resolver": roles_list,
+                        "resolver": LazyResolver(
+                            "croud.users.roles.commands", "roles_list"
+                        ),
                     },
                 },
             },
@@ -1663,7 +1800,7 @@ command_tree = {
                     ),
                     Argument("-y", "--yes", action="store_true", default=False)
                 ],
-                "resolver": users_delete,
+                "resolver": LazyResolver("croud.users.commands", "users_delete"),
             },
         },
     },
@@ -1672,16 +1809,16 @@ command_tree = {
         "commands": {
             "list": {
                 "help": "List all the API keys that belong to the current user.",
-                "resolver": api_keys_list,
+                "resolver": LazyResolver("croud.apikeys.commands", "api_keys_list"),
             },
             "create": {
                 "help": "Create a new API key for your user. It will have the same "
                         "permissions as your user.",
-                "resolver": api_keys_create,
+                "resolver": LazyResolver("croud.apikeys.commands", "api_keys_create"),
             },
             "delete": {
                 "help": "Delete the API key specified that belongs to your user.",
-                "resolver": api_keys_delete,
+                "resolver": LazyResolver("croud.apikeys.commands", "api_keys_delete"),
                 "extra_args": [
                     Argument(
                         "--api-key", type=str, required=True,
@@ -1692,7 +1829,7 @@ command_tree = {
             },
             "edit": {
                 "help": "Allow activating or deactivating an existing API key",
-                "resolver": api_keys_edit,
+                "resolver": LazyResolver("croud.apikeys.commands", "api_keys_edit"),
                 "extra_args": [
                     Argument(
                         "--api-key", type=str, required=True,
@@ -1720,12 +1857,12 @@ command_tree = {
                         help="The organization ID to use.",
                     ),
                 ],
-                "resolver": regions_list,
+                "resolver": LazyResolver("croud.regions.commands", "regions_list"),
             },
             "create": {
                 "help": "Create a new Edge region. The feature is not maintained "
                         "and we don't recommend using it.",
-                "resolver": regions_create,
+                "resolver": LazyResolver("croud.regions.commands", "regions_create"),
                 "extra_args": [
                     Argument(
                         "--aws-bucket", type=str, required=False,
@@ -1750,7 +1887,7 @@ command_tree = {
             "delete": {
                 "help": "Delete an existing Edge region. The feature is not maintained "
                         "and we don't recommend using it.",
-                "resolver": regions_delete,
+                "resolver": LazyResolver("croud.regions.commands", "regions_delete"),
                 "extra_args": [
                     Argument(
                         "--name", type=str, required=True,
@@ -1779,7 +1916,9 @@ command_tree = {
                         help="The organization ID to use.",
                     ),
                 ],
-                "resolver": subscriptions_create,
+                "resolver": LazyResolver(
+                    "croud.subscriptions.commands", "subscriptions_create"
+                ),
             },
             "get": {
                 "help": (
@@ -1791,7 +1930,9 @@ command_tree = {
                         help="The ID of the subscription.",
                     ),
                 ],
-                "resolver": subscriptions_get,
+                "resolver": LazyResolver(
+                    "croud.subscriptions.commands", "subscriptions_get"
+                ),
             },
             "delete": {
                 "help": "Cancel a Stripe or contract subscription. "
@@ -1804,7 +1945,9 @@ command_tree = {
                     ),
                     Argument("-y", "--yes", action="store_true", default=False),
                 ],
-                "resolver": subscription_delete,
+                "resolver": LazyResolver(
+                    "croud.subscriptions.commands", "subscription_delete"
+                ),
             },
             "list": {
                 "help": "List all subscriptions the current user has access to.",
@@ -1814,7 +1957,9 @@ command_tree = {
                         help="The organization ID to use.",
                     ),
                 ],
-                "resolver": subscriptions_list,
+                "resolver": LazyResolver(
+                    "croud.subscriptions.commands", "subscriptions_list"
+                ),
             },
         },
     },
@@ -1845,7 +1990,9 @@ command_tree = {
                         help="Override the value for a single user only.",
                     ),
                 ],
-                "resolver": cloud_configurations_set,
+                "resolver": LazyResolver(
+                    "croud.cloud_configurations.commands", "cloud_configurations_set"
+                ),
             },
             "get": {
                 "help": (
@@ -1868,7 +2015,9 @@ command_tree = {
                              "Defaults to the global configuration value.",
                     ),
                 ],
-                "resolver": cloud_configurations_get,
+                "resolver": LazyResolver(
+                    "croud.cloud_configurations.commands", "cloud_configurations_get"
+                ),
             },
             "list": {
                 "help": (
@@ -1887,7 +2036,9 @@ command_tree = {
                              "Defaults to the global configuration values.",
                     ),
                 ],
-                "resolver": cloud_configurations_list,
+                "resolver": LazyResolver(
+                    "croud.cloud_configurations.commands", "cloud_configurations_list"
+                ),
             }
         },
     }
@@ -1895,14 +2046,14 @@ command_tree = {
 # fmt: on
 
 
-def get_parser():
+def get_parser(argv: Optional[Sequence[str]] = None):
     tree = {
         "help": "A command line interface for CrateDB Cloud. More information about "
         "CrateDB Cloud CLI can be found at "
         "https://cratedb.com/docs/cloud/cli/en/latest/.",
         "commands": command_tree,
     }
-    return create_parser(tree)
+    return create_parser(tree, argv)
 
 
 def main():
@@ -1917,13 +2068,22 @@ def main():
 
     colorama.init()
 
-    parser = get_parser()
-    shtab.add_argument_to(parser)  # Tab completion stuff
-    params = parser.parse_args(sys.argv[1:])
+    argv = sys.argv[1:]
+    # Only build the part of the command tree that is needed to parse argv
+    parser = get_parser(argv)
+    parser.add_argument(  # Tab completion stuff
+        "--print-completion",
+        action=PrintCompletionAction,
+        parser_factory=get_parser,
+        default=None,
+    )
+    params = parser.parse_args(argv)
     if "resolver" in params:
         fn = params.resolver
         del params.resolver
-        with HALO:
+        # Configuration changes, such as a renewed auth token, are written
+        # once after the command instead of whenever they happen
+        with HALO, CONFIG.transaction():
             fn(params)
     else:
         parser.print_help()
@@ -17,21 +17,29 @@
 # with Crate these terms will supersede the license and you may use the
 # software solely pursuant to the terms of the relevant commercial agreement.
 
+import asyncio
 import enum
+import functools
 import os
 import sys
+import threading
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
 from platform import python_version
-from typing import Any, Callable, Dict, Optional, Tuple, cast
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, cast
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from yarl import URL
 
 import croud
 from croud.config import CONFIG
+from croud.http_cache import HttpCache
 from croud.printer import print_debug, print_error, print_info, print_warning
 
 ResponsePair = Tuple[Optional[Dict], Optional[Dict]]
+T = TypeVar("T")
 
 
 class RequestMethod(enum.Enum):
@@ -46,6 +54,63 @@ def noop(*args, **kwargs):
     pass
 
 
+# Server responses that are worth retrying. Retries are only performed for
+# idempotent request methods (``GET``, ``PUT``, ``DELETE``, ...), so that
+# e.g. a cluster is never deployed twice.
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_HTTP_ADAPTER: Optional[HTTPAdapter] = None
+_HTTP_SESSION: Optional[requests.Session] = None
+
+
+def get_http_adapter() -> HTTPAdapter:
+    """
+    Return the process wide HTTP adapter that is shared by all sessions.
+
+    The adapter keeps a pool of keep-alive connections per host and retries
+    failed idempotent requests with an exponential backoff, honoring the
+    ``Retry-After`` header. Pool size and retries can be tuned with the
+    ``CROUD_HTTP_POOL_SIZE``, ``CROUD_HTTP_MAX_RETRIES`` and
+    ``CROUD_HTTP_BACKOFF_FACTOR`` environment variables.
+    """
+    global _HTTP_ADAPTER
+    if _HTTP_ADAPTER is None:
+        pool_size = int(os.getenv("CROUD_HTTP_POOL_SIZE", "10"))
+        retries = Retry(
+            total=int(os.getenv("CROUD_HTTP_MAX_RETRIES", "3")),
+            backoff_factor=float(os.getenv("CROUD_HTTP_BACKOFF_FACTOR", "0.5")),
+            status_forcelist=RETRY_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        _HTTP_ADAPTER = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+        )
+    return _HTTP_ADAPTER
+
+
+def new_session() -> requests.Session:
+    """
+    Create a new session that uses the shared HTTP adapter.
+    """
+    session = requests.Session()
+    adapter = get_http_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def http_session() -> requests.Session:
+    """
+    Return a shared session without any CrateDB Cloud credentials, e.g. for
+    uploading to or downloading from pre-signed URLs.
+    """
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        _HTTP_SESSION = new_session()
+    return _HTTP_SESSION
+
+
 def debug(method, endpoint, params, body):
     if os.getenv("LOG_API", "false").lower() == "true":
         msg = f"{method.upper()} {endpoint}"
@@ -71,6 +136,8 @@ class Client:
         secret: str = None,
         region: str = None,
         sudo: bool = False,
+        cache: Optional[HttpCache] = None,
+        cache_reads: bool = True,
         _verify_ssl: bool = True,
     ):
         """
@@ -91,6 +158,12 @@ class Client:
         :param bool sudo:
           Whether or not to make requests as superuser (defines the
           ``X-Auth-Sudo`` HTTP header value)
+        :param HttpCache cache:
+          The cache for responses of read-only endpoints. Responses are not
+          cached if it is None.
+        :param bool cache_reads:
+          Whether cached responses may be used. If False, responses are still
+          stored in the cache, and modifying requests still invalidate it.
         :param bool _verify_ssl:
           A private variable that must only be used during tests!
         """
@@ -98,8 +171,12 @@ class Client:
         self.base_url = URL(endpoint)
         self._token = token
         self._on_token = on_token or noop
+        self.cache = cache
+        self.cache_reads = cache_reads
+        # Requests may be performed concurrently by an ``AsyncClient``
+        self._token_lock = threading.Lock()
 
-        self.session = requests.Session()
+        self.session = new_session()
         if not token and (key and secret):
             self.session.auth = (key, secret)
 
@@ -130,6 +207,8 @@ class Client:
             secret=CONFIG.secret,
             region=args.region or CONFIG.region,
             sudo=args.sudo,
+            cache=HttpCache.for_profile(CONFIG.name),
+            cache_reads=not getattr(args, "no_cache", False),
         )
 
     def request(
@@ -151,8 +230,21 @@ class Client:
         if body is not None:
             kwargs["json"] = body
 
+        url = str(self.base_url.with_path(endpoint))
+        ttl = None
+        cached = None
+        headers = self.session.headers
+        if self.cache is not None and method is RequestMethod.GET:
+            ttl = self.cache.ttl(endpoint)
+            if ttl is not None and self.cache_reads:
+                cached = self.cache.get(url, params, headers)
+        if cached is not None:
+            if cached.is_fresh(cast(int, ttl)):
+                return cached.body, None
+            if cached.etag:
+                kwargs["headers"] = {"If-None-Match": cached.etag}
+
         try:
-            url = str(self.base_url.with_path(endpoint))
             debug(method.value, url, params, body)
             response = self.session.request(method.value, url, **kwargs)
         except requests.RequestException as e:
@@ -176,8 +268,23 @@ class Client:
         # Refresh a previously provided token because it has timed out
         response_token = response.cookies.get("session")
         if response_token and response_token != self._token:
-            self._token = response_token
-            self._on_token(response_token)
+            with self._token_lock:
+                if response_token != self._token:
+                    self._token = response_token
+                    self._on_token(response_token)
+
+        if self.cache is not None:
+            if cached is not None and response.status_code == 304:
+                self.cache.put(url, params, cached.body, cached.etag, headers)
+                return cached.body, None
+            data, errors = self.decode_response(response)
+            if ttl is not None and errors is None:
+                etag = response.headers.get("ETag")
+                self.cache.put(url, params, data, etag, headers)
+            elif method is not RequestMethod.GET and errors is None:
+                # Anything may have changed
+                self.cache.clear()
+            return data, errors
 
         return self.decode_response(response)
 
@@ -219,3 +326,103 @@ class Client:
             return None, body
         else:
             return body, None
+
+
+class AsyncClient:
+    """
+    An asyncio based client for CrateDB Cloud API requests
+
+    It has the same interface as :class:`Client`, except that all request
+    methods are coroutines. Requests are performed by the wrapped client in a
+    bounded thread pool, sharing its session and pooled connections, so that
+    independent requests run concurrently.
+    """
+
+    def __init__(self, client: Client, *, max_concurrency: int = 10):
+        """
+        :param Client client:
+          The client that performs the requests
+        :param int max_concurrency:
+          The maximum number of requests that are performed at the same time
+        """
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    @staticmethod
+    def from_args(args: Namespace, *, max_concurrency: int = 10) -> "AsyncClient":
+        return AsyncClient(Client.from_args(args), max_concurrency=max_concurrency)
+
+    def __enter__(self) -> "AsyncClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def request(
+        self,
+        method: RequestMethod,
+        endpoint: str,
+        *,
+        params: dict = None,
+        body: dict = None,
+    ) -> ResponsePair:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(
+            self.client.request, method, endpoint, params=params, body=body
+        )
+        return await loop.run_in_executor(self._executor, call)
+
+    async def delete(
+        self, endpoint: str, *, params: dict = None, body: dict = None
+    ) -> ResponsePair:
+        return await self.request(
+            RequestMethod.DELETE, endpoint, params=params, body=body
+        )
+
+    async def get(self, endpoint: str, *, params: dict = None) -> ResponsePair:
+        return await self.request(RequestMethod.GET, endpoint, params=params)
+
+    async def patch(
+        self, endpoint: str, *, params: dict = None, body: dict = None
+    ) -> ResponsePair:
+        return await self.request(
+            RequestMethod.PATCH, endpoint, params=params, body=body
+        )
+
+    async def post(
+        self, endpoint: str, *, params: dict = None, body: dict = None
+    ) -> ResponsePair:
+        return await self.request(
+            RequestMethod.POST, endpoint, params=params, body=body
+        )
+
+    async def put(
+        self, endpoint: str, *, params: dict = None, body: dict = None
+    ) -> ResponsePair:
+        return await self.request(RequestMethod.PUT, endpoint, params=params, body=body)
+
+
+def gather(*requests: Awaitable[T]) -> List[T]:
+    """
+    Run the given coroutines, e.g. requests of an :class:`AsyncClient`,
+    concurrently and return their results in the same order.
+
+    This is meant to be called from the synchronous command functions, e.g.::
+
+        with AsyncClient.from_args(args) as client:
+            responses = gather(*(client.get(url) for url in urls))
+    """
+
+    async def _gather() -> List[T]:
+        return list(await asyncio.gather(*requests))
+
+    return asyncio.run(_gather())
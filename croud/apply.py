@@ -0,0 +1,397 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import asyncio
+import time
+from argparse import Namespace
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from croud.api import AsyncClient, Client, gather
+from croud.clusters.commands import (
+    _operation_timeout,
+    _parse_operation_status,
+    _poll_intervals,
+    _PollFailures,
+)
+from croud.clusters.exceptions import AsyncOperationNotFound
+from croud.config import get_output_format
+from croud.printer import (
+    print_error,
+    print_info,
+    print_response,
+    print_success,
+    print_warning,
+)
+
+
+def _backup_hours(value: Any) -> List[int]:
+    if isinstance(value, str):
+        value = value.split(",")
+    return sorted(int(hour) for hour in value)
+
+
+def _cron_hours(field: str) -> List[int]:
+    """
+    Expand the hour field of a cron expression, e.g. ``3,15``, ``*/6`` or
+    ``0-12/4``, to the list of hours it matches.
+    """
+    hours: Set[int] = set()
+    for part in field.split(","):
+        base, _, step = part.partition("/")
+        if base == "*":
+            start, end = 0, 23
+        elif "-" in base:
+            start, end = (int(hour) for hour in base.split("-", 1))
+        else:
+            start = int(base)
+            end = 23 if step else start
+        if not 0 <= start <= end <= 23:
+            raise ValueError(f"Invalid hour range: {part}")
+        hours.update(range(start, end + 1, int(step) if step else 1))
+    return sorted(hours)
+
+
+def _current_backup_hours(cluster: Dict) -> Any:
+    # The backup schedule is a cron expression, e.g. ``0 3,15 * * *``
+    schedule = cluster.get("backup_schedule")
+    if not schedule:
+        return None
+    try:
+        return _cron_hours(schedule.split()[1])
+    except (IndexError, ValueError):
+        # Not comparable to a list of hours, so it is always shown as change
+        return schedule
+
+
+def _bool(value: Any) -> bool:
+    # ``bool("false")`` is ``True``, so strings are rejected
+    if not isinstance(value, bool):
+        raise TypeError(f"Expected a boolean, got {value!r}")
+    return value
+
+
+def _ip_whitelist(value: Any) -> List[Dict]:
+    return [entry if isinstance(entry, dict) else {"cidr": entry} for entry in value]
+
+
+def _cidrs(value: Any) -> List[str]:
+    return sorted(entry["cidr"] for entry in _ip_whitelist(value or []))
+
+
+class Setting:
+    """
+    A cluster setting that can be declared in a manifest.
+
+    :param get_current:
+      Returns the current value of the setting from the cluster's data.
+    :param normalize:
+      Converts a value to a form that can be compared to the current value.
+    :param action:
+      The action endpoint of a cluster that changes the setting, e.g.
+      ``scale`` for ``/api/v2/clusters/{id}/scale/``.
+    :param make_body:
+      Returns the request body for the desired value.
+    :param operation_type:
+      The type of the cluster operation that is started by the change, if any.
+    """
+
+    def __init__(
+        self,
+        *,
+        get_current: Callable[[Dict], Any],
+        normalize: Callable[[Any], Any],
+        action: str,
+        make_body: Callable[[Any], Dict],
+        operation_type: Optional[str],
+    ):
+        self.get_current = get_current
+        self.normalize = normalize
+        self.action = action
+        self.make_body = make_body
+        self.operation_type = operation_type
+
+
+# The supported settings, in the order in which they are changed. A suspended
+# cluster is resumed first and suspended last (see ``_plan_cluster``).
+SETTINGS: Dict[str, Setting] = {
+    "suspended": Setting(
+        get_current=lambda cluster: cluster.get("suspended"),
+        normalize=_bool,
+        action="suspend",
+        make_body=lambda value: {"suspended": value},
+        operation_type="SUSPEND",
+    ),
+    "deletion_protected": Setting(
+        get_current=lambda cluster: cluster.get("deletion_protected"),
+        normalize=_bool,
+        action="deletion-protection",
+        make_body=lambda value: {"deletion_protected": value},
+        operation_type=None,
+    ),
+    "ip_whitelist": Setting(
+        get_current=lambda cluster: _cidrs(cluster.get("ip_whitelist")),
+        normalize=_cidrs,
+        action="ip-restrictions",
+        make_body=lambda value: {"ip_whitelist": _ip_whitelist(value)},
+        operation_type="ALLOWED_CIDR_UPDATE",
+    ),
+    "backup_hours": Setting(
+        get_current=_current_backup_hours,
+        normalize=_backup_hours,
+        action="backup-schedule",
+        make_body=lambda value: {
+            "backup_hours": ",".join(str(hour) for hour in _backup_hours(value))
+        },
+        operation_type="BACKUP_SCHEDULE_UPDATE",
+    ),
+    "product_unit": Setting(
+        get_current=lambda cluster: cluster.get("product_unit"),
+        normalize=int,
+        action="scale",
+        make_body=lambda value: {"product_unit": value},
+        operation_type="SCALE",
+    ),
+    "crate_version": Setting(
+        get_current=lambda cluster: cluster.get("crate_version"),
+        normalize=str,
+        action="upgrade",
+        make_body=lambda value: {"crate_version": value},
+        operation_type="UPGRADE",
+    ),
+}
+
+Change = Tuple[str, Any, Any]
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """
+    Load and validate the clusters of a manifest file.
+
+    Raises a ``ValueError`` if the manifest is invalid.
+    """
+    with open(path) as fp:
+        manifest = yaml.safe_load(fp)
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("clusters"), list):
+        raise ValueError("The manifest must contain a list of clusters.")
+
+    seen = set()
+    for cluster in manifest["clusters"]:
+        if not isinstance(cluster, dict) or not cluster.get("id"):
+            raise ValueError("Each cluster in the manifest must have an id.")
+        if cluster["id"] in seen:
+            raise ValueError(f"Cluster {cluster['id']} is declared more than once.")
+        seen.add(cluster["id"])
+        unknown = set(cluster) - set(SETTINGS) - {"id"}
+        if unknown:
+            raise ValueError(
+                f"Unknown settings for cluster {cluster['id']}: "
+                f"{', '.join(sorted(unknown))}."
+            )
+        try:
+            for name, setting in SETTINGS.items():
+                if name in cluster:
+                    setting.normalize(cluster[name])
+        except (TypeError, ValueError, KeyError):
+            raise ValueError(f"Invalid value of {name} for cluster {cluster['id']}.")
+    return manifest["clusters"]
+
+
+def _plan_cluster(desired: Dict, current: Dict) -> List[Change]:
+    """
+    Return the changes that are required to bring a cluster from its current
+    state to the desired state, in the order in which they must be applied.
+    """
+    changes = []
+    for name, setting in SETTINGS.items():
+        if name not in desired:
+            continue
+        current_value = setting.get_current(current)
+        if setting.normalize(desired[name]) != current_value:
+            changes.append((name, current_value, desired[name]))
+
+    # A suspended cluster can't be changed, so it's resumed first, but
+    # suspended only after all other changes have been applied.
+    if changes and changes[0][0] == "suspended" and changes[0][2]:
+        changes.append(changes.pop(0))
+    return changes
+
+
+async def _wait_for_operation(
+    client: AsyncClient,
+    cluster_id: str,
+    operation_type: str,
+    deadline: Optional[float],
+) -> Tuple[str, Optional[str]]:
+    intervals = _poll_intervals()
+    failures = _PollFailures()
+    while True:
+        data, errors = await client.get(
+            f"/api/v2/clusters/{cluster_id}/operations/",
+            params={"type": operation_type, "limit": 1},
+        )
+        if errors:
+            if failures.failed(cluster_id):
+                return "FAILED", errors.get("message")
+        else:
+            failures.succeeded(cluster_id)
+            try:
+                status, message, _ = _parse_operation_status(data)
+            except AsyncOperationNotFound as e:
+                return "FAILED", str(e)
+            if status in ["FAILED", "SUCCEEDED"]:
+                return status, message
+
+        interval = next(intervals)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "TIMEOUT", "The operation continues in the background."
+            interval = min(interval, remaining)
+        await asyncio.sleep(interval)
+
+
+async def _apply_changes(
+    client: AsyncClient,
+    cluster_id: str,
+    changes: List[Change],
+    deadline: Optional[float],
+) -> List[Dict]:
+    """
+    Apply the changes of a cluster one after another. Once a change failed,
+    the remaining changes are skipped.
+    """
+    results = []
+    failed = False
+    for name, current, desired in changes:
+        result: Dict[str, Any] = {
+            "id": cluster_id,
+            "setting": name,
+            "status": "SKIPPED",
+        }
+        results.append(result)
+        if failed:
+            continue
+
+        setting = SETTINGS[name]
+        _, errors = await client.put(
+            f"/api/v2/clusters/{cluster_id}/{setting.action}/",
+            body=setting.make_body(desired),
+        )
+        if errors:
+            status, message = "FAILED", errors.get("message")
+        elif setting.operation_type:
+            status, message = await _wait_for_operation(
+                client, cluster_id, setting.operation_type, deadline
+            )
+        else:
+            status, message = "SUCCEEDED", None
+        result.update(status=status, message=message)
+        print_info(f"Cluster {cluster_id}: changing {name} {status.lower()}.")
+        failed = status != "SUCCEEDED"
+    return results
+
+
+def apply(args: Namespace) -> None:
+    """
+    Converge the clusters declared in a manifest to their desired state
+    """
+
+    try:
+        manifest = load_manifest(args.file)
+    except (OSError, yaml.YAMLError, ValueError) as e:
+        print_error(f"Failed to load manifest: {e}")
+        return
+
+    cluster_ids = [cluster["id"] for cluster in manifest]
+    client = Client.from_args(args)
+    with AsyncClient(client, max_concurrency=args.concurrency) as async_client:
+        responses = gather(
+            *(
+                async_client.get(f"/api/v2/clusters/{cluster_id}/")
+                for cluster_id in cluster_ids
+            )
+        )
+
+    plan: Dict[str, List[Change]] = {}
+    rows = []
+    for desired, (current, errors) in zip(manifest, responses):
+        if errors or not current:
+            message = (errors or {}).get("message", "Cluster not found.")
+            print_error(f"Failed to fetch cluster {desired['id']}: {message}")
+            return
+        changes = _plan_cluster(desired, current)
+        if changes and current.get("suspended") and changes[0][0] != "suspended":
+            print_warning(
+                f"Cluster {desired['id']} is suspended, skipping {len(changes)} "
+                "changes. Set suspended to false to apply them."
+            )
+            continue
+        if changes:
+            plan[desired["id"]] = changes
+        for name, current_value, desired_value in changes:
+            rows.append(
+                {
+                    "id": desired["id"],
+                    "name": current.get("name"),
+                    "setting": name,
+                    "current": current_value,
+                    "desired": desired_value,
+                }
+            )
+
+    if not plan:
+        print_success("All clusters are up to date.")
+        return
+
+    print_response(
+        data=rows,
+        errors=None,
+        keys=["id", "name", "setting", "current", "desired"],
+        output_fmt=get_output_format(args),
+    )
+    if args.dry_run:
+        print_info(f"{len(rows)} changes to {len(plan)} clusters would be applied.")
+        return
+
+    print_info(f"Applying {len(rows)} changes to {len(plan)} clusters.")
+    timeout = _operation_timeout()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    with AsyncClient(client, max_concurrency=args.concurrency) as async_client:
+        results = gather(
+            *(
+                _apply_changes(async_client, cluster_id, changes, deadline)
+                for cluster_id, changes in plan.items()
+            )
+        )
+
+    result_rows = [row for cluster_results in results for row in cluster_results]
+    print_response(
+        data=result_rows,
+        errors=None,
+        keys=["id", "setting", "status", "message"],
+        output_fmt=get_output_format(args),
+    )
+    failed = sum(1 for row in result_rows if row["status"] != "SUCCEEDED")
+    if failed:
+        print_error(f"{failed} of {len(result_rows)} changes were not applied.")
+    else:
+        print_success(f"Applied {len(result_rows)} changes.")
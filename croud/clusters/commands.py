@@ -17,20 +17,24 @@
 # with Crate these terms will supersede the license and you may use the
 # software solely pursuant to the terms of the relevant commercial agreement.
 import functools
+import glob
+import os
 import pathlib
+import random
+import sys
 import time
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from shutil import copyfileobj
-from typing import Any, Dict, Optional, cast
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
 
 import bitmath
-import requests
-from tqdm.auto import tqdm
 from yarl import URL
 
-from croud.api import Client
-from croud.clusters.exceptions import AsyncOperationNotFound
+from croud.api import AsyncClient, Client, gather
+from croud.clusters.download import download_file, stream_file
+from croud.clusters.exceptions import AsyncOperationNotFound, DownloadFailed
+from croud.clusters.index import get_cluster_index
 from croud.config import CONFIG, get_output_format
 from croud.organizations.commands import op_upload_file_to_org
 from croud.parser import CroudCliArgumentParser
@@ -42,6 +46,9 @@ from croud.util import grand_central_jwt_token, require_confirmation
 def clusters_get(args: Namespace) -> None:
     client = Client.from_args(args)
     data, errors = client.get(f"/api/v2/clusters/{args.id}/")
+    index = get_cluster_index(client)
+    if index is not None and data and not errors:
+        index.add([data])
     print_response(
         data=data,
         errors=errors,
@@ -49,7 +56,27 @@ def clusters_get(args: Namespace) -> None:
     )
 
 
+CLUSTER_LIST_KEYS = [
+    "id",
+    "name",
+    "num_nodes",
+    "crate_version",
+    "project_id",
+    "username",
+    "suspended",
+    "fqdn",
+    "channel",
+]
+
+
 def clusters_list(args: Namespace) -> None:
+    if args.all_orgs:
+        if args.org_id:
+            print_error("The --all-orgs and --org-id arguments are mutually exclusive.")
+            return
+        _clusters_list_all_orgs(args)
+        return
+
     if args.org_id:
         url = f"/api/v2/organizations/{args.org_id}/clusters/"
     else:
@@ -61,20 +88,76 @@ def clusters_list(args: Namespace) -> None:
 
     client = Client.from_args(args)
     data, errors = client.get(url, params=params)
+    index = get_cluster_index(client)
+    if index is not None and data and not errors:
+        extra = {"organization_id": args.org_id} if args.org_id else {}
+        index.add(cast(List[Dict], data), **extra)
     print_response(
         data=data,
         errors=errors,
-        keys=[
-            "id",
-            "name",
-            "num_nodes",
-            "crate_version",
-            "project_id",
-            "username",
-            "suspended",
-            "fqdn",
-            "channel",
-        ],
+        keys=CLUSTER_LIST_KEYS,
+        output_fmt=get_output_format(args),
+    )
+
+
+def _clusters_list_all_orgs(args: Namespace) -> None:
+    client = Client.from_args(args)
+    orgs, errors = client.get("/api/v2/organizations/")
+    if errors or not orgs:
+        print_response(data=orgs, errors=errors, output_fmt=get_output_format(args))
+        return
+
+    params = {}
+    if args.project_id:
+        params["project_id"] = args.project_id
+
+    org_ids = [org["id"] for org in cast(List[Dict], orgs)]
+    # The clusters and projects of all organizations are fetched at once;
+    # projects are only needed to show the project name of each cluster.
+    with AsyncClient(client, max_concurrency=args.concurrency) as async_client:
+        responses = gather(
+            *(
+                async_client.get(
+                    f"/api/v2/organizations/{org_id}/clusters/", params=params
+                )
+                for org_id in org_ids
+            ),
+            *(
+                async_client.get(f"/api/v2/organizations/{org_id}/projects/")
+                for org_id in org_ids
+            ),
+        )
+
+    clusters_responses = responses[: len(org_ids)]
+    projects_responses = responses[len(org_ids) :]
+
+    project_names = {}
+    for projects, _ in projects_responses:
+        for project in cast(List[Dict], projects or []):
+            project_names[project["id"]] = project["name"]
+
+    rows = []
+    index = get_cluster_index(client)
+    for org_id, (clusters, errors) in zip(org_ids, clusters_responses):
+        if errors:
+            message = errors.get("message", "Unknown error")
+            print_error(f"Failed to list clusters of organization {org_id}: {message}")
+            continue
+        if index is not None:
+            index.add(cast(List[Dict], clusters or []), organization_id=org_id)
+        for cluster in cast(List[Dict], clusters or []):
+            rows.append(
+                {
+                    **cluster,
+                    "organization_id": org_id,
+                    "project_name": project_names.get(cluster.get("project_id")),
+                }
+            )
+
+    print_response(
+        data=rows,
+        errors=None,
+        keys=[*CLUSTER_LIST_KEYS, "project_name", "organization_id"],
         output_fmt=get_output_format(args),
     )
 
@@ -136,6 +219,9 @@ def clusters_deploy(args: Namespace) -> None:
 
     # Re-fetch the cluster's info
     data, errors = client.get(f"/api/v2/clusters/{data['id']}/")
+    index = get_cluster_index(client)
+    if index is not None and data and not errors:
+        index.add([data], organization_id=org_id)
     print_response(
         data=data,
         errors=errors,
@@ -146,8 +232,15 @@ def clusters_deploy(args: Namespace) -> None:
 
 def clusters_scale(args: Namespace) -> None:
     body = {"product_unit": args.unit}
+    if len(args.cluster_id) > 1:
+        _clusters_batch_operation(
+            args, "scale", body, "SCALE", keys=["id", "name", "num_nodes"]
+        )
+        return
+
+    cluster_id = args.cluster_id[0]
     client = Client.from_args(args)
-    data, errors = client.put(f"/api/v2/clusters/{args.cluster_id}/scale/", body=body)
+    data, errors = client.put(f"/api/v2/clusters/{cluster_id}/scale/", body=body)
     print_response(
         data=data,
         errors=errors,
@@ -165,12 +258,12 @@ def clusters_scale(args: Namespace) -> None:
 
     _wait_for_completed_operation(
         client=client,
-        cluster_id=args.cluster_id,
+        cluster_id=cluster_id,
         request_params={"type": "SCALE", "limit": 1},
     )
 
     # Re-fetch the cluster's info
-    data, errors = client.get(f"/api/v2/clusters/{args.cluster_id}/")
+    data, errors = client.get(f"/api/v2/clusters/{cluster_id}/")
     print_response(
         data=data,
         errors=errors,
@@ -251,16 +344,24 @@ def import_jobs_create_from_azure_blob_storage(args: Namespace) -> None:
 
 
 def _get_org_id_from_cluster_id(client, cluster_id: str) -> Optional[str]:
-    data, errors = client.get(f"/api/v2/clusters/{cluster_id}/")
-    if errors or not data:
+    index = get_cluster_index(client)
+    if index is not None and client.cache_reads:
+        org_id = index.get(cluster_id, "organization_id")
+        if org_id:
+            return org_id
+
+    cluster, errors = client.get(f"/api/v2/clusters/{cluster_id}/")
+    if errors or not cluster:
         return None
 
-    project_id = data["project_id"]
+    project_id = cluster["project_id"]
 
     data, errors = client.get(f"/api/v2/projects/{project_id}/")
     if errors or not data:
         return None
 
+    if index is not None:
+        index.add([cluster], organization_id=data["organization_id"])
     return data["organization_id"]
 
 
@@ -271,14 +372,35 @@ def import_jobs_create_from_file(args: Namespace) -> None:
         print_error("Please specify either --file-id or --file-path")
         return
 
+    compress = getattr(args, "compress", False)
+    if compress:
+        if not args.file_path:
+            print_error("--compress can only be used together with --file-path")
+            return
+        if args.compression == "gzip":
+            print_error("The file is already compressed, --compress is not needed")
+            return
+        args.compression = "gzip"
+
     if args.file_path:
+        file_paths = _find_import_files(args.file_path)
+        if not file_paths:
+            print_error(f"No files found at {args.file_path}.")
+            return
+
         client = Client.from_args(args)
         org_id = _get_org_id_from_cluster_id(client, args.cluster_id)
         if not org_id:
             print_error("Could not find the organization related to the cluster.")
             return
 
-        data, errors = op_upload_file_to_org(client, org_id, args.file_path)
+        if file_paths != [args.file_path]:
+            _import_jobs_create_bulk(args, client, org_id, file_paths)
+            return
+
+        data, errors = op_upload_file_to_org(
+            client, org_id, args.file_path, compress=compress
+        )
         if errors or not data:
             print_error("Aborted import job creation.")
             return
@@ -293,7 +415,26 @@ def import_jobs_create_from_file(args: Namespace) -> None:
     import_jobs_create(args, extra_payload=extra_body)
 
 
-def import_jobs_create(args: Namespace, extra_payload: Dict[str, Any]) -> None:
+def _find_import_files(file_path: str) -> List[str]:
+    """
+    Return the files to import for the ``--file-path`` argument, which is
+    either a single file, a directory or a glob pattern.
+    """
+    if os.path.isdir(file_path):
+        with os.scandir(file_path) as entries:
+            return sorted(
+                entry.path
+                for entry in entries
+                if entry.is_file() and not entry.name.startswith(".")
+            )
+    if os.path.isfile(file_path):
+        return [file_path]
+    return sorted(
+        path for path in glob.glob(file_path, recursive=True) if os.path.isfile(path)
+    )
+
+
+def _import_job_body(args: Namespace, extra_payload: Dict[str, Any]) -> Dict:
     body = {
         "type": args.type,
         "format": args.file_format,
@@ -311,6 +452,11 @@ def import_jobs_create(args: Namespace, extra_payload: Dict[str, Any]) -> None:
     if extra_payload:
         body.update(extra_payload)
 
+    return body
+
+
+def import_jobs_create(args: Namespace, extra_payload: Dict[str, Any]) -> None:
+    body = _import_job_body(args, extra_payload)
     client = Client.from_args(args)
     data, errors = client.post(
         f"/api/v2/clusters/{args.cluster_id}/import-jobs/", body=body
@@ -337,6 +483,196 @@ def import_jobs_create(args: Namespace, extra_payload: Dict[str, Any]) -> None:
         )
 
 
+def _import_jobs_create_bulk(
+    args: Namespace, client: Client, org_id: str, file_paths: List[str]
+) -> None:
+    """
+    Upload several files with a pool of workers, create an import job into
+    the same table for each of them and wait for all import jobs to complete.
+    """
+    from tqdm import tqdm
+
+    args.type = "file"
+    compress = getattr(args, "compress", False)
+    print_info(f"Importing {len(file_paths)} files...")
+
+    def info(file_path: str, text: str) -> None:
+        # Print above the progress bar instead of through it
+        with tqdm.external_write_mode(file=sys.stderr):
+            print_info(f"{file_path}: {text}")
+
+    def _upload_and_import(file_path: str) -> Tuple[Optional[str], Optional[str]]:
+        data, errors = op_upload_file_to_org(
+            client,
+            org_id,
+            file_path,
+            compress=compress,
+            progress=progress.update,
+            info=functools.partial(info, file_path),
+        )
+        if errors or not data:
+            return None, (errors or {}).get("message", "The upload failed.")
+        body = _import_job_body(args, {"file": {"id": data["id"]}})
+        job, errors = client.post(
+            f"/api/v2/clusters/{args.cluster_id}/import-jobs/", body=body
+        )
+        if errors or not job:
+            return None, (errors or {}).get("message", "The import job failed.")
+        return job["id"], None
+
+    def upload_and_import(file_path: str) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            return _upload_and_import(file_path)
+        except Exception as e:
+            # One failed file must not abort the import of the others
+            return None, str(e) or type(e).__name__
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with tqdm(
+        total=sum(os.path.getsize(file_path) for file_path in file_paths),
+        unit="B",
+        unit_scale=True,
+        unit_divisor=1024,
+    ) as progress:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [
+                executor.submit(upload_and_import, file_path)
+                for file_path in file_paths
+            ]
+            try:
+                for file_path, future in zip(file_paths, futures):
+                    job_id, message = future.result()
+                    results[file_path] = {
+                        "file": file_path,
+                        "id": job_id,
+                        "status": "REGISTERED" if job_id else "FAILED",
+                        "records": 0,
+                        "message": message,
+                    }
+            except BaseException:
+                # E.g. on KeyboardInterrupt, the executor would otherwise
+                # upload all remaining files before it shuts down
+                for future in futures:
+                    future.cancel()
+                raise
+
+    jobs = {
+        result["id"]: result for result in results.values() if result["id"] is not None
+    }
+    if jobs:
+        _wait_for_completed_import_jobs(
+            client=client,
+            cluster_id=args.cluster_id,
+            jobs=jobs,
+            concurrency=args.concurrency,
+        )
+
+    print_response(
+        data=list(results.values()),
+        errors=None,
+        keys=["file", "id", "status", "records", "message"],
+        output_fmt=get_output_format(args),
+    )
+
+    failed = sum(1 for result in results.values() if result["status"] != "SUCCEEDED")
+    if failed:
+        print_error(f"The import did not succeed for {failed} of {len(results)} files.")
+    else:
+        print_success(f"Import completed for {len(results)} files.")
+
+
+def _wait_for_completed_import_jobs(
+    *,
+    client: Client,
+    cluster_id: str,
+    jobs: Dict[str, Dict[str, Any]],
+    concurrency: int,
+    timeout: Optional[float] = None,
+) -> None:
+    """
+    Poll the status of several import jobs in a single loop until all of
+    them succeeded or failed, reporting the overall import rate. ``jobs``
+    maps the import job IDs to their results, which are updated in place.
+    A job whose status can't be requested stays pending until the request
+    failed ``POLL_MAX_FAILURES`` times in a row.
+    """
+    if timeout is None:
+        timeout = _operation_timeout()
+    start = time.monotonic()
+    deadline = start + timeout if timeout is not None else None
+    intervals = _poll_intervals()
+    pending = list(jobs)
+    last_summary = None
+
+    failures = _PollFailures()
+
+    def get_status(import_job_id: str):
+        data, errors = client.get(
+            f"/api/v2/clusters/{cluster_id}/import-jobs/{import_job_id}/"
+        )
+        if errors:
+            message = errors.get("message")
+            if failures.failed(import_job_id):
+                return "FAILED", message, {}
+            return jobs[import_job_id]["status"], message, {}
+        failures.succeeded(import_job_id)
+        try:
+            return _parse_import_job_status(data)
+        except AsyncOperationNotFound as e:
+            return "FAILED", str(e), {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            statuses = executor.map(get_status, pending)
+            for import_job_id, (status, msg, feedback) in zip(pending, statuses):
+                result = jobs[import_job_id]
+                result["status"] = status
+                result["message"] = msg
+                result["records"] = feedback.get("progress", {}).get(
+                    "records", result["records"]
+                )
+            pending = [
+                import_job_id
+                for import_job_id in pending
+                if jobs[import_job_id]["status"] not in ["FAILED", "SUCCEEDED"]
+            ]
+
+            counts: Dict[str, int] = {}
+            for result in jobs.values():
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+            summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+            if summary != last_summary:
+                print_info(f"Status: {summary}")
+                last_summary = summary
+
+            records = sum(result["records"] for result in jobs.values())
+            elapsed = max(time.monotonic() - start, 1e-3)
+            rate = _format_records(int(records / elapsed))
+            if not pending:
+                print_info(
+                    f"Done importing {_format_records(records)} records "
+                    f"({rate} records/s)."
+                )
+                break
+            print_info(
+                f"Importing... {_format_records(records)} records imported so far "
+                f"({rate} records/s)."
+            )
+
+            interval = next(intervals)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print_error(
+                        f"Timed out after {timeout:g} seconds waiting for the "
+                        "import jobs to complete. They continue in the background."
+                    )
+                    break
+                interval = min(interval, remaining)
+            with HALO:
+                time.sleep(interval)
+
+
 def import_jobs_delete(args: Namespace) -> None:
     client = Client.from_args(args)
     data, errors = client.delete(
@@ -366,8 +702,15 @@ def import_jobs_list(args: Namespace) -> None:
 
 def clusters_upgrade(args: Namespace) -> None:
     body = {"crate_version": args.version}
+    if len(args.cluster_id) > 1:
+        _clusters_batch_operation(
+            args, "upgrade", body, "UPGRADE", keys=["id", "name", "crate_version"]
+        )
+        return
+
+    cluster_id = args.cluster_id[0]
     client = Client.from_args(args)
-    data, errors = client.put(f"/api/v2/clusters/{args.cluster_id}/upgrade/", body=body)
+    data, errors = client.put(f"/api/v2/clusters/{cluster_id}/upgrade/", body=body)
     print_response(
         data=data,
         errors=errors,
@@ -385,12 +728,12 @@ def clusters_upgrade(args: Namespace) -> None:
 
     _wait_for_completed_operation(
         client=client,
-        cluster_id=args.cluster_id,
+        cluster_id=cluster_id,
         request_params={"type": "UPGRADE", "limit": 1},
     )
 
     # Re-fetch the cluster's info
-    data, errors = client.get(f"/api/v2/clusters/{args.cluster_id}/")
+    data, errors = client.get(f"/api/v2/clusters/{cluster_id}/")
     print_response(
         data=data,
         errors=errors,
@@ -406,6 +749,9 @@ def clusters_upgrade(args: Namespace) -> None:
 def clusters_delete(args: Namespace) -> None:
     client = Client.from_args(args)
     data, errors = client.delete(f"/api/v2/clusters/{args.cluster_id}/")
+    index = get_cluster_index(client)
+    if index is not None and not errors:
+        index.remove(args.cluster_id)
     print_response(
         data=data,
         errors=errors,
@@ -447,8 +793,20 @@ def clusters_set_deletion_protection(args: Namespace) -> None:
 
 def clusters_set_suspended(args: Namespace) -> None:
     body = {"suspended": args.value}
+    if len(args.cluster_id) > 1:
+        _clusters_batch_operation(
+            args,
+            "suspend",
+            body,
+            "SUSPEND",
+            keys=["id", "name", "suspended"],
+            description="suspend" if args.value else "resume",
+        )
+        return
+
+    cluster_id = args.cluster_id[0]
     client = Client.from_args(args)
-    data, errors = client.put(f"/api/v2/clusters/{args.cluster_id}/suspend/", body=body)
+    data, errors = client.put(f"/api/v2/clusters/{cluster_id}/suspend/", body=body)
     print_response(
         data=data,
         errors=errors,
@@ -465,12 +823,12 @@ def clusters_set_suspended(args: Namespace) -> None:
 
     _wait_for_completed_operation(
         client=client,
-        cluster_id=args.cluster_id,
+        cluster_id=cluster_id,
         request_params={"type": "SUSPEND", "limit": 1},
     )
 
     # Re-fetch the cluster's info
-    data, errors = client.get(f"/api/v2/clusters/{args.cluster_id}/")
+    data, errors = client.get(f"/api/v2/clusters/{cluster_id}/")
     print_response(
         data=data,
         errors=errors,
@@ -752,19 +1110,29 @@ def export_jobs_create(args: Namespace) -> None:
     if args.compression:
         body["compression"] = args.compression
 
+    decompress = getattr(args, "decompress", False)
+    if decompress and args.save_as != "-":
+        print_error("--decompress can only be used together with --save-as -")
+        return
+
     client = Client.from_args(args)
     data, errors = client.post(
         f"/api/v2/clusters/{args.cluster_id}/export-jobs/", body=body
     )
-    print_response(
-        data=data,
-        errors=errors,
-        keys=["id", "cluster_id", "status"],
-        output_fmt=get_output_format(args),
-    )
+    if args.save_as == "-" and data and not errors:
+        # Only the exported file must be written to stdout
+        print_info(f"Export job {data['id']} created.")
+    else:
+        print_response(
+            data=data,
+            errors=errors,
+            keys=["id", "cluster_id", "status"],
+            output_fmt=get_output_format(args),
+        )
 
     if data:
         export_job_id = data["id"]
+        compression = data.get("compression", args.compression)
 
         _wait_for_completed_operation(
             client=client,
@@ -777,7 +1145,13 @@ def export_jobs_create(args: Namespace) -> None:
             ),
             post_success_func=(
                 _download_exported_file,
-                (client, args.cluster_id, args.save_as, export_job_id),
+                (
+                    client,
+                    args.cluster_id,
+                    args.save_as,
+                    export_job_id,
+                    decompress and compression == "gzip",
+                ),
             ),
         )
 
@@ -904,7 +1278,17 @@ def edit_scheduled_job(args: Namespace) -> None:
 
 def _get_gc_client(args: Namespace) -> Client:
     client = Client.from_args(args)
-    cluster, _ = client.get(f"/api/v2/clusters/{args.cluster_id}/")
+    index = get_cluster_index(client)
+    cluster: Optional[Dict] = None
+    if index is not None and client.cache_reads:
+        name = index.get(args.cluster_id, "name")
+        fqdn = index.get(args.cluster_id, "fqdn")
+        if name and fqdn:
+            cluster = {"name": name, "fqdn": fqdn}
+    if cluster is None:
+        cluster, _ = client.get(f"/api/v2/clusters/{args.cluster_id}/")
+        if index is not None and cluster:
+            index.add([cluster])
 
     url_region_cloud = cluster.get("fqdn").split(".", 1)[1][:-1]  # type: ignore
     gc_url = f"https://{cluster.get('name')}.gc.{url_region_cloud}"  # type: ignore
@@ -946,6 +1330,10 @@ def _get_operation_status(client: Client, cluster_id: str, request_params: Dict)
         f"/api/v2/clusters/{cluster_id}/operations/", params=request_params
     )
 
+    return _parse_operation_status(data)
+
+
+def _parse_operation_status(data: Optional[Dict]):
     if not data or len(data.get("operations", [])) == 0:
         raise AsyncOperationNotFound("Failed retrieving operation status.")
 
@@ -966,6 +1354,10 @@ def _get_import_job_operation_status(
         f"/api/v2/clusters/{cluster_id}/import-jobs/{import_job_id}/"
     )
 
+    return _parse_import_job_status(data)
+
+
+def _parse_import_job_status(data: Optional[Dict]):
     if not data or not data.get("progress"):
         raise AsyncOperationNotFound("Failed retrieving operation status.")
 
@@ -977,8 +1369,10 @@ def _get_import_job_operation_status(
 
 
 def _get_formatted_records_normalized(feedback: dict) -> str:
-    num_records = feedback.get("progress", {}).get("records")
+    return _format_records(feedback.get("progress", {}).get("records"))
+
 
+def _format_records(num_records):
     records_normalized = num_records
 
     if num_records > 1_000_000:
@@ -1006,7 +1400,11 @@ def _data_job_feedback_func(status: str, feedback: dict, job_type: str):
 
 
 def _download_exported_file(
-    client: Client, cluster_id: str, save_as: str, export_job_id: str
+    client: Client,
+    cluster_id: str,
+    save_as: str,
+    export_job_id: str,
+    decompress: bool = False,
 ):
     data, errors = client.get(
         f"/api/v2/clusters/{cluster_id}/export-jobs/{export_job_id}/"
@@ -1030,31 +1428,34 @@ def _download_exported_file(
                 print_success(f"Download URL: {file_data['download_url']}")
                 return
             HALO.stop()
+            if save_as == "-":
+                _stream_exported_file(file_data["download_url"], decompress)
+                return
             print_info("Downloading file...")
 
-            r = requests.get(
-                file_data["download_url"], stream=True, allow_redirects=True
-            )
-            if r.status_code != 200:
-                r.raise_for_status()
-                print_error(
-                    f"Request to {file_data['download_url']} returned status code "
-                    f"{r.status_code}"
-                )
-            file_size = int(r.headers.get("Content-Length", 0))
-
             path = pathlib.Path(save_as).expanduser().resolve()
             path.parent.mkdir(parents=True, exist_ok=True)
-
-            desc = "(Unknown total file size)" if file_size == 0 else ""
-            r.raw.read = functools.partial(r.raw.read, decode_content=True)  # type: ignore  # noqa
-            with tqdm.wrapattr(r.raw, "read", total=file_size, desc=desc) as r_raw:
-                with path.open("wb") as f:
-                    copyfileobj(r_raw, f)
+            try:
+                download_file(file_data["download_url"], path)
+            except DownloadFailed as e:
+                print_error(str(e))
+                return
 
             print_success(f"Successfully downloaded file to {path}")
 
 
+def _stream_exported_file(download_url: str, decompress: bool) -> None:
+    try:
+        stream_file(download_url, sys.stdout.buffer, decompress=decompress)
+    except DownloadFailed as e:
+        print_error(str(e))
+    except BrokenPipeError:
+        # The reading end of the pipe, e.g. ``head``, has been closed. Python
+        # would fail again when flushing stdout at exit.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+
+
 def _get_export_job_operation_status(
     client: Client, cluster_id: str, request_params: Dict
 ):
@@ -1073,6 +1474,58 @@ def _get_export_job_operation_status(
     return status, msg, feedback_data
 
 
+# Operations are polled quickly at first, since many of them complete within
+# a few seconds, and then less and less often.
+POLL_INITIAL_INTERVAL = 1.0
+POLL_MAX_INTERVAL = 30.0
+POLL_BACKOFF_FACTOR = 1.5
+# The number of consecutive failed requests after which polling the status of
+# an operation is given up.
+POLL_MAX_FAILURES = 3
+
+
+class _PollFailures:
+    """
+    Count the consecutive failed status requests per operation. A failed
+    request doesn't tell anything about the operation, which most likely
+    continues, so polling is only given up once the requests keep failing.
+    """
+
+    def __init__(self, max_failures: int = POLL_MAX_FAILURES):
+        self.max_failures = max_failures
+        self._counts: Dict[str, int] = {}
+
+    def failed(self, key: str) -> bool:
+        """
+        Record a failed request and return whether to give up polling.
+        """
+        self._counts[key] = self._counts.get(key, 0) + 1
+        return self._counts[key] >= self.max_failures
+
+    def succeeded(self, key: str) -> None:
+        self._counts.pop(key, None)
+
+
+def _poll_intervals(
+    initial: float = POLL_INITIAL_INTERVAL,
+    maximum: float = POLL_MAX_INTERVAL,
+    factor: float = POLL_BACKOFF_FACTOR,
+) -> Iterator[float]:
+    """
+    Yield exponentially growing intervals with a random jitter, so that many
+    concurrent waits don't poll the API at the same time.
+    """
+    interval = initial
+    while True:
+        yield interval * random.uniform(0.75, 1.0)
+        interval = min(interval * factor, maximum)
+
+
+def _operation_timeout() -> Optional[float]:
+    timeout = os.getenv("CROUD_OPERATION_TIMEOUT")
+    return float(timeout) if timeout else None
+
+
 def _wait_for_completed_operation(
     *,
     client: Client,
@@ -1081,7 +1534,19 @@ def _wait_for_completed_operation(
     operation_status_func=_get_operation_status,
     feedback_func=None,
     post_success_func=None,
+    timeout: Optional[float] = None,
 ):
+    """
+    Poll the status of an operation until it succeeded or failed.
+
+    :param timeout:
+      The number of seconds after which to stop waiting. Defaults to the
+      ``CROUD_OPERATION_TIMEOUT`` environment variable, or no timeout.
+    """
+    if timeout is None:
+        timeout = _operation_timeout()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    intervals = _poll_intervals()
     last_status = None
     last_msg = None
     while True:
@@ -1124,8 +1589,184 @@ def _wait_for_completed_operation(
                 )
             break
 
+        interval = next(intervals)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print_error(
+                    f"Timed out after {timeout:g} seconds waiting for the operation "
+                    "to complete. It continues in the background."
+                )
+                break
+            interval = min(interval, remaining)
         with HALO:
-            time.sleep(10)
+            time.sleep(interval)
+
+
+def _clusters_batch_operation(
+    args: Namespace,
+    action: str,
+    body: Dict,
+    operation_type: str,
+    keys: List[str],
+    description: Optional[str] = None,
+) -> None:
+    """
+    Start the same operation on several clusters at once, wait for all of
+    them to complete and print the result of each cluster.
+
+    :param description:
+      The name of the operation in the progress message. Defaults to
+      ``action``.
+    """
+    cluster_ids = list(dict.fromkeys(args.cluster_id))
+    client = Client.from_args(args)
+    with AsyncClient(client) as async_client:
+        responses = gather(
+            *(
+                async_client.put(f"/api/v2/clusters/{cluster_id}/{action}/", body=body)
+                for cluster_id in cluster_ids
+            )
+        )
+
+    results: Dict[str, Dict[str, Optional[str]]] = {}
+    pending = []
+    for cluster_id, (_, errors) in zip(cluster_ids, responses):
+        if errors:
+            message = cast(Optional[str], errors.get("message"))
+            results[cluster_id] = {"status": "FAILED", "message": message}
+        else:
+            pending.append(cluster_id)
+
+    if pending:
+        print_info(
+            f"Cluster {description or action} initiated for {len(pending)} "
+            "clusters. "
+            "It may take a few minutes to complete the changes."
+        )
+        results.update(
+            _wait_for_completed_operations(
+                client=client,
+                cluster_ids=pending,
+                request_params={"type": operation_type, "limit": 1},
+            )
+        )
+
+        # Re-fetch the clusters' info
+        with AsyncClient(client) as async_client:
+            clusters = gather(
+                *(
+                    async_client.get(f"/api/v2/clusters/{cluster_id}/")
+                    for cluster_id in pending
+                )
+            )
+    else:
+        clusters = []
+    cluster_data = {
+        cluster_id: data or {} for cluster_id, (data, _) in zip(pending, clusters)
+    }
+
+    rows = [
+        {**cluster_data.get(cluster_id, {}), "id": cluster_id, **results[cluster_id]}
+        for cluster_id in cluster_ids
+    ]
+    print_response(
+        data=rows,
+        errors=None,
+        keys=[*keys, "status", "message"],
+        output_fmt=get_output_format(args),
+    )
+
+    failed = sum(1 for result in results.values() if result["status"] != "SUCCEEDED")
+    if failed:
+        print_error(
+            f"The operation did not succeed for {failed} of {len(rows)} clusters."
+        )
+    else:
+        print_success(f"Operation completed for {len(rows)} clusters.")
+
+
+def _wait_for_completed_operations(
+    *,
+    client: Client,
+    cluster_ids: List[str],
+    request_params: Dict,
+    timeout: Optional[float] = None,
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Poll the status of the operations of several clusters in a single loop
+    until all of them succeeded or failed. Returns the final status and
+    message of each cluster. A cluster whose status can't be requested stays
+    pending until the request failed ``POLL_MAX_FAILURES`` times in a row.
+
+    :param timeout:
+      The number of seconds after which to stop waiting. Defaults to the
+      ``CROUD_OPERATION_TIMEOUT`` environment variable, or no timeout.
+    """
+    if timeout is None:
+        timeout = _operation_timeout()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    intervals = _poll_intervals()
+    results: Dict[str, Dict[str, Optional[str]]] = {}
+    pending = list(cluster_ids)
+    failures = _PollFailures()
+    last_summary = None
+
+    async def get_status(async_client: AsyncClient, cluster_id: str):
+        data, errors = await async_client.get(
+            f"/api/v2/clusters/{cluster_id}/operations/", params=request_params
+        )
+        if errors:
+            message = cast(Optional[str], errors.get("message"))
+            if failures.failed(cluster_id):
+                return "FAILED", message
+            return results.get(cluster_id, {}).get("status"), message
+        failures.succeeded(cluster_id)
+        try:
+            status, message, _ = _parse_operation_status(data)
+        except AsyncOperationNotFound as e:
+            return "FAILED", str(e)
+        return status, message
+
+    with AsyncClient(client) as async_client:
+        while True:
+            statuses = gather(
+                *(get_status(async_client, cluster_id) for cluster_id in pending)
+            )
+            for cluster_id, (status, message) in zip(pending, statuses):
+                results[cluster_id] = {"status": status, "message": message}
+            pending = [
+                cluster_id
+                for cluster_id in pending
+                if results[cluster_id]["status"] not in ["FAILED", "SUCCEEDED"]
+            ]
+
+            counts: Dict[str, int] = {}
+            for result in results.values():
+                status = result["status"] or "UNKNOWN"
+                counts[status] = counts.get(status, 0) + 1
+            summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+            if summary != last_summary:
+                print_info(f"Status: {summary}")
+                last_summary = summary
+
+            if not pending:
+                break
+
+            interval = next(intervals)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print_error(
+                        f"Timed out after {timeout:g} seconds waiting for the "
+                        "operations to complete. They continue in the background."
+                    )
+                    break
+                interval = min(interval, remaining)
+            with HALO:
+                time.sleep(interval)
+
+    return results
 
 
 def _lookup_organization_id_for_project(
@@ -0,0 +1,273 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import functools
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from shutil import copyfileobj
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Set
+
+import requests
+
+from croud.api import http_session
+from croud.clusters.exceptions import DownloadFailed
+
+# Files are downloaded in segments of this size, several at a time
+SEGMENT_SIZE = 16 * 1024 * 1024
+DEFAULT_WORKERS = 8
+# Attempts per segment before giving up; the download can still be resumed
+SEGMENT_ATTEMPTS = 3
+BUFFER_SIZE = 1024 * 1024
+
+# An ETag that is the MD5 digest of the file (not a multipart upload)
+MD5_ETAG = re.compile(r'^"?([0-9a-f]{32})"?$')
+
+
+def download_file(url: str, path: Path, *, workers: int = DEFAULT_WORKERS) -> None:
+    """
+    Download a file to ``path``.
+
+    If the server supports range requests, the file is downloaded in
+    segments by several workers in parallel into a ``.part`` file, and the
+    segments that have been completed are recorded in a ``.part.json`` file.
+    A failed or interrupted download is resumed from these files when it's
+    started again. Finally, the file is verified with its MD5 digest if the
+    ``ETag`` is one.
+    """
+    response = http_session().get(url, stream=True, allow_redirects=True)
+    if response.status_code != 200:
+        raise DownloadFailed(
+            f"Request to {url} returned status code {response.status_code}"
+        )
+
+    size = int(response.headers.get("Content-Length", 0))
+    part_path = path.with_name(f"{path.name}.part")
+    if (
+        size > 0
+        and response.headers.get("Accept-Ranges") == "bytes"
+        and not response.headers.get("Content-Encoding")
+    ):
+        response.close()
+        etag = response.headers.get("ETag")
+        _download_segments(url, path, part_path, size, etag, workers)
+    else:
+        _download_stream(response, part_path, size)
+    os.replace(part_path, path)
+
+
+def stream_file(url: str, output: BinaryIO, *, decompress: bool = False) -> None:
+    """
+    Write a file to ``output`` while it is downloaded, without storing it.
+
+    If ``decompress`` is set, the file is gzip decompressed on the fly,
+    unless the server already applies a ``Content-Encoding`` to it, which
+    is removed anyway.
+    """
+    with http_session().get(url, stream=True, allow_redirects=True) as response:
+        if response.status_code != 200:
+            raise DownloadFailed(
+                f"Request to {url} returned status code {response.status_code}"
+            )
+        chunks: Iterable[bytes] = response.iter_content(BUFFER_SIZE)
+        if decompress and not response.headers.get("Content-Encoding"):
+            chunks = _gunzip(chunks)
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        except (requests.RequestException, zlib.error) as e:
+            raise DownloadFailed(f"The download failed: {e}") from e
+        output.flush()
+
+
+def _gunzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # A gzip file may consist of several members, which are concatenated
+    decompressor = zlib.decompressobj(31)
+    for chunk in chunks:
+        while chunk:
+            yield decompressor.decompress(chunk)
+            chunk = decompressor.unused_data
+            if chunk:
+                yield decompressor.flush()
+                decompressor = zlib.decompressobj(31)
+    yield decompressor.flush()
+
+
+def _download_stream(response: requests.Response, part_path: Path, size: int):
+    from tqdm.auto import tqdm
+
+    desc = "(Unknown total file size)" if size == 0 else ""
+    response.raw.read = functools.partial(response.raw.read, decode_content=True)  # type: ignore  # noqa
+    with tqdm.wrapattr(response.raw, "read", total=size, desc=desc) as raw:
+        with part_path.open("wb") as f:
+            copyfileobj(raw, f)
+
+
+def _load_state(state_path: Path) -> Dict[str, Any]:
+    try:
+        with state_path.open() as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_state(state_path: Path, state: Dict[str, Any]) -> None:
+    tmp_path = state_path.with_name(f".{state_path.name}.tmp")
+    with tmp_path.open("w") as fp:
+        json.dump(state, fp)
+    os.replace(tmp_path, state_path)
+
+
+def _download_segments(
+    url: str,
+    path: Path,
+    part_path: Path,
+    size: int,
+    etag: Optional[str],
+    workers: int,
+) -> None:
+    from tqdm.auto import tqdm
+
+    state_path = path.with_name(f"{path.name}.part.json")
+    state = _load_state(state_path)
+    done: Set[int] = set()
+    if (
+        state.get("etag") == etag
+        and state.get("size") == size
+        and state.get("segment_size") == SEGMENT_SIZE
+        and part_path.exists()
+        and part_path.stat().st_size == size
+    ):
+        done = set(state["done"])
+    else:
+        # Preallocate the file, so that segments can be written in any order
+        with part_path.open("wb") as f:
+            f.truncate(size)
+
+    segments = math.ceil(size / SEGMENT_SIZE)
+    pending = [i for i in range(segments) if i not in done]
+    lock = threading.Lock()
+    # Set when the download is aborted, so that running segments stop early
+    stopped = threading.Event()
+
+    def store_done() -> None:
+        _store_state(
+            state_path,
+            {
+                "etag": etag,
+                "size": size,
+                "segment_size": SEGMENT_SIZE,
+                "done": sorted(done),
+            },
+        )
+
+    initial = sum(min(SEGMENT_SIZE, size - i * SEGMENT_SIZE) for i in done)
+    with tqdm(
+        total=size,
+        initial=initial,
+        unit="B",
+        unit_scale=True,
+        unit_divisor=1024,
+    ) as progress:
+
+        def download_segment(index: int) -> None:
+            start = index * SEGMENT_SIZE
+            end = min(start + SEGMENT_SIZE, size) - 1
+            for attempt in range(1, SEGMENT_ATTEMPTS + 1):
+                try:
+                    _download_range(url, part_path, start, end, progress, stopped)
+                    break
+                except (requests.RequestException, DownloadFailed):
+                    if attempt == SEGMENT_ATTEMPTS or stopped.is_set():
+                        raise
+            with lock:
+                done.add(index)
+                store_done()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(download_segment, i) for i in pending]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException as e:
+                # Also on KeyboardInterrupt, the executor would otherwise
+                # download all remaining segments before it shuts down
+                stopped.set()
+                for future in futures:
+                    future.cancel()
+                if isinstance(e, (requests.RequestException, DownloadFailed)):
+                    raise DownloadFailed(
+                        f"The download failed: {e}. "
+                        "Run the command again to resume it."
+                    )
+                raise
+
+    match = MD5_ETAG.match(etag or "")
+    if match and _md5(part_path) != match.group(1):
+        part_path.unlink()
+        state_path.unlink()
+        raise DownloadFailed("The downloaded file is corrupt, its checksum differs.")
+    state_path.unlink(missing_ok=True)
+
+
+def _download_range(
+    url: str,
+    part_path: Path,
+    start: int,
+    end: int,
+    progress,
+    stopped: Optional[threading.Event] = None,
+):
+    response = http_session().get(
+        url, headers={"Range": f"bytes={start}-{end}"}, stream=True
+    )
+    if response.status_code != 206:
+        raise DownloadFailed(
+            f"Request to {url} returned status code {response.status_code}"
+        )
+    written = 0
+    try:
+        with response, part_path.open("r+b") as f:
+            f.seek(start)
+            for block in response.iter_content(BUFFER_SIZE):
+                if stopped is not None and stopped.is_set():
+                    raise DownloadFailed("The download was aborted")
+                f.write(block)
+                written += len(block)
+                progress.update(len(block))
+        if written != end - start + 1:
+            raise DownloadFailed(f"Incomplete response for bytes {start}-{end}")
+    except BaseException:
+        # The segment is downloaded again from its start
+        progress.update(-written)
+        raise
+
+
+def _md5(path: Path) -> str:
+    digest = hashlib.md5(usedforsecurity=False)
+    with path.open("rb") as f:
+        for block in iter(functools.partial(f.read, BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -20,3 +20,7 @@
 
 class AsyncOperationNotFound(Exception):
     pass
+
+
+class DownloadFailed(Exception):
+    pass
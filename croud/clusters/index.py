@@ -0,0 +1,119 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import quote
+
+from platformdirs import user_cache_dir
+
+from croud.api import Client
+from croud.config import CONFIG
+
+# The cluster attributes that are kept in the index. None of them change
+# during the lifetime of a cluster.
+INDEX_FIELDS = ("project_id", "organization_id", "name", "fqdn")
+
+
+def default_index_path(profile: str) -> Path:
+    return (
+        Path(user_cache_dir("Crate")) / "clusters" / f"{quote(profile, safe='')}.json"
+    )
+
+
+class ClusterIndex:
+    """
+    A persistent index that resolves a cluster ID to the cluster's project,
+    organization, name and FQDN, so that they do not have to be looked up with
+    chained API requests every time.
+
+    Entries are added whenever croud fetches a cluster and removed when the
+    cluster is deleted.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._entries: Optional[Dict[str, Dict[str, str]]] = None
+
+    @property
+    def entries(self) -> Dict[str, Dict[str, str]]:
+        if self._entries is None:
+            try:
+                with self._path.open() as fp:
+                    self._entries = json.load(fp)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries  # type: ignore[return-value]
+
+    def get(self, cluster_id: str, field: str) -> Optional[str]:
+        return self.entries.get(cluster_id, {}).get(field)
+
+    def add(self, clusters: Iterable[Dict], **extra: str) -> None:
+        """
+        Add or update the entries of the given clusters (as returned by the
+        API). ``extra`` are additional fields, e.g. the ``organization_id``.
+        """
+        changed = False
+        for cluster in clusters:
+            if not cluster.get("id"):
+                continue
+            entry = self.entries.setdefault(cluster["id"], {})
+            for field in INDEX_FIELDS:
+                value = extra.get(field, cluster.get(field))
+                if value and entry.get(field) != value:
+                    entry[field] = value
+                    changed = True
+        if changed:
+            self._store()
+
+    def remove(self, cluster_id: str) -> None:
+        if self.entries.pop(cluster_id, None) is not None:
+            self._store()
+
+    def _store(self) -> None:
+        tmp_path = self._path.with_name(f".{self._path.name}.{os.getpid()}.tmp")
+        try:
+            self._path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            with tmp_path.open("w") as fp:
+                json.dump(self.entries, fp)
+            os.replace(tmp_path, self._path)
+        except OSError:
+            # The index is an optimization only, failing to write is fine
+            tmp_path.unlink(missing_ok=True)
+
+
+_INDEXES: Dict[Path, ClusterIndex] = {}
+
+
+def get_cluster_index(client: Client) -> Optional[ClusterIndex]:
+    """
+    Return the cluster index of the current profile, or None if the client
+    does not cache data.
+
+    With ``--no-cache`` (``client.cache_reads`` is False) the index is still
+    returned, so that it is kept up to date, but must not be read from.
+    """
+    if client.cache is None:
+        return None
+    path = default_index_path(CONFIG.name)
+    if path not in _INDEXES:
+        _INDEXES[path] = ClusterIndex(path)
+    return _INDEXES[path]
@@ -16,29 +16,73 @@
 # However, if you have executed another commercial license agreement
 # with Crate these terms will supersede the license and you may use the
 # software solely pursuant to the terms of the relevant commercial agreement.
+import hashlib
+import json
 import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 
-import yaml
-from marshmallow import ValidationError
 from platformdirs import user_config_dir
 
+from croud import __version__
 from croud.config.exceptions import InvalidConfiguration, InvalidProfile
-from croud.config.schemas import ConfigSchema, ProfileSchema
 from croud.config.types import ConfigurationType, ProfileType
 
-DEFAULT_CONFIGURATION = """\
-default-format: table
-current-profile: cratedb.cloud
-profiles:
-  cratedb.cloud:
-    auth-token: NULL
-    key: NULL
-    secret: NULL
-    endpoint: https://console.cratedb.cloud
-    region: _any_
-"""
+# ``yaml`` and ``marshmallow`` (via ``croud.config.schemas``) are slow to
+# import, so they are only imported when the configuration file has to be
+# parsed, validated or written, but not when it is loaded from the cache.
+
+
+def _default_configuration() -> ConfigurationType:
+    # A valid configuration, which doesn't need to be validated
+    return {
+        "default-format": "table",
+        "current-profile": "cratedb.cloud",
+        "profiles": {
+            "cratedb.cloud": {
+                "auth-token": None,
+                "key": os.getenv("CRATEDB_CLOUD_API_KEY"),
+                "secret": os.getenv("CRATEDB_CLOUD_API_SECRET"),
+                "endpoint": "https://console.cratedb.cloud",
+                "region": "_any_",
+            },
+        },
+    }
+
+
+# A file modified this shortly before it was cached could be modified again
+# without a change of its modification time, so its content is checked.
+RACY_INTERVAL_NS = 2_000_000_000
+
+
+def _load_yaml(stream) -> Any:
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(stream, Loader=loader)
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    """
+    Write ``content`` to a temporary file next to ``path`` and rename it, so
+    that readers either see the old or the new file, but never a partial one.
+
+    The files contain credentials, so they are only accessible by the user.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "wb") as fp:
+            fp.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
 
 
 class Configuration:
@@ -57,17 +101,27 @@ class Configuration:
     first access of the ``config`` property.
 
     The configuration is written to disk only whenever modifications are made
-    to the in-memory state using the "public" methods.
+    to the in-memory state using the "public" methods. Within a
+    :meth:`transaction`, all modifications are written at once when the
+    outermost transaction ends.
 
     If there is no configuration file on disk, the state will be populated with
     the default configuration.
+
+    Parsing and validating the YAML file is slow compared to the rest of a
+    command, so the validated configuration is kept in a hidden JSON file next
+    to it. It is used as long as the configuration file has the same
+    modification time and size, or the same content, and was written by the
+    same version of croud.
     """
 
     def __init__(self, name: str, path: Optional[Path] = None):
         self._config_dir = path or Path(user_config_dir("Crate"))
         self._file_path = self._config_dir / name
+        self._cache_path = self._config_dir / f".{name}.cache.json"
         self._config: Optional[ConfigurationType] = None
-        self._schema = ConfigSchema()
+        self._transaction_depth = 0
+        self._dirty = False
 
     @property
     def config(self) -> ConfigurationType:
@@ -129,24 +183,67 @@ class Configuration:
 
     def load(self) -> ConfigurationType:
         if not self._file_path.exists():
-            data = yaml.safe_load(DEFAULT_CONFIGURATION)
-            data["profiles"]["cratedb.cloud"]["key"] = os.getenv(
-                "CRATEDB_CLOUD_API_KEY"
-            )
-            data["profiles"]["cratedb.cloud"]["secret"] = os.getenv(
-                "CRATEDB_CLOUD_API_SECRET"
-            )
-        else:
-            with open(self._file_path, "r") as fp:
-                data = yaml.safe_load(fp)
-        # self._schema.load() will evaluate the correctness of the
+            return _default_configuration()
+        compiled = self._load_compiled()
+        if compiled is not None:
+            return compiled
+
+        from marshmallow import ValidationError
+
+        from croud.config.schemas import ConfigSchema
+
+        content = self._file_path.read_bytes()
+        data = _load_yaml(content)
+        # ConfigSchema().load() will evaluate the correctness of the
         # configuration
         try:
-            return self._schema.load(data)
+            config = ConfigSchema().load(data)
         except ValidationError:
             raise InvalidConfiguration(
                 f"{self._file_path} is not a valid configuration."
             ) from None
+        self._store_compiled(config, content)
+        return config
+
+    def _load_compiled(self) -> Optional[ConfigurationType]:
+        """
+        Return the validated configuration from the cache file, if it matches
+        the configuration file.
+        """
+        try:
+            stat = os.stat(self._file_path)
+            with open(self._cache_path, "r") as fp:
+                cached = json.load(fp)
+            if cached["version"] != __version__ or cached["size"] != stat.st_size:
+                return None
+            if (
+                cached["mtime_ns"] == stat.st_mtime_ns
+                and stat.st_mtime_ns < cached["stored_ns"] - RACY_INTERVAL_NS
+            ):
+                return cached["config"]
+            # The file has been touched, but it may not have changed
+            content = self._file_path.read_bytes()
+            if hashlib.sha256(content).hexdigest() != cached["sha256"]:
+                return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        self._store_compiled(cached["config"], content)
+        return cached["config"]
+
+    def _store_compiled(self, config: ConfigurationType, content: bytes) -> None:
+        try:
+            stat = os.stat(self._file_path)
+            cached = {
+                "version": __version__,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": hashlib.sha256(content).hexdigest(),
+                "stored_ns": time.time_ns(),
+                "config": config,
+            }
+            _write_atomic(self._cache_path, json.dumps(cached).encode())
+        except OSError:
+            pass
 
     def is_valid(self):
         try:
@@ -160,8 +257,38 @@ class Configuration:
         # make sure the config is in memory before we open the file for writing
         data = self.config
         self._config_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
-        with open(self._file_path, "w") as fp:
-            yaml.safe_dump(data, fp)
+        import yaml
+
+        content = yaml.safe_dump(data).encode()
+        # Replace the target of a symlinked configuration file, not the link
+        _write_atomic(Path(os.path.realpath(self._file_path)), content)
+        self._dirty = False
+        self._store_compiled(data, content)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Defer writing modifications of the configuration until the outermost
+        transaction ends, so that multiple modifications result in a single
+        write.
+
+        The modifications are also written if the transaction ends with an
+        exception, since e.g. a renewed auth token must not get lost when the
+        command fails.
+        """
+        self._transaction_depth += 1
+        try:
+            yield
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0 and self._dirty:
+                self.dump()
+
+    def _changed(self) -> None:
+        if self._transaction_depth:
+            self._dirty = True
+        else:
+            self.dump()
 
     def _set_profile_option(self, profile: str, attr: str, value: Any) -> None:
         if profile not in self.profiles:
@@ -214,18 +341,20 @@ class Configuration:
         self.update_profile(profile, data)
 
     def update_profile(self, profile: str, data: Dict) -> None:
+        from croud.config.schemas import ProfileSchema
+
         profile_schema = ProfileSchema()
         self.profiles[profile] = profile_schema.dump(data)
-        self.dump()
+        self._changed()
 
     def remove_profile(self, profile: str) -> None:
         if profile not in self.profiles or profile == self.name:
             raise InvalidProfile(profile)
         del self.profiles[profile]
-        self.dump()
+        self._changed()
 
     def use_profile(self, profile: str) -> None:
         if profile not in self.profiles:
             raise InvalidProfile(profile)
         self._config["current-profile"] = profile  # type: ignore
-        self.dump()
+        self._changed()
@@ -0,0 +1,157 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Pattern, Tuple
+from urllib.parse import quote
+
+from platformdirs import user_cache_dir
+
+# Read-only endpoints whose responses rarely change, and the number of
+# seconds for which a cached response is used without asking the API again.
+CACHE_TTLS: List[Tuple[Pattern, int]] = [
+    (re.compile(r"^/api/v2/products/$"), 3600),
+    (re.compile(r"^/api/v2/regions/$"), 3600),
+    (re.compile(r"^/api/v2/organizations/$"), 300),
+    (re.compile(r"^/api/v2/users/me/$"), 300),
+    (re.compile(r"^/api/v2/projects/[^/]+/$"), 300),
+]
+
+# Request headers that change the response of an endpoint, and are therefore
+# part of the cache key.
+VARY_HEADERS = ("X-Auth-Sudo", "X-Region")
+
+DEFAULT_MAX_SIZE = 16 * 1024 * 1024
+
+
+def default_cache_path() -> Path:
+    return Path(user_cache_dir("Crate")) / "http"
+
+
+class CacheEntry:
+    def __init__(self, stored: float, etag: Optional[str], body: Any):
+        self.stored = stored
+        self.etag = etag
+        self.body = body
+
+    def is_fresh(self, ttl: int) -> bool:
+        return time.time() - self.stored < ttl
+
+
+class HttpCache:
+    """
+    An on-disk cache for responses of read-only CrateDB Cloud API endpoints.
+
+    Responses are used for the duration of the TTL of their endpoint (see
+    :data:`CACHE_TTLS`). Afterwards they are revalidated with a conditional
+    request if the API returned an ``ETag``. The least recently used
+    responses are evicted once the cache exceeds ``max_size`` bytes.
+
+    Responses are cached per URL, query parameters and the values of the
+    :data:`VARY_HEADERS`, since e.g. a superuser gets different responses.
+    """
+
+    def __init__(self, directory: Path, max_size: Optional[int] = None):
+        self.directory = directory
+        if max_size is None:
+            max_size = int(os.getenv("CROUD_HTTP_CACHE_SIZE", DEFAULT_MAX_SIZE))
+        self.max_size = max_size
+
+    @staticmethod
+    def for_profile(profile: str) -> "HttpCache":
+        return HttpCache(default_cache_path() / quote(profile, safe=""))
+
+    @staticmethod
+    def ttl(endpoint: str) -> Optional[int]:
+        for pattern, ttl in CACHE_TTLS:
+            if pattern.match(endpoint):
+                return ttl
+        return None
+
+    def _path(
+        self,
+        url: str,
+        params: Optional[Dict],
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Path:
+        vary = {name: (headers or {}).get(name) for name in VARY_HEADERS}
+        key = json.dumps([url, params, vary], sort_keys=True)
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Optional[CacheEntry]:
+        path = self._path(url, params, headers)
+        try:
+            with path.open() as fp:
+                data = json.load(fp)
+            # The modification time tracks the last use of an entry
+            path.touch()
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(data["stored"], data["etag"], data["body"])
+
+    def put(
+        self,
+        url: str,
+        params: Optional[Dict],
+        body: Any,
+        etag: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        path = self._path(url, params, headers)
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with tmp_path.open("w") as fp:
+                json.dump({"stored": time.time(), "etag": etag, "body": body}, fp)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The cache is an optimization only, failing to write is fine
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
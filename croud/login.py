@@ -22,6 +22,7 @@ from typing import Optional
 
 from croud.api import Client
 from croud.config import CONFIG
+from croud.http_cache import HttpCache
 from croud.printer import print_error, print_info, print_warning
 from croud.server import Server
 from croud.util import can_launch_browser, open_page_in_browser
@@ -66,6 +67,8 @@ def login(args: Namespace) -> None:
     except (KeyboardInterrupt, SystemExit):
         print_warning("Login cancelled.")
     else:
+        # Cached responses may belong to a different user
+        HttpCache.for_profile(CONFIG.name).clear()
         organization_id = get_org_id()
         CONFIG.set_organization_id(CONFIG.name, organization_id)
         print_info("Login successful.")
@@ -29,6 +29,8 @@ LOGOUT_PATH = "/oauth2/logout"
 def logout(args: Namespace) -> None:
     client = Client.from_args(args)
     client.get(LOGOUT_PATH)
+    if client.cache is not None:
+        client.cache.clear()
     CONFIG.set_current_auth_token(None)
     CONFIG.set_current_organization_id(None)
     print_info("You have been logged out.")
@@ -17,13 +17,26 @@
 # with Crate these terms will supersede the license and you may use the
 # software solely pursuant to the terms of the relevant commercial agreement.
 
+import json
+import os
+import pathlib
 import re
 from argparse import Namespace
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, cast
 
-from croud.api import Client
+from croud.api import Client, ResponsePair
 from croud.config import get_output_format
-from croud.printer import print_error, print_response
+from croud.organizations.auditlogs.store import AuditLogStore
+from croud.printer import (
+    PRINTERS,
+    StreamFormatPrinter,
+    print_error,
+    print_info,
+    print_response,
+    print_success,
+    print_warning,
+)
 from croud.util import org_id_config_fallback
 
 # Hat tip to Django for ISO8601 deserialization functions
@@ -42,10 +55,15 @@ def actor_id_transform(field):
 
 @org_id_config_fallback
 def auditlogs_list(args: Namespace) -> None:
+    if args.actor and not args.offline:
+        print_error("Filtering by actor is only supported with --offline.")
+        return
+    if args.offline and args.cache:
+        print_error("The --offline and --cache options are mutually exclusive.")
+        return
+
     client = Client.from_args(args)
     url = f"/api/v2/organizations/{args.org_id}/auditlogs/"
-    data: List[Dict] = []
-    cursor = None
 
     params = {}
     if args.action:
@@ -61,20 +79,237 @@ def auditlogs_list(args: Namespace) -> None:
             print_error("Invalid 'to' date format.")
         params["to"] = args.to
 
-    while True:
-        if cursor:
-            params["last"] = cursor
-        page, errors = client.get(url, params=params)
-        if errors or not page:
-            break
-        else:
-            data.extend(page)
-            cursor = data[-1]["id"]
+    # Formats that are written row by row are printed while the pages are
+    # fetched, all other formats once all pages have been fetched.
+    output_fmt = STREAM_FORMATS[args.stream] if args.stream else get_output_format(args)
+    keys = ["action", "actor", "created"]
+    if args.stream:
+        # Exports include the event IDs
+        keys.insert(0, "id")
+    transforms = {"actor": actor_id_transform}
+    printer = PRINTERS[output_fmt](keys, transforms)
+
+    if args.offline:
+        with AuditLogStore() as index:
+            data = index.query(
+                args.org_id,
+                action=args.action,
+                actor_id=args.actor,
+                from_=args.from_,
+                to=args.to,
+            )
+        print_response(
+            data=data,
+            errors=None,
+            keys=keys,
+            output_fmt=output_fmt,
+            transforms=transforms,
+        )
+        return
+
+    store = AuditLogStore() if args.cache else None
+    errors: Dict = {}
+    try:
+        events = _iter_auditlogs(client, url, params, errors, store, args.org_id)
+        if isinstance(printer, StreamFormatPrinter):
+            printer.print_rows(events)
+            if errors:
+                print_response(data=None, errors=errors, output_fmt="json")
+            return
+        data = list(events)
+    finally:
+        if store:
+            store.close()
 
     print_response(
         data=data,
         errors=errors,
-        keys=["action", "actor", "created"],
-        output_fmt=get_output_format(args),
-        transforms={"actor": actor_id_transform},
+        keys=keys,
+        output_fmt=output_fmt,
+        transforms=transforms,
     )
+
+
+@org_id_config_fallback
+def auditlogs_sync(args: Namespace) -> None:
+    client = Client.from_args(args)
+    url = f"/api/v2/organizations/{args.org_id}/auditlogs/"
+    output = pathlib.Path(args.output).expanduser()
+    checkpoint_path = pathlib.Path(
+        args.checkpoint or f"{args.output}.checkpoint"
+    ).expanduser()
+
+    checkpoints = _load_checkpoints(checkpoint_path)
+    entry = checkpoints.get(args.org_id, {})
+    # An entry without a timestamp only holds the offset of a pending append
+    checkpoint = entry if "created" in entry else None
+
+    # Discard events written by a previous run that was interrupted before
+    # its checkpoint was stored, since they are fetched again.
+    _truncate_output(output, entry.get("pending_offset", entry.get("offset")))
+
+    params = {}
+    if checkpoint:
+        if args.from_:
+            print_warning(
+                f"Ignoring --from, since events are synced from the checkpoint "
+                f"in {checkpoint_path}."
+            )
+        params["from"] = checkpoint["created"]
+    elif args.from_:
+        if not iso8601_datetime_re.fullmatch(args.from_):
+            print_error("Invalid 'from' date format.")
+            return
+        params["from"] = args.from_
+
+    # Events are returned newest first, so the whole delta needs to be fetched
+    # before it can be appended in chronological order.
+    events: List[Dict] = []
+    cursor = None
+    while True:
+        page, errors = _get_auditlogs_page(client, url, params, cursor)
+        if errors:
+            print_response(data=None, errors=errors, output_fmt="json")
+            return
+        if not page:
+            break
+        events.extend(page)
+        cursor = page[-1]["id"]
+
+    if checkpoint:
+        events = _events_after_checkpoint(events, checkpoint)
+    if not events:
+        print_info("No new audit events.")
+        return
+    # Events with the same timestamp stay in the order of the API
+    events.reverse()
+    events.sort(key=lambda event: event["created"])
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("ab") as fp:
+        # The offset is stored before appending, so that a run interrupted
+        # before its checkpoint is stored can be undone by the next one.
+        checkpoints[args.org_id] = {**entry, "pending_offset": fp.tell()}
+        _store_checkpoints(checkpoint_path, checkpoints)
+        fp.writelines(json.dumps(event).encode() + b"\n" for event in events)
+        fp.flush()
+        os.fsync(fp.fileno())
+        offset = fp.tell()
+
+    # More events with the same timestamp as the last one may show up later,
+    # so all events that have been synced with that timestamp are remembered
+    created = events[-1]["created"]
+    ids = [event["id"] for event in events if event["created"] == created]
+    if checkpoint and checkpoint["created"] == created:
+        ids = checkpoint.get("ids", []) + ids
+    checkpoints[args.org_id] = {
+        "id": events[-1]["id"],
+        "ids": ids,
+        "created": created,
+        "offset": offset,
+    }
+    _store_checkpoints(checkpoint_path, checkpoints)
+    print_success(f"Appended {len(events)} new audit events to {output}.")
+
+
+def _events_after_checkpoint(events: List[Dict], checkpoint: Dict) -> List[Dict]:
+    """
+    Return the events that are newer than the checkpoint, or have the same
+    timestamp as the checkpoint, but have not been synced yet.
+    """
+    created = checkpoint["created"]
+    if "ids" not in checkpoint:
+        # Checkpoints of older versions don't know which events have been
+        # synced with the same timestamp
+        return [e for e in events if e["created"] > created]
+    synced = set(checkpoint["ids"])
+    return [
+        e
+        for e in events
+        if e["created"] > created or (e["created"] == created and e["id"] not in synced)
+    ]
+
+
+def _truncate_output(path: pathlib.Path, offset: Optional[int]) -> None:
+    """
+    Truncate the file to ``offset`` if it is longer.
+    """
+    if offset is None:
+        return
+    try:
+        with path.open("r+b") as fp:
+            if fp.seek(0, os.SEEK_END) > offset:
+                fp.truncate(offset)
+                fp.flush()
+                os.fsync(fp.fileno())
+    except FileNotFoundError:
+        pass
+
+
+def _load_checkpoints(path: pathlib.Path) -> Dict[str, Dict]:
+    try:
+        with path.open("r") as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {}
+
+
+def _store_checkpoints(path: pathlib.Path, checkpoints: Dict[str, Dict]) -> None:
+    # Write to a temporary file first so that the checkpoint is replaced
+    # atomically and never left half written.
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("w") as fp:
+        json.dump(checkpoints, fp)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp_path, path)
+
+
+def _get_auditlogs_page(
+    client: Client, url: str, params: Dict, cursor: Optional[str]
+) -> ResponsePair:
+    page_params = dict(params)
+    if cursor:
+        page_params["last"] = cursor
+    return client.get(url, params=page_params)
+
+
+def _iter_auditlogs(
+    client: Client,
+    url: str,
+    params: Dict,
+    errors: Dict,
+    store: Optional[AuditLogStore] = None,
+    org_id: Optional[str] = None,
+) -> Iterator[Dict]:
+    """
+    Fetch all audit log pages and yield their events as soon as a page
+    arrives. The next page is fetched in a background thread while the events
+    of the current page are consumed, and only these two pages are held in
+    memory. The errors of a failed request are stored in ``errors``, and the
+    pages are added to ``store`` if given.
+
+    All requests are made from the same background thread, one at a time.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(_get_auditlogs_page, client, url, params, None)
+        while True:
+            page, page_errors = future.result()
+            if page_errors:
+                errors.update(page_errors)
+                return
+            if not page:
+                return
+            future = executor.submit(
+                _get_auditlogs_page, client, url, params, page[-1]["id"]
+            )
+            if store:
+                store.add(cast(str, org_id), cast(List[Dict], page))
+            yield from cast(List[Dict], page)
+
+
+# The formats of ``--stream``, which is kept for backwards compatibility
+STREAM_FORMATS = {
+    "jsonl": "ndjson",
+    "csv": "csv",
+}
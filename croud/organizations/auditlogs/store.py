@@ -0,0 +1,120 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from platformdirs import user_cache_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    org_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    action TEXT,
+    actor_id TEXT,
+    created TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (org_id, id)
+);
+CREATE INDEX IF NOT EXISTS events_created ON events (org_id, created);
+CREATE INDEX IF NOT EXISTS events_action ON events (org_id, action, created);
+CREATE INDEX IF NOT EXISTS events_actor_id ON events (org_id, actor_id, created);
+"""
+
+
+def default_store_path() -> Path:
+    return Path(user_cache_dir("Crate")) / "auditlogs.sqlite3"
+
+
+class AuditLogStore:
+    """
+    A local SQLite index of audit log events.
+
+    Events are stored per organization and indexed by creation time, action
+    and actor ID, so that filtered queries can be answered without fetching
+    the audit logs from the API again.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self._path = path or default_store_path()
+        self._path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self._path))
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "AuditLogStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, org_id: str, events: Iterable[Dict]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO events "
+                "(org_id, id, action, actor_id, created, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        org_id,
+                        event["id"],
+                        event.get("action"),
+                        (event.get("actor") or {}).get("id"),
+                        event["created"],
+                        json.dumps(event),
+                    )
+                    for event in events
+                ),
+            )
+
+    def query(
+        self,
+        org_id: str,
+        *,
+        action: Optional[str] = None,
+        actor_id: Optional[str] = None,
+        from_: Optional[str] = None,
+        to: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Return the matching events of an organization, newest first.
+
+        ``from_`` and ``to`` are compared as ISO 8601 strings against the
+        ``created`` timestamp of the events.
+        """
+        sql = "SELECT data FROM events WHERE org_id = ?"
+        params = [org_id]
+        if action:
+            sql += " AND action = ?"
+            params.append(action)
+        if actor_id:
+            sql += " AND actor_id = ?"
+            params.append(actor_id)
+        if from_:
+            sql += " AND created >= ?"
+            params.append(from_)
+        if to:
+            sql += " AND created < ?"
+            params.append(to)
+        sql += " ORDER BY created DESC, id DESC"
+        return [json.loads(data) for (data,) in self._conn.execute(sql, params)]
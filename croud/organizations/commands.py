@@ -19,15 +19,13 @@
 import os
 import sys
 from argparse import Namespace
-from typing import Any, Tuple
+from typing import Any, Callable, Optional, Tuple
 
 import bitmath
-import requests
-from tqdm import tqdm
-from tqdm.utils import CallbackIOWrapper
 
-from croud.api import Client
+from croud.api import Client, http_session
 from croud.config import CONFIG, get_output_format
+from croud.organizations.uploads import GzipReader, UploadManifest
 from croud.printer import print_error, print_info, print_response
 from croud.tools.spinner import HALO
 from croud.util import org_id_config_fallback, require_confirmation
@@ -124,38 +122,117 @@ def org_files_list(args: Namespace) -> None:
 
 
 def op_upload_file_to_org(
-    client, org_id: str, file_path: str, file_name: str = None
+    client,
+    org_id: str,
+    file_path: str,
+    file_name: str = None,
+    compress: bool = False,
+    progress: Optional[Callable[[int], object]] = None,
+    info: Callable[[str], object] = print_info,
 ) -> Tuple[Any, Any]:
+    """
+    Upload a file to the organization. ``progress`` is passed to
+    :func:`_upload_file`, and ``info`` is called with status messages instead
+    of :func:`print_info`, e.g. to print them above a shared progress bar.
+    """
     if not os.path.isfile(file_path):
         return None, {"message": "The file path does not exist."}
 
     # Name the file in Cloud. If no name is provided the file path will be used.
-    payload = {"name": file_name or file_path}
-    print_info("Creating a new file upload...")
-    data, errors = client.post(f"/api/v2/organizations/{org_id}/files/", body=payload)
+    name = file_name or file_path
+    if compress:
+        name += ".gz"
+    endpoint = str(client.base_url)
+    manifest = UploadManifest()
+
+    # Retry an interrupted upload with the file entry that was already created
+    data = manifest.get(endpoint, org_id, file_path, name)
+    if data:
+        current, errors = client.get(
+            f"/api/v2/organizations/{org_id}/files/{data['id']}/"
+        )
+        if errors or not current:
+            data = None
+        elif current.get("status") == "UPLOADED":
+            manifest.remove(endpoint, org_id, file_path, name)
+            info("The file has already been uploaded.")
+            return current, None
+        else:
+            info("Retrying the upload of the existing file...")
+
+    if not data:
+        info("Creating a new file upload...")
+        data, errors = client.post(
+            f"/api/v2/organizations/{org_id}/files/", body={"name": name}
+        )
+        if not errors and data and data.get("upload_url"):
+            manifest.add(endpoint, org_id, file_path, name, data)
 
     # HALO spinner needs to be stopped to display the progress bar
     HALO.stop()
     if not errors and data and data.get("upload_url"):
-        # Progress bar works by wrapping the file and monitoring its read ops
+        status_code = _upload_file(
+            data["upload_url"],
+            file_path,
+            compress=compress,
+            progress=progress,
+            info=info,
+        )
+        if status_code < 200 or status_code >= 300:
+            errors = {
+                "code": status_code,
+                "message": "There was an error while trying to upload the file",
+                "upload_url": data["upload_url"],
+            }
+            if status_code == 403:
+                # The upload URL has expired, a new file has to be created
+                manifest.remove(endpoint, org_id, file_path, name)
+        else:
+            manifest.remove(endpoint, org_id, file_path, name)
+
+    return data, errors
+
+
+def _upload_file(
+    upload_url: str,
+    file_path: str,
+    compress: bool = False,
+    progress: Optional[Callable[[int], object]] = None,
+    info: Callable[[str], object] = print_info,
+) -> int:
+    """
+    Upload the file to the pre-signed URL and return the response's status
+    code. ``progress`` is called with the number of bytes read from the file.
+    If it is not given, a progress bar for this file is shown.
+    """
+    if progress is None:
+        from tqdm import tqdm
+
         with tqdm(
             total=os.path.getsize(file_path),
             unit="B",
             unit_scale=True,
             unit_divisor=1024,
         ) as t:
-            with open(file_path, "rb") as file_upload:
-                print_info("Uploading the file...")
-                wrapped_file = CallbackIOWrapper(t.update, file_upload, "read")
-                resp = requests.put(data["upload_url"], data=wrapped_file)
-                if resp.status_code < 200 or resp.status_code >= 300:
-                    errors = {
-                        "code": resp.status_code,
-                        "message": "There was an error while trying to upload the file",
-                        "upload_url": data["upload_url"],
-                    }
+            return _upload_file(
+                upload_url, file_path, compress, progress=t.update, info=info
+            )
 
-    return data, errors
+    if compress:
+        # The progress is tracked on the uncompressed file
+        with GzipReader(file_path, callback=progress) as compressed_upload:
+            info("Compressing and uploading the file...")
+            resp = http_session().put(upload_url, data=compressed_upload)
+            return resp.status_code
+
+    from tqdm.utils import CallbackIOWrapper
+
+    # Progress works by wrapping the file and monitoring its read ops
+    with open(file_path, "rb") as file_upload:
+        info("Uploading the file...")
+        wrapped_file = CallbackIOWrapper(progress, file_upload, "read")
+        resp = http_session().put(upload_url, data=wrapped_file)
+        return resp.status_code
 
 
 def org_secrets_create(args: Namespace) -> None:
@@ -0,0 +1,204 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from platformdirs import user_cache_dir
+
+# Size of the chunks that are read from the file and compressed at once
+GZIP_CHUNK_SIZE = 1024 * 1024
+
+
+def default_manifest_path() -> Path:
+    return Path(user_cache_dir("Crate")) / "uploads.json"
+
+
+class UploadManifest:
+    """
+    Keeps track of file uploads that have been started but not completed.
+
+    An upload is identified by the organization, the absolute path and the
+    name of the file, and is only retried if the file's size and modification
+    time did not change in the meantime. Retrying uploads the whole file again
+    to the file that has already been created in CrateDB Cloud instead of
+    creating a new one.
+    """
+
+    # Uploads of several files may run concurrently
+    _lock = threading.Lock()
+
+    def __init__(self, path: Optional[Path] = None):
+        self._path = path or default_manifest_path()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with self._path.open() as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, uploads: Dict[str, Dict]) -> None:
+        tmp_path = self._path.with_name(f".{self._path.name}.{os.getpid()}.tmp")
+        try:
+            self._path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            with tmp_path.open("w") as fp:
+                json.dump(uploads, fp)
+            os.replace(tmp_path, self._path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _key(endpoint: str, org_id: str, file_path: str, file_name: str) -> str:
+        return json.dumps([endpoint, org_id, os.path.abspath(file_path), file_name])
+
+    @staticmethod
+    def _fingerprint(file_path: str) -> Optional[Dict[str, int]]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def get(
+        self, endpoint: str, org_id: str, file_path: str, file_name: str
+    ) -> Optional[Dict]:
+        """
+        Return the file of an unfinished upload of the given file, if any.
+        """
+        key = self._key(endpoint, org_id, file_path, file_name)
+        upload = self._load().get(key)
+        fingerprint = self._fingerprint(file_path)
+        if not upload or fingerprint is None or upload["fingerprint"] != fingerprint:
+            return None
+        return upload["file"]
+
+    def add(
+        self, endpoint: str, org_id: str, file_path: str, file_name: str, file: Dict
+    ) -> None:
+        fingerprint = self._fingerprint(file_path)
+        if fingerprint is None:
+            return
+        key = self._key(endpoint, org_id, file_path, file_name)
+        with self._lock:
+            uploads = self._load()
+            uploads[key] = {"fingerprint": fingerprint, "file": file}
+            self._store(uploads)
+
+    def remove(self, endpoint: str, org_id: str, file_path: str, file_name: str):
+        key = self._key(endpoint, org_id, file_path, file_name)
+        with self._lock:
+            uploads = self._load()
+            if uploads.pop(key, None) is not None:
+                self._store(uploads)
+
+
+class GzipReader:
+    """
+    A binary file-like object that reads a file and gzip compresses it on the
+    fly, so that it can be streamed as request body without writing the
+    compressed data to disk.
+
+    Pre-signed upload URLs require a ``Content-Length``. The compressed size
+    is therefore determined by compressing the file once up front without
+    keeping the output. As the gzip header does not contain a timestamp, both
+    passes produce the same bytes.
+
+    ``callback`` is called with the number of uncompressed bytes read from
+    the file, e.g. to update a progress bar.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        callback: Optional[Callable[[int], object]] = None,
+        level: int = 6,
+    ):
+        self._file_path = file_path
+        self._callback = callback
+        self._level = level
+        self._size: Optional[int] = None
+        self._file = open(file_path, "rb")
+        self._reset()
+
+    def _compressor(self):
+        # wbits=31 writes a gzip header and trailer (with an mtime of 0)
+        return zlib.compressobj(self._level, zlib.DEFLATED, 31)
+
+    def _reset(self) -> None:
+        self._file.seek(0)
+        self._compress = self._compressor()
+        self._buffer = b""
+        self._eof = False
+        self._position = 0
+
+    def __len__(self) -> int:
+        if self._size is None:
+            compress = self._compressor()
+            size = 0
+            with open(self._file_path, "rb") as fp:
+                for chunk in iter(lambda: fp.read(GZIP_CHUNK_SIZE), b""):
+                    size += len(compress.compress(chunk))
+            self._size = size + len(compress.flush())
+        return self._size
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self._file.read(GZIP_CHUNK_SIZE)
+            if chunk:
+                self._buffer += self._compress.compress(chunk)
+                if self._callback is not None:
+                    self._callback(len(chunk))
+            else:
+                self._buffer += self._compress.flush()
+                self._eof = True
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._position += len(data)
+        return data
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        # Only rewinding is supported, which is what is needed to retry a
+        # request with the same body.
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence != os.SEEK_SET:
+            raise OSError("GzipReader only supports seeking from the start.")
+        if offset == 0:
+            self._reset()
+        elif offset != self._position:
+            raise OSError("GzipReader can only be rewound to the start.")
+        return self._position
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -20,12 +20,13 @@
 
 import argparse
 import functools
+import importlib
 import inspect
 import sys
-from typing import Set
+from typing import Callable, Optional, Sequence, Set
 
 from croud import __version__
-from croud.config.schemas import OUTPUT_FORMATS
+from croud.config.formats import OUTPUT_FORMATS
 from croud.tools.spinner import HALO
 
 POSITIONALS_TITLE = "Available Commands"
@@ -67,6 +68,91 @@ class Argument:
         return not self.args[0].startswith("-")
 
 
+class LazyResolver:
+    """
+    A reference to a command resolver that is imported on first use.
+
+    The resolver is given as module path and function name. The module is
+    only imported when the resolver is called, which means only the command
+    that is actually run pays for importing its module and dependencies::
+
+        >>> resolver = LazyResolver("croud.util", "asbool")
+        >>> resolver("yes")
+        True
+    """
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+
+    def __repr__(self):
+        return f"<LazyResolver {self.module}:{self.name}>"
+
+    def load(self) -> Callable:
+        return getattr(importlib.import_module(self.module), self.name)
+
+    def __call__(self, *args, parser: argparse.ArgumentParser = None):
+        resolver = self.load()
+        if parser is not None and "parser" in inspect.signature(resolver).parameters:
+            return resolver(*args, parser=parser)
+        return resolver(*args)
+
+
+class SupportedShells:
+    """
+    The shells that ``shtab`` can generate completion scripts for.
+
+    The choices of :class:`PrintCompletionAction`, which only import
+    ``shtab`` when they are checked or listed.
+    """
+
+    def _shells(self) -> Sequence[str]:
+        import shtab
+
+        return shtab.SUPPORTED_SHELLS
+
+    def __contains__(self, shell) -> bool:
+        return shell in self._shells()
+
+    def __iter__(self):
+        return iter(self._shells())
+
+
+class PrintCompletionAction(argparse.Action):
+    """
+    Print the shell completion script for the root parser and exit.
+
+    Unlike :func:`shtab.add_argument_to`, ``shtab`` is only imported when a
+    completion script is actually requested. Since the parser may only be
+    partially built (see :func:`create_parser`), a ``parser_factory`` can be
+    passed that returns the full parser to generate the script from.
+    """
+
+    SHELLS = SupportedShells()
+
+    def __init__(
+        self,
+        option_strings,
+        dest,
+        parser_factory: Callable[[], argparse.ArgumentParser] = None,
+        **kwargs,
+    ):
+        kwargs.setdefault("choices", self.SHELLS)
+        # argparse lists the choices in the metavar when the argument is
+        # added, but only expands ``%(choices)s`` when the help is printed
+        kwargs.setdefault("metavar", "SHELL")
+        kwargs.setdefault("help", "print shell completion script (%(choices)s)")
+        super().__init__(option_strings, dest, **kwargs)
+        self.parser_factory = parser_factory
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        import shtab
+
+        full_parser = self.parser_factory() if self.parser_factory else parser
+        print(shtab.complete(full_parser, values))
+        parser.exit(0)
+
+
 class CroudCliArgumentParser(argparse.ArgumentParser):
     def __init__(self, **kwargs):
         super().__init__(
@@ -150,6 +236,13 @@ def add_default_args(parser, omit: Set[str]):
             action="store_true",
             help="Run the given command as superuser.",
         )
+    if "cache" not in omit:
+        parser._group_optional.add_argument(
+            "--no-cache",
+            required=False,
+            action="store_true",
+            help="Do not use cached responses of the CrateDB Cloud API.",
+        )
 
 
 def help_print_factory(parser: argparse.ArgumentParser):
@@ -162,7 +255,7 @@ def help_print_factory(parser: argparse.ArgumentParser):
     return print_help
 
 
-def add_subparser(parser, tree, name="__root__"):
+def add_subparser(parser, tree, name="__root__", argv: Sequence[str] = None):
     if "extra_args" in tree:
         for argument in tree["extra_args"]:
             if argument.required or argument.positional:
@@ -178,17 +271,30 @@ def add_subparser(parser, tree, name="__root__"):
             sub = subparsers.add_parser(
                 _cmd, help=_tree.get("help"), description=_tree.get("help")
             )
-            add_subparser(sub, _tree, sub.prog)
+            # Only build the subcommands that can be selected by ``argv``. The
+            # others are still registered so that they show up in the help.
+            if argv is None or _cmd in argv:
+                add_subparser(sub, _tree, sub.prog, argv)
     if "resolver" in tree:
         add_default_args(parser, omit=tree.get("omit", set([])))
         resolver = tree["resolver"]
-        signature = inspect.signature(resolver)
-        if "parser" in signature.parameters:
+        if isinstance(resolver, LazyResolver):
+            # The signature is only inspected once the resolver is imported
+            resolver = functools.partial(resolver, parser=parser)
+        elif "parser" in inspect.signature(resolver).parameters:
             resolver = functools.partial(resolver, parser=parser)
         parser.set_defaults(resolver=resolver)
 
 
-def create_parser(tree):
+def create_parser(tree, argv: Optional[Sequence[str]] = None):
+    """
+    Create the argument parser for the given command tree.
+
+    If ``argv`` is given, only the subcommands named in it are fully built,
+    which makes the construction cost proportional to the depth of the
+    invoked command rather than to the size of the whole command tree. The
+    resulting parser must then only be used to parse that very ``argv``.
+    """
     parser = CroudCliArgumentParser(prog="croud", description=tree["help"])
     parser._group_optional.add_argument(
         "-v",
@@ -197,5 +303,5 @@ def create_parser(tree):
         version="%(prog)s " + __version__,
         help="Show program's version number and exit.",
     )
-    add_subparser(parser, tree, parser.prog)
+    add_subparser(parser, tree, parser.prog, argv)
     return parser
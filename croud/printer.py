@@ -18,16 +18,26 @@
 # software solely pursuant to the terms of the relevant commercial agreement.
 
 import abc
-import functools
+import csv
 import json
 import sys
-from typing import Any, Callable, Dict, List, Optional, Type, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    Union,
+    cast,
+)
 
-import yaml
 from colorama import Fore, Style
-from tabulate import tabulate
 
 from croud.tools.spinner import HALO
+from croud.tools.table import render_table
 from croud.typing import JsonDict
 
 RowsType = Union[List[JsonDict], JsonDict]
@@ -129,24 +139,150 @@ class FormatPrinter(abc.ABC):
         raise NotImplementedError()
 
 
+# Output of the JSON printers is written to stdout in chunks of this size
+JSON_CHUNK_SIZE = 64 * 1024
+
+JsonEncoder = Callable[[Any, bool], bytes]
+_fast_json_encoder: Optional[JsonEncoder] = None
+_fast_json_encoder_loaded = False
+
+
+def _orjson_encoder() -> JsonEncoder:
+    import orjson
+
+    def encode(data: Any, compact: bool) -> bytes:
+        return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+
+    return encode
+
+
+def _ujson_encoder() -> JsonEncoder:
+    import ujson
+
+    def encode(data: Any, compact: bool) -> bytes:
+        return ujson.dumps(
+            data,
+            indent=0 if compact else 2,
+            ensure_ascii=False,
+            escape_forward_slashes=False,
+        ).encode()
+
+    return encode
+
+
+def get_fast_json_encoder() -> Optional[JsonEncoder]:
+    """
+    Return a function that encodes data as JSON with ``orjson`` or ``ujson``,
+    whichever is installed, or ``None`` if neither is.
+    """
+    global _fast_json_encoder, _fast_json_encoder_loaded
+    if not _fast_json_encoder_loaded:
+        for factory in (_orjson_encoder, _ujson_encoder):
+            try:
+                _fast_json_encoder = factory()
+                break
+            except ImportError:
+                continue
+        _fast_json_encoder_loaded = True
+    return _fast_json_encoder
+
+
+def iter_json(data: Any, compact: bool = False) -> Iterator[bytes]:
+    """
+    Encode data as UTF-8 JSON, indented by two spaces or on a single line if
+    ``compact`` is set, and return it in chunks of about ``JSON_CHUNK_SIZE``.
+    """
+    encode = get_fast_json_encoder()
+    if encode is not None:
+        try:
+            encoded = encode(data, compact)
+        except (TypeError, ValueError, OverflowError):
+            # Data that the accelerated encoders don't support, such as
+            # non-string keys or very large integers
+            pass
+        else:
+            for start in range(0, len(encoded), JSON_CHUNK_SIZE):
+                yield encoded[start : start + JSON_CHUNK_SIZE]
+            return
+
+    # Non-ASCII characters are written as they are, like the accelerated
+    # encoders do, so that the output doesn't depend on what is installed.
+    if compact:
+        encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    else:
+        encoder = json.JSONEncoder(indent=2, ensure_ascii=False)
+    chunk: List[str] = []
+    size = 0
+    for part in encoder.iterencode(data):
+        chunk.append(part)
+        size += len(part)
+        if size >= JSON_CHUNK_SIZE:
+            yield "".join(chunk).encode()
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk).encode()
+
+
 class JsonFormatPrinter(FormatPrinter):
+    compact = False
+
+    def print_rows(self, rows: Union[List[JsonDict], JsonDict]) -> None:
+        # Explicitly stop & clear the spinner
+        HALO.stop()
+        buffer = getattr(sys.stdout, "buffer", None)
+        if buffer is None:
+            # stdout has been replaced by a text stream
+            print(self.format_rows(rows))
+            return
+        sys.stdout.flush()
+        for chunk in iter_json(rows, self.compact):
+            buffer.write(chunk)
+        buffer.write(b"\n")
+        buffer.flush()
+
     def format_rows(self, rows: Union[List[JsonDict], JsonDict]) -> str:
-        return json.dumps(rows, sort_keys=False, indent=2)
+        return b"".join(iter_json(rows, self.compact)).decode()
+
+
+class CompactJsonFormatPrinter(JsonFormatPrinter):
+    """
+    Prints data as JSON on a single line, without any whitespace.
+    """
+
+    compact = True
+
+
+# Nested values in table cells; creating the encoder once is much faster
+# than calling json.dumps() with non-default arguments for every cell.
+_CELL_JSON_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False)
 
 
 class TableFormatPrinter(FormatPrinter):
     display_all_columns = False
 
+    def print_rows(self, rows: Union[List[JsonDict], JsonDict]) -> None:
+        # Explicitly stop & clear the spinner
+        HALO.stop()
+        lines = self._format_lines(rows)
+        if lines:
+            sys.stdout.writelines(line + "\n" for line in lines)
+        else:
+            print()
+
     def format_rows(self, rows: Union[List[JsonDict], JsonDict]) -> str:
+        return "\n".join(self._format_lines(rows))
+
+    def _format_lines(self, rows: Union[List[JsonDict], JsonDict]) -> Iterable[str]:
         if rows is None:
-            return ""
+            return []
 
         if not isinstance(rows, list):
             rows = [rows]
 
+        keys: Optional[List[str]] = None
         if self.keys and (not self.display_all_columns or len(rows) == 0):
-            filter_record = functools.partial(self._filter_record, keys=self.keys)
-            rows = list(map(filter_record, rows))
+            keys = self.keys
 
         # ensure that keys are mapped to their values
         # e.g. Rows, generated with
@@ -161,43 +297,46 @@ class TableFormatPrinter(FormatPrinter):
         # | bar |   2 |
         # +-----+-----+
 
-        all_keys = list(map(str, rows[0].keys())) if len(rows) else self.keys
-        if all_keys:
-            for row in rows:
-                for key in list(map(str, row.keys())):
-                    if key not in all_keys:
-                        all_keys.append(key)
+        # Columns are collected in the order they appear in, which is the
+        # order of ``keys`` within each row if there are keys.
+        all_keys: Dict[str, None] = {}
+        for row in rows:
+            if keys is None:
+                all_keys.update(dict.fromkeys(map(str, row.keys())))
+            else:
+                all_keys.update(dict.fromkeys(key for key in keys if key in row))
 
-        headers = all_keys if len(rows) else self.keys
+        headers = list(all_keys) if len(rows) else self.keys
 
         if headers is None:
-            return ""
+            return []
 
-        values = [
-            [
-                self.transforms.get(header, TableFormatPrinter._identity_transform)(
-                    row.get(header, "")
-                )
-                for header in headers
-            ]
-            for row in rows
+        identity = TableFormatPrinter._identity_transform
+        columns = [
+            list(map(self.transforms.get(header, identity), self._column(rows, header)))
+            for header in headers
         ]
 
-        return tabulate(values, headers=headers, tablefmt="psql", missingval="NULL")
+        lines = render_table(headers, columns)
+        if lines is not None:
+            return lines
+
+        from tabulate import tabulate
+
+        table = tabulate(
+            list(zip(*columns)), headers=headers, tablefmt="psql", missingval="NULL"
+        )
+        return table.split("\n") if table else []
 
-    def _filter_record(self, data: dict, keys: List[str]) -> JsonDict:
-        # Ensure that we print keys in the order they are defined
-        ret = {}
-        for key in keys:
-            if key in data:
-                ret[key] = data[key]
-        return ret
+    @staticmethod
+    def _column(rows: List[JsonDict], key: str) -> Iterator[Any]:
+        return (row.get(key, "") for row in rows)
 
     @staticmethod
     def _identity_transform(field):
         """transform field for displaying"""
         if isinstance(field, (list, dict)):
-            return json.dumps(field, sort_keys=True, ensure_ascii=False)
+            return _CELL_JSON_ENCODER.encode(field)
         elif isinstance(field, bool):
             return "TRUE" if field else "FALSE"
         else:
@@ -213,14 +352,117 @@ class WideTableFormatPrinter(TableFormatPrinter):
     display_all_columns = True
 
 
+class StreamFormatPrinter(FormatPrinter):
+    """
+    Prints one line per row, writing each row to stdout as soon as it has
+    been formatted instead of building the whole output first.
+    """
+
+    def print_rows(self, rows: Union[Iterable[JsonDict], JsonDict]) -> None:
+        # Explicitly stop & clear the spinner
+        HALO.stop()
+        self.write_rows(rows, sys.stdout)
+        sys.stdout.flush()
+
+    def format_rows(self, rows: Union[Iterable[JsonDict], JsonDict]) -> str:
+        import io
+
+        out = io.StringIO()
+        self.write_rows(rows, out)
+        return out.getvalue().rstrip("\n")
+
+    def write_rows(self, rows: Union[Iterable[JsonDict], JsonDict], out) -> None:
+        if rows is None:
+            return
+        if isinstance(rows, dict):
+            rows = [rows]
+        self._write_rows(rows, out)
+
+    @abc.abstractmethod
+    def _write_rows(self, rows: Iterable[JsonDict], out) -> None:
+        raise NotImplementedError()
+
+
+class NdjsonFormatPrinter(StreamFormatPrinter):
+    """
+    Prints each row as JSON object on a line of its own (JSON Lines).
+    """
+
+    def _write_rows(self, rows: Iterable[JsonDict], out) -> None:
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False))
+            out.write("\n")
+
+
+class CsvFormatPrinter(StreamFormatPrinter):
+    """
+    Prints rows as CSV with a header. The columns are the ``keys`` of the
+    command, or the fields of the first row if there are none.
+    """
+
+    def _write_rows(self, rows: Iterable[JsonDict], out) -> None:
+        writer = None
+        for row in rows:
+            if writer is None:
+                fieldnames = self.keys or list(map(str, row.keys()))
+                writer = csv.writer(out, lineterminator="\n")
+                writer.writerow(fieldnames)
+            writer.writerow(
+                [self._format_field(key, row.get(key)) for key in fieldnames]
+            )
+        if writer is None and self.keys:
+            csv.writer(out, lineterminator="\n").writerow(self.keys)
+
+    def _format_field(self, key: str, field: Any) -> Any:
+        if field is None:
+            return ""
+        transform = self.transforms.get(key, TableFormatPrinter._identity_transform)
+        return transform(field)
+
+
 class YamlFormatPrinter(FormatPrinter):
+    """
+    Prints data as YAML, using the libyaml based dumper if it is available.
+    The items of a list are dumped one at a time, so that the output starts
+    right away; their concatenation is the same as dumping the whole list.
+    """
+
+    def print_rows(self, rows: Union[List[JsonDict], JsonDict]) -> None:
+        # Explicitly stop & clear the spinner
+        HALO.stop()
+        self._dump(rows, sys.stdout)
+        print()
+
     def format_rows(self, rows: Union[List[JsonDict], JsonDict]) -> str:
-        return yaml.dump(rows, default_flow_style=False)
+        import io
+
+        out = io.StringIO()
+        self._dump(rows, out)
+        return out.getvalue()
+
+    @staticmethod
+    def _dump(rows: Union[List[JsonDict], JsonDict], out) -> None:
+        import yaml
+
+        if not isinstance(rows, (list, dict)):
+            # libyaml omits the document end marker after a plain scalar
+            yaml.dump(rows, out, Dumper=yaml.SafeDumper, default_flow_style=False)
+            return
+
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        if isinstance(rows, list) and rows:
+            for row in rows:
+                yaml.dump([row], out, Dumper=dumper, default_flow_style=False)
+        else:
+            yaml.dump(rows, out, Dumper=dumper, default_flow_style=False)
 
 
 PRINTERS: Dict[str, Type[FormatPrinter]] = {
     "json": JsonFormatPrinter,
+    "json-compact": CompactJsonFormatPrinter,
     "table": TableFormatPrinter,
     "wide": WideTableFormatPrinter,
     "yaml": YamlFormatPrinter,
+    "ndjson": NdjsonFormatPrinter,
+    "csv": CsvFormatPrinter,
 }
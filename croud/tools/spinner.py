@@ -1,7 +1,46 @@
 import sys
+from typing import Any, Optional
+
+
+class LazySpinner:
+    """
+    A proxy for a :class:`halo.Halo` spinner that is only created when it is
+    started for the first time.
+
+    Importing ``halo`` (which probes for an IPython environment) is costly,
+    and most of the time the spinner is only stopped before printing output.
+    Stopping a spinner that has never been started is a no-op.
+    """
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._spinner: Optional[Any] = None
+
+    def _get(self):
+        if self._spinner is None:
+            from halo import Halo
+
+            self._spinner = Halo(**self._kwargs)
+        return self._spinner
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def start(self, *args, **kwargs):
+        return self._get().start(*args, **kwargs)
+
+    def stop(self):
+        if self._spinner is None:
+            return self
+        return self._spinner.stop()
 
-from halo import Halo
 
 # It's sadly not possible to set arbitrary colours, but cyan (the default)
 # is close(ish) to Crate Blue (#00a6d1).
-HALO = Halo(text="Working ...", spinner="dots", stream=sys.stderr)
+HALO = LazySpinner(text="Working ...", spinner="dots", stream=sys.stderr)
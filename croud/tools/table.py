@@ -0,0 +1,222 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+"""
+A renderer for tables in the ``psql`` format of :mod:`tabulate`.
+
+``tabulate`` converts its input to rows of lists, then re-scans every cell
+several times to deduce the column types, format and align the values. That
+is slow for listings with many rows. This renderer works on columns, deduces
+each column's type (stopping as soon as it is known to be text), and formats
+and measures every cell once. It produces the same output as::
+
+    tabulate(values, headers=headers, tablefmt="psql", missingval="NULL")
+
+for cells that are ``None``, booleans, numbers or printable ASCII strings.
+Anything else (ANSI colours, multi-line or wide characters, other types) is
+left to ``tabulate`` itself, which :func:`render_table` signals by returning
+``None``.
+"""
+
+import math
+import re
+from typing import Any, Iterator, List, Optional, Sequence
+
+MISSING_VALUE = "NULL"
+# Headers are at least this much wider than their text
+MIN_PADDING = 2
+
+# Column types, from least to most generic, as deduced by ``tabulate``
+_NONE, _BOOL, _INT, _FLOAT, _STR = range(5)
+
+# The cell types this renderer can handle
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+_NOT_PRINTABLE_ASCII = re.compile(r"[^\x20-\x7e]")
+# A string that is convertible to int or float starts with one of these
+_NUMBER_START = frozenset("0123456789+-. iInN")
+_NUMBER_WITH_THOUSANDS_SEPARATORS = re.compile(
+    r"^(([+-]?[0-9]{1,3})(?:,([0-9]{3}))*)?(?(1)\.[0-9]*|\.[0-9]+)?$"
+)
+
+
+class UnsupportedCell(Exception):
+    pass
+
+
+def _is_convertible(conv, value: str) -> bool:
+    try:
+        conv(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_number_str(value: str) -> bool:
+    try:
+        number = float(value)
+    except ValueError:
+        return False
+    return not (math.isinf(number) or math.isnan(number)) or value.lower() in (
+        "inf",
+        "-inf",
+        "nan",
+    )
+
+
+def _cell_type(value: Any) -> int:
+    if value is None:
+        return _NONE
+    if type(value) is str:
+        if not value:
+            return _NONE
+        if _NOT_PRINTABLE_ASCII.search(value):
+            raise UnsupportedCell()
+        if value == "True" or value == "False":
+            return _BOOL
+        if value[0] not in _NUMBER_START:
+            return _STR
+        thousands = _NUMBER_WITH_THOUSANDS_SEPARATORS.match(value) is not None
+        if _is_convertible(int, value) or (thousands and "." not in value):
+            return _INT
+        if thousands or _is_number_str(value):
+            return _FLOAT
+        return _STR
+    if type(value) is bool:
+        return _BOOL
+    if type(value) is int:
+        return _INT
+    if type(value) is float:
+        return _FLOAT
+    raise UnsupportedCell()
+
+
+def _column_type(values: Sequence[Any]) -> int:
+    column_type = _BOOL
+    for value in values:
+        cell_type = _cell_type(value)
+        if cell_type > column_type:
+            column_type = cell_type
+            if column_type == _STR:
+                break
+    return column_type
+
+
+def _format_cell(value: Any, column_type: int) -> str:
+    if value is None:
+        return MISSING_VALUE
+    if value == "" and type(value) is str:
+        return ""
+    if column_type == _FLOAT:
+        if type(value) is str and "," in value:
+            value = value.replace(",", "")
+        try:
+            return format(float(value), "g")
+        except ValueError:
+            return f"{value}"
+    return f"{value}"
+
+
+def _after_point(value: str) -> int:
+    """
+    The number of characters after the decimal point (or exponent) of a
+    number, or -1 if it has none.
+    """
+    if not (
+        _is_number_str(value) or _NUMBER_WITH_THOUSANDS_SEPARATORS.match(value)
+    ) or _is_convertible(int, value):
+        return -1
+    pos = value.rfind(".")
+    if pos < 0:
+        pos = value.lower().rfind("e")
+    return len(value) - pos - 1 if pos >= 0 else -1
+
+
+def _format_column(values: Sequence[Any], column_type: int, header: str) -> List[str]:
+    """
+    Format and align the cells of a column to the same width, which is at
+    least the width of the header plus its padding.
+    """
+    cells = [_format_cell(value, column_type) for value in values]
+    if column_type == _FLOAT:
+        # Align the cells on the decimal point
+        after_points = [_after_point(cell) for cell in cells]
+        max_after_point = max(after_points)
+        cells = [
+            cell + " " * (max_after_point - after_point)
+            for cell, after_point in zip(cells, after_points)
+        ]
+    elif column_type != _INT:
+        cells = [cell.strip() for cell in cells]
+
+    width = max(max(map(len, cells)), len(header) + MIN_PADDING)
+    if column_type in (_INT, _FLOAT):
+        return [cell.rjust(width) for cell in cells]
+    return [cell.ljust(width) for cell in cells]
+
+
+def render_table(
+    headers: List[str], columns: List[List[Any]]
+) -> Optional[Iterator[str]]:
+    """
+    Return the lines of a table with the given headers and columns of cell
+    values, or ``None`` if it contains a cell that is not supported.
+    """
+    if not headers or any(
+        type(header) is not str or _NOT_PRINTABLE_ASCII.search(header)
+        for header in headers
+    ):
+        return None
+
+    try:
+        column_types = [_column_type(values) for values in columns]
+    except UnsupportedCell:
+        return None
+
+    if columns and columns[0]:
+        formatted = [
+            _format_column(values, column_type, header)
+            for values, column_type, header in zip(columns, column_types, headers)
+        ]
+        widths = [len(cells[0]) for cells in formatted]
+        header_cells = [
+            (
+                header.rjust(width)
+                if column_type in (_INT, _FLOAT)
+                else header.ljust(width)
+            )
+            for header, width, column_type in zip(headers, widths, column_types)
+        ]
+    else:
+        formatted = []
+        widths = [len(header) + MIN_PADDING for header in headers]
+        header_cells = [header.ljust(width) for header, width in zip(headers, widths)]
+
+    return _render_lines(header_cells, widths, formatted)
+
+
+def _render_lines(
+    header_cells: List[str], widths: List[int], columns: List[List[str]]
+) -> Iterator[str]:
+    line = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+    yield line
+    yield "| " + " | ".join(header_cells) + " |"
+    yield "|" + line[1:-1] + "|"
+    for cells in zip(*columns):
+        yield "| " + " | ".join(cells) + " |"
+    yield line
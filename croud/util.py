@@ -27,7 +27,6 @@ from argparse import Namespace
 from datetime import datetime, timezone
 from typing import Any, Tuple
 
-from croud.api import Client
 from croud.config import CONFIG
 from croud.printer import print_error, print_info
 from croud.tools.spinner import HALO
@@ -151,12 +150,17 @@ def grand_central_jwt_token(cmd):
 
 
 def _set_gc_jwt(cmd_args: Namespace) -> None:
+    # Imported here so that ``croud.__main__`` can use the helpers in this
+    # module without importing ``requests`` on startup.
+    from croud.api import Client
+
     client = Client.from_args(cmd_args)
     data, errors = client.get(f"/api/v2/clusters/{cmd_args.cluster_id}/jwt/")
 
-    CONFIG.set_current_gc_jwt_token(data.get("token"))  # type: ignore
-    CONFIG.set_current_gc_cluster_id(cmd_args.cluster_id)  # type: ignore
-    CONFIG.set_current_gc_jwt_token_expiry(data.get("expiry"))  # type: ignore
+    with CONFIG.transaction():
+        CONFIG.set_current_gc_jwt_token(data.get("token"))  # type: ignore
+        CONFIG.set_current_gc_cluster_id(cmd_args.cluster_id)  # type: ignore
+        CONFIG.set_current_gc_jwt_token_expiry(data.get("expiry"))  # type: ignore
 
 
 def strtobool(val: str) -> int:
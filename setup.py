@@ -60,6 +60,9 @@ setup(
         "tqdm>=4,<5",
     ],
     extras_require={
+        "json": [
+            "orjson>=3,<4",
+        ],
         "testing": [
             "pytest<10",
             "pytest-cov<8",
@@ -0,0 +1,77 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import json
+import pathlib
+
+import pytest
+
+from tests.util.benchmark import BENCHMARK_MODE, BENCHMARK_TOLERANCE, reference_time
+
+BASELINES_FILE = pathlib.Path(__file__).parent / "baselines.json"
+
+
+def pytest_collection_modifyitems(config, items):
+    if BENCHMARK_MODE:
+        return
+    skip = pytest.mark.skip(reason="Set CROUD_BENCHMARKS=1 to run benchmarks.")
+    here = pathlib.Path(__file__).parent
+    for item in items:
+        if here in pathlib.Path(item.fspath).parents:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def baselines():
+    data = json.loads(BASELINES_FILE.read_text())
+    yield data
+    if BENCHMARK_MODE == "update":
+        BASELINES_FILE.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture
+def assert_baseline(baselines):
+    """
+    Compare a timing in seconds against its stored baseline, or store it as
+    the new baseline when running with ``CROUD_BENCHMARKS=update``.
+
+    Baselines are stored as multiples of the time of a reference workload,
+    which is measured right after the timing, so that they hold on faster and
+    slower machines, and while the load of the machine changes. Timings that
+    include starting an interpreter are compared to the startup of a bare
+    interpreter (``reference="startup"``), others to pure Python work.
+    """
+
+    def _assert_baseline(name: str, seconds: float, reference: str = "cpu") -> None:
+        reference_seconds = reference_time(reference)
+        ratio = seconds / reference_seconds
+        if BENCHMARK_MODE == "update":
+            baselines[name] = round(ratio, 4)
+            return
+
+        if name not in baselines:
+            pytest.fail(f"No baseline for '{name}'. Run with CROUD_BENCHMARKS=update.")
+        limit = baselines[name] * BENCHMARK_TOLERANCE
+        assert ratio <= limit, (
+            f"'{name}' took {seconds * 1000:.2f}ms, {ratio:.2f}x the {reference} "
+            f"reference ({reference_seconds * 1000:.2f}ms). The baseline is "
+            f"{baselines[name]:.2f}x (limit {limit:.2f}x)"
+        )
+
+    return _assert_baseline
@@ -0,0 +1,55 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import contextlib
+import io
+
+import pytest
+
+from croud.printer import print_format
+from tests.util.benchmark import measure
+
+ROWS = [
+    {
+        "id": f"event-{i}",
+        "action": "cluster.create",
+        "actor": {"id": f"user-{i % 10}", "username": "jane"},
+        "created": "2024-01-01T12:00:00",
+        "context": {"cluster_id": f"cluster-{i}", "tags": ["a", "b"]},
+        "success": bool(i % 2),
+    }
+    for i in range(5_000)
+]
+
+
+@pytest.mark.parametrize(
+    "format", ["json", "json-compact", "table", "wide", "yaml", "ndjson", "csv"]
+)
+def test_print_format(format, assert_baseline):
+    def render():
+        with contextlib.redirect_stdout(io.StringIO()):
+            print_format(
+                ROWS,
+                format,
+                keys=["action", "actor", "created"],
+                transforms={"actor": lambda field: field["id"]},
+            )
+
+    seconds = measure(render, repeat=3)
+    assert_baseline(f"print_format[{format}]", seconds)
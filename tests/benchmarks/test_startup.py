@@ -0,0 +1,107 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import secrets
+
+import pytest
+
+import croud.__main__
+from croud.config.configuration import Configuration
+from tests.util.benchmark import import_time, measure, measure_python
+from tests.util.fake_cloud import FAKE_ORG_ID
+
+# Run ``croud`` in a fresh interpreter, as it would be run from a shell.
+# Nothing else is imported, so that the timings include every module that
+# ``croud`` loads itself.
+MAIN = """
+import sys
+
+from croud.__main__ import main
+
+sys.argv = {argv!r}
+main()
+"""
+
+
+@pytest.fixture
+def croud_env(fake_cratedb_cloud, tmp_path):
+    config = Configuration("croud.yaml", tmp_path / "Crate")
+    config.add_profile(
+        "benchmark", endpoint=f"https://127.0.0.1:{fake_cratedb_cloud.port}"
+    )
+    config.set_auth_token("benchmark", secrets.token_urlsafe(64))
+    config.set_organization_id("benchmark", FAKE_ORG_ID)
+    config.use_profile("benchmark")
+    # ``platformdirs`` looks up the configuration directory from here
+    return {"XDG_CONFIG_HOME": str(tmp_path)}
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["clusters", "list"],
+        ["organizations", "auditlogs", "list"],
+        ["config", "show"],
+        ["--help"],
+    ],
+    ids=lambda argv: " ".join(argv),
+)
+def test_cold_start(argv, croud_env, assert_baseline):
+    code = MAIN.format(argv=["croud", *argv])
+    if argv == ["--help"]:
+        # The help action exits the interpreter
+        code = code.replace("main()", "try:\n    main()\nexcept SystemExit:\n    pass")
+    seconds = measure_python(code, env=croud_env)
+    assert_baseline(f"cold_start[{' '.join(argv)}]", seconds, reference="startup")
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "croud.__main__",
+        "croud.api",
+        "croud.config",
+        "croud.parser",
+        "croud.printer",
+        "croud.clusters.commands",
+        "croud.organizations.commands",
+        "croud.organizations.auditlogs.commands",
+    ],
+)
+def test_import_time(module, assert_baseline):
+    assert_baseline(f"import_time[{module}]", import_time(module))
+
+
+def test_get_parser_full(assert_baseline):
+    seconds = measure(croud.__main__.get_parser, repeat=10)
+    assert_baseline("get_parser[full]", seconds)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["clusters", "list"],
+        ["organizations", "auditlogs", "list"],
+        ["config", "show"],
+    ],
+    ids=lambda argv: " ".join(argv),
+)
+def test_get_parser_partial(argv, assert_baseline):
+    seconds = measure(lambda: croud.__main__.get_parser(argv), repeat=10)
+    assert_baseline(f"get_parser[{' '.join(argv)}]", seconds)
@@ -0,0 +1,313 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import json
+from unittest import mock
+
+import pytest
+
+from croud.api import Client, RequestMethod
+from croud.apply import _plan_cluster, load_manifest
+from tests.util import call_command, gen_uuid
+
+CLUSTER = {
+    "name": "my-cluster",
+    "product_unit": 1,
+    "crate_version": "5.10.1",
+    "suspended": False,
+    "deletion_protected": False,
+    "backup_schedule": "0 3,15 * * *",
+    "ip_whitelist": [{"cidr": "10.0.0.0/8", "description": None}],
+}
+
+
+def write_manifest(tmp_path, content):
+    path = tmp_path / "fleet.yaml"
+    path.write_text(content)
+    return str(path)
+
+
+def fake_cloud(clusters, failing_operations=()):
+    def mock_call(method, endpoint, params=None, body=None):
+        cluster_id = endpoint.split("/")[4]
+        if method == RequestMethod.GET and endpoint.endswith("/operations/"):
+            status = "FAILED" if params["type"] in failing_operations else "SUCCEEDED"
+            return {"operations": [{"status": status}]}, None
+        if method == RequestMethod.GET:
+            return {"id": cluster_id, **clusters[cluster_id]}, None
+        return {}, None
+
+    return mock_call
+
+
+def put_calls(mock_request):
+    return [
+        (c.args[1].split("/")[4], c.args[1].split("/")[5], c.kwargs["body"])
+        for c in mock_request.call_args_list
+        if c.args[0] == RequestMethod.PUT
+    ]
+
+
+@mock.patch.object(Client, "request")
+def test_apply(mock_request, tmp_path, capsys):
+    id1, id2, id3 = gen_uuid(), gen_uuid(), gen_uuid()
+    clusters = {id1: CLUSTER, id2: CLUSTER, id3: CLUSTER}
+    mock_request.side_effect = fake_cloud(clusters)
+    path = write_manifest(
+        tmp_path,
+        f"""
+clusters:
+  - id: {id1}
+    product_unit: 2
+    crate_version: 5.10.1
+  - id: {id2}
+    suspended: true
+    ip_whitelist: [10.0.0.0/8, {{cidr: 192.168.0.0/16, description: Office}}]
+    backup_hours: "15,3"
+  - id: {id3}
+    deletion_protected: false
+    backup_hours: [3, 15]
+""",
+    )
+    call_command("croud", "apply", "-f", path, "-o", "json")
+    output, err_output = capsys.readouterr()
+
+    # Clusters are changed concurrently, but the changes of a cluster in order
+    calls = put_calls(mock_request)
+    assert [call for call in calls if call[0] == id1] == [
+        (id1, "scale", {"product_unit": 2}),
+    ]
+    assert [call for call in calls if call[0] == id2] == [
+        (
+            id2,
+            "ip-restrictions",
+            {
+                "ip_whitelist": [
+                    {"cidr": "10.0.0.0/8"},
+                    {"cidr": "192.168.0.0/16", "description": "Office"},
+                ]
+            },
+        ),
+        (id2, "suspend", {"suspended": True}),
+    ]
+    assert len(calls) == 3
+    mock_request.assert_any_call(
+        RequestMethod.GET,
+        f"/api/v2/clusters/{id1}/operations/",
+        params={"type": "SCALE", "limit": 1},
+        body=None,
+    )
+    plan, results = output.split("\n[")
+    assert [(row["id"], row["setting"]) for row in json.loads(plan)] == [
+        (id1, "product_unit"),
+        (id2, "ip_whitelist"),
+        (id2, "suspended"),
+    ]
+    assert json.loads("[" + results) == [
+        {"id": id1, "setting": "product_unit", "status": "SUCCEEDED", "message": None},
+        {"id": id2, "setting": "ip_whitelist", "status": "SUCCEEDED", "message": None},
+        {"id": id2, "setting": "suspended", "status": "SUCCEEDED", "message": None},
+    ]
+    assert "Applied 3 changes." in err_output
+
+
+@mock.patch.object(Client, "request")
+def test_apply_up_to_date(mock_request, tmp_path, capsys):
+    cluster_id = gen_uuid()
+    mock_request.side_effect = fake_cloud({cluster_id: CLUSTER})
+    path = write_manifest(
+        tmp_path, f"clusters: [{{id: {cluster_id}, product_unit: 1}}]"
+    )
+    call_command("croud", "apply", "-f", path)
+    _, err_output = capsys.readouterr()
+    assert put_calls(mock_request) == []
+    assert "All clusters are up to date." in err_output
+
+
+@mock.patch.object(Client, "request")
+def test_apply_dry_run(mock_request, tmp_path, capsys):
+    cluster_id = gen_uuid()
+    mock_request.side_effect = fake_cloud({cluster_id: CLUSTER})
+    path = write_manifest(
+        tmp_path, f"clusters: [{{id: {cluster_id}, product_unit: 3}}]"
+    )
+    call_command("croud", "apply", "-f", path, "--dry-run")
+    _, err_output = capsys.readouterr()
+    assert put_calls(mock_request) == []
+    assert "1 changes to 1 clusters would be applied." in err_output
+
+
+@mock.patch.object(Client, "request")
+def test_apply_resumes_first_and_skips_after_failure(mock_request, tmp_path, capsys):
+    cluster_id = gen_uuid()
+    mock_request.side_effect = fake_cloud(
+        {cluster_id: {**CLUSTER, "suspended": True}}, failing_operations=["SCALE"]
+    )
+    path = write_manifest(
+        tmp_path,
+        f"""
+clusters:
+  - id: {cluster_id}
+    crate_version: 5.10.2
+    product_unit: 2
+    suspended: false
+""",
+    )
+    call_command("croud", "apply", "-f", path, "-o", "json")
+    output, err_output = capsys.readouterr()
+    assert put_calls(mock_request) == [
+        (cluster_id, "suspend", {"suspended": False}),
+        (cluster_id, "scale", {"product_unit": 2}),
+    ]
+    assert [row["status"] for row in json.loads("[" + output.split("\n[")[1])] == [
+        "SUCCEEDED",
+        "FAILED",
+        "SKIPPED",
+    ]
+    assert "2 of 3 changes were not applied." in err_output
+
+
+@mock.patch("asyncio.sleep")
+@mock.patch.object(Client, "request")
+def test_apply_retries_failed_status_requests(
+    mock_request, mock_sleep, tmp_path, capsys
+):
+    cluster_id = gen_uuid()
+    cloud = fake_cloud({cluster_id: CLUSTER})
+    polls = []
+
+    def mock_call(method, endpoint, params=None, body=None):
+        if endpoint.endswith("/operations/"):
+            polls.append(params["type"])
+            if len(polls) == 1:
+                return None, {"message": "Service unavailable."}
+        return cloud(method, endpoint, params=params, body=body)
+
+    mock_request.side_effect = mock_call
+    path = write_manifest(
+        tmp_path,
+        f"""
+clusters:
+  - id: {cluster_id}
+    crate_version: 5.10.2
+    product_unit: 2
+""",
+    )
+    call_command("croud", "apply", "-f", path, "-o", "json")
+    output, err_output = capsys.readouterr()
+    # A single failed request doesn't fail the change, nor skip the next one
+    assert polls == ["SCALE", "SCALE", "UPGRADE"]
+    assert mock_sleep.call_count == 1
+    assert [row["status"] for row in json.loads("[" + output.split("\n[")[1])] == [
+        "SUCCEEDED",
+        "SUCCEEDED",
+    ]
+    assert "Applied 2 changes." in err_output
+
+
+@mock.patch.object(Client, "request")
+def test_apply_skips_suspended_cluster(mock_request, tmp_path, capsys):
+    id1, id2 = gen_uuid(), gen_uuid()
+    mock_request.side_effect = fake_cloud(
+        {id1: {**CLUSTER, "suspended": True}, id2: CLUSTER}
+    )
+    path = write_manifest(
+        tmp_path,
+        f"""
+clusters:
+  - id: {id1}
+    product_unit: 2
+    suspended: true
+  - id: {id2}
+    product_unit: 2
+""",
+    )
+    call_command("croud", "apply", "-f", path)
+    _, err_output = capsys.readouterr()
+    assert f"Cluster {id1} is suspended, skipping 1 changes." in err_output
+    assert put_calls(mock_request) == [(id2, "scale", {"product_unit": 2})]
+
+
+@mock.patch.object(Client, "request", return_value=(None, {"message": "Not found"}))
+def test_apply_unknown_cluster(mock_request, tmp_path, capsys):
+    cluster_id = gen_uuid()
+    path = write_manifest(
+        tmp_path, f"clusters: [{{id: {cluster_id}, product_unit: 3}}]"
+    )
+    call_command("croud", "apply", "-f", path)
+    _, err_output = capsys.readouterr()
+    assert f"Failed to fetch cluster {cluster_id}: Not found" in err_output
+    assert put_calls(mock_request) == []
+
+
+@pytest.mark.parametrize(
+    "content,message",
+    [
+        ("[]", "The manifest must contain a list of clusters."),
+        ("clusters: [{product_unit: 1}]", "Each cluster in the manifest must"),
+        ("clusters: [{id: a}, {id: a}]", "Cluster a is declared more than once."),
+        ("clusters: [{id: a, nodes: 3}]", "Unknown settings for cluster a: nodes."),
+        ("clusters: [{id: a, product_unit: x}]", "Invalid value of product_unit"),
+        ('clusters: [{id: a, suspended: "false"}]', "Invalid value of suspended"),
+        ("clusters: [{id: a, deletion_protected: 0}]", "Invalid value of deletion"),
+    ],
+)
+def test_load_manifest_invalid(tmp_path, content, message):
+    with pytest.raises(ValueError, match=message):
+        load_manifest(write_manifest(tmp_path, content))
+
+
+@mock.patch.object(Client, "request")
+def test_apply_invalid_manifest(mock_request, tmp_path, capsys):
+    call_command("croud", "apply", "-f", str(tmp_path / "missing.yaml"))
+    _, err_output = capsys.readouterr()
+    assert "Failed to load manifest" in err_output
+    mock_request.assert_not_called()
+
+
+def test_plan_cluster():
+    assert _plan_cluster({"id": "a", "backup_hours": "15, 3"}, CLUSTER) == []
+    assert _plan_cluster({"id": "a", "ip_whitelist": ["10.0.0.0/8"]}, CLUSTER) == []
+    assert _plan_cluster(
+        {"id": "a", "suspended": True, "product_unit": 2}, CLUSTER
+    ) == [
+        ("product_unit", 1, 2),
+        ("suspended", False, True),
+    ]
+
+
+@pytest.mark.parametrize(
+    "schedule,hours",
+    [
+        ("0 3,15 * * *", [3, 15]),
+        ("0 * * * *", list(range(24))),
+        ("0 */6 * * *", [0, 6, 12, 18]),
+        ("0 1-3,20 * * *", [1, 2, 3, 20]),
+        ("0 2-10/4 * * *", [2, 6, 10]),
+        ("0 20/2 * * *", [20, 22]),
+        ("0 H * * *", "0 H * * *"),
+        ("0 5-30 * * *", "0 5-30 * * *"),
+        ("@daily", "@daily"),
+    ],
+)
+def test_plan_cluster_backup_schedule(schedule, hours):
+    cluster = {**CLUSTER, "backup_schedule": schedule}
+    assert _plan_cluster({"id": "a", "backup_hours": [3, 15]}, cluster) == (
+        [] if hours == [3, 15] else [("backup_hours", hours, [3, 15])]
+    )
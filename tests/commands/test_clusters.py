@@ -17,13 +17,27 @@
 # with Crate these terms will supersede the license and you may use the
 # software solely pursuant to the terms of the relevant commercial agreement.
 
+import gzip
+import json
+import os
 import uuid
 from datetime import datetime, timedelta, timezone
 from unittest import mock
 
 import pytest
+import requests
 
 from croud.api import Client, RequestMethod
+from croud.clusters.commands import (
+    POLL_MAX_FAILURES,
+    POLL_MAX_INTERVAL,
+    _get_gc_client,
+    _get_org_id_from_cluster_id,
+    _poll_intervals,
+    _wait_for_completed_operation,
+    _wait_for_completed_operations,
+)
+from croud.http_cache import HttpCache
 from tests.util import assert_rest, call_command, gen_uuid
 
 pytestmark = pytest.mark.usefixtures("config")
@@ -69,6 +83,83 @@ def test_clusters_list_with_organization_id(mock_request):
     )
 
 
+@mock.patch.object(Client, "request")
+def test_clusters_list_all_orgs(mock_request, capsys):
+    org_ids = [gen_uuid(), gen_uuid()]
+    project_ids = [gen_uuid(), gen_uuid()]
+
+    def mock_call(method, endpoint, params=None, body=None):
+        if endpoint == "/api/v2/organizations/":
+            return [{"id": org_id} for org_id in org_ids], None
+        for org_id, project_id in zip(org_ids, project_ids):
+            if endpoint == f"/api/v2/organizations/{org_id}/clusters/":
+                return [
+                    {"id": f"cluster-{org_id}", "project_id": project_id},
+                ], None
+            if endpoint == f"/api/v2/organizations/{org_id}/projects/":
+                return [{"id": project_id, "name": f"project-{org_id}"}], None
+        return None, {"message": "Not found"}
+
+    mock_request.side_effect = mock_call
+    call_command(
+        "croud", "clusters", "list", "--all-orgs", "--concurrency", "2", "-o", "json"
+    )
+    _, err_output = capsys.readouterr()
+    assert mock_request.call_count == 5
+    mock_request.assert_any_call(
+        RequestMethod.GET,
+        f"/api/v2/organizations/{org_ids[0]}/clusters/",
+        params={},
+        body=None,
+    )
+    mock_request.assert_any_call(
+        RequestMethod.GET,
+        f"/api/v2/organizations/{org_ids[1]}/projects/",
+        params=None,
+        body=None,
+    )
+    assert err_output == ""
+
+
+@mock.patch.object(Client, "request")
+def test_clusters_list_all_orgs_output(mock_request, capsys):
+    org_ids = [gen_uuid(), gen_uuid()]
+
+    def mock_call(method, endpoint, params=None, body=None):
+        if endpoint == "/api/v2/organizations/":
+            return [{"id": org_id} for org_id in org_ids], None
+        if endpoint == f"/api/v2/organizations/{org_ids[0]}/clusters/":
+            return [{"id": "cluster-1", "name": "c1", "project_id": "p1"}], None
+        if endpoint == f"/api/v2/organizations/{org_ids[0]}/projects/":
+            return [{"id": "p1", "name": "Project 1"}], None
+        return None, {"message": "Forbidden."}
+
+    mock_request.side_effect = mock_call
+    call_command("croud", "clusters", "list", "--all-orgs", "-o", "json")
+    output, err_output = capsys.readouterr()
+    assert json.loads(output) == [
+        {
+            "id": "cluster-1",
+            "name": "c1",
+            "project_id": "p1",
+            "project_name": "Project 1",
+            "organization_id": org_ids[0],
+        }
+    ]
+    assert (
+        f"Failed to list clusters of organization {org_ids[1]}: Forbidden."
+        in err_output
+    )
+
+
+@mock.patch.object(Client, "request", return_value=({}, None))
+def test_clusters_list_all_orgs_with_org_id(mock_request, capsys):
+    call_command("croud", "clusters", "list", "--all-orgs", "--org-id", gen_uuid())
+    _, err_output = capsys.readouterr()
+    assert "mutually exclusive" in err_output
+    mock_request.assert_not_called()
+
+
 @mock.patch.object(Client, "request", return_value=({}, None))
 @mock.patch("time.sleep")
 def test_clusters_deploy_with_master(_mock_sleep, mock_request):
@@ -1302,6 +1393,200 @@ def test_clusters_suspend(_mock_sleep, mock_request: mock.Mock, status):
     )
 
 
+@mock.patch("croud.__main__.HALO")
+@mock.patch("croud.clusters.commands.HALO")
+@mock.patch.object(Client, "request")
+@mock.patch("time.sleep")
+def test_clusters_suspend_multiple(
+    _mock_sleep, mock_request, _halo, _main_halo, capsys
+):
+    cluster_ids = [gen_uuid(), gen_uuid(), gen_uuid()]
+    polls = {cluster_id: 0 for cluster_id in cluster_ids}
+
+    def mock_call(method, endpoint, params=None, body=None):
+        cluster_id = endpoint.split("/")[4]
+        if method == RequestMethod.PUT:
+            if cluster_id == cluster_ids[2]:
+                return None, {"message": "Cluster is locked."}
+            return {}, None
+        if "/operations/" in endpoint:
+            polls[cluster_id] += 1
+            if polls[cluster_id] < 2:
+                return {"operations": [{"status": "IN_PROGRESS"}]}, None
+            if cluster_id == cluster_ids[1]:
+                return {
+                    "operations": [
+                        {"status": "FAILED", "feedback_data": {"message": "Oops."}}
+                    ]
+                }, None
+            return {"operations": [{"status": "SUCCEEDED"}]}, None
+        return {"id": cluster_id, "name": f"name-{cluster_id}", "suspended": True}, None
+
+    mock_request.side_effect = mock_call
+    call_command(
+        "croud",
+        "clusters",
+        "set-suspended-state",
+        "--cluster-id",
+        cluster_ids[0],
+        "--cluster-id",
+        cluster_ids[1],
+        "--cluster-id",
+        cluster_ids[2],
+        "--value",
+        "true",
+        "-o",
+        "json",
+    )
+    output, err_output = capsys.readouterr()
+    for cluster_id in cluster_ids:
+        mock_request.assert_any_call(
+            RequestMethod.PUT,
+            f"/api/v2/clusters/{cluster_id}/suspend/",
+            params=None,
+            body={"suspended": True},
+        )
+    # The operations of all clusters are polled in a single loop
+    assert polls == {cluster_ids[0]: 2, cluster_ids[1]: 2, cluster_ids[2]: 0}
+    assert _mock_sleep.call_count == 1
+    assert json.loads(output) == [
+        {
+            "id": cluster_ids[0],
+            "name": f"name-{cluster_ids[0]}",
+            "suspended": True,
+            "status": "SUCCEEDED",
+            "message": None,
+        },
+        {
+            "id": cluster_ids[1],
+            "name": f"name-{cluster_ids[1]}",
+            "suspended": True,
+            "status": "FAILED",
+            "message": "Oops.",
+        },
+        {
+            "id": cluster_ids[2],
+            "status": "FAILED",
+            "message": "Cluster is locked.",
+        },
+    ]
+    assert "Cluster suspend initiated for 2 clusters." in err_output
+    assert "Status: 2 IN_PROGRESS" in err_output
+    assert "Status: 1 FAILED, 1 SUCCEEDED" in err_output
+    assert "The operation did not succeed for 2 of 3 clusters." in err_output
+
+
+@mock.patch("croud.__main__.HALO")
+@mock.patch.object(
+    Client,
+    "request",
+    side_effect=lambda method, endpoint, params=None, body=None: (
+        ({"operations": [{"status": "SUCCEEDED"}]}, None)
+        if "/operations/" in endpoint
+        else ({"id": endpoint.split("/")[4], "suspended": False}, None)
+    ),
+)
+def test_clusters_resume_multiple(mock_request, _main_halo, capsys):
+    cluster_ids = [gen_uuid(), gen_uuid()]
+    call_command(
+        "croud",
+        "clusters",
+        "set-suspended-state",
+        "--cluster-id",
+        cluster_ids[0],
+        "--cluster-id",
+        cluster_ids[1],
+        "--value",
+        "false",
+    )
+    for cluster_id in cluster_ids:
+        mock_request.assert_any_call(
+            RequestMethod.PUT,
+            f"/api/v2/clusters/{cluster_id}/suspend/",
+            params=None,
+            body={"suspended": False},
+        )
+    _, err_output = capsys.readouterr()
+    assert "Cluster resume initiated for 2 clusters." in err_output
+    assert "suspend initiated" not in err_output
+
+
+@mock.patch("croud.clusters.commands.HALO")
+@mock.patch.object(Client, "request")
+@mock.patch("time.sleep")
+def test_wait_for_completed_operations_retries_request_errors(
+    mock_sleep, mock_request, _halo, client
+):
+    cluster_ids = [gen_uuid(), gen_uuid()]
+    polls = {cluster_id: 0 for cluster_id in cluster_ids}
+
+    def mock_call(method, endpoint, params=None, body=None):
+        cluster_id = endpoint.split("/")[4]
+        polls[cluster_id] += 1
+        if cluster_id == cluster_ids[1]:
+            return None, {"message": "Service unavailable."}
+        if polls[cluster_id] == 1:
+            return {"operations": [{"status": "IN_PROGRESS"}]}, None
+        if polls[cluster_id] == 2:
+            return None, {"message": "Service unavailable."}
+        return {"operations": [{"status": "SUCCEEDED"}]}, None
+
+    mock_request.side_effect = mock_call
+    results = _wait_for_completed_operations(
+        client=client, cluster_ids=cluster_ids, request_params={}
+    )
+
+    # A single failed request keeps the cluster pending, only repeated
+    # failures give up polling its status.
+    assert polls == {cluster_ids[0]: 3, cluster_ids[1]: POLL_MAX_FAILURES}
+    assert results == {
+        cluster_ids[0]: {"status": "SUCCEEDED", "message": None},
+        cluster_ids[1]: {"status": "FAILED", "message": "Service unavailable."},
+    }
+
+
+@mock.patch("croud.__main__.HALO")
+@mock.patch("croud.clusters.commands.HALO")
+@mock.patch.object(Client, "request")
+@mock.patch("time.sleep")
+def test_clusters_scale_multiple(_mock_sleep, mock_request, _halo, _main_halo, capsys):
+    cluster_ids = [gen_uuid(), gen_uuid()]
+
+    def mock_call(method, endpoint, params=None, body=None):
+        if "/operations/" in endpoint:
+            return {"operations": [{"status": "SUCCEEDED"}]}, None
+        return {}, None
+
+    mock_request.side_effect = mock_call
+    call_command(
+        "croud",
+        "clusters",
+        "scale",
+        "--cluster-id",
+        cluster_ids[0],
+        "--cluster-id",
+        cluster_ids[1],
+        "--unit",
+        "2",
+    )
+    _, err_output = capsys.readouterr()
+    for cluster_id in cluster_ids:
+        mock_request.assert_any_call(
+            RequestMethod.PUT,
+            f"/api/v2/clusters/{cluster_id}/scale/",
+            params=None,
+            body={"product_unit": 2},
+        )
+        mock_request.assert_any_call(
+            RequestMethod.GET,
+            f"/api/v2/clusters/{cluster_id}/operations/",
+            params={"type": "SCALE", "limit": 1},
+            body=None,
+        )
+    _mock_sleep.assert_not_called()
+    assert "Operation completed for 2 clusters." in err_output
+
+
 @mock.patch.object(Client, "request", return_value=(None, {}))
 def test_cluster_suspended_fails(mock_request, capsys):
     suspended = True
@@ -1774,6 +2059,350 @@ def test_import_job_create_from_file(mock_request):
     )
 
 
+@mock.patch.object(Client, "request")
+def test_import_job_create_from_file_compressed(mock_request, tmp_path):
+    cluster_id = gen_uuid()
+    project_id = gen_uuid()
+    org_id = gen_uuid()
+    file_id = gen_uuid()
+    file_path = tmp_path / "data.csv"
+    content = b"id,name\n" + b"".join(b"%d,name-%d\n" % (i, i) for i in range(1000))
+    file_path.write_bytes(content)
+
+    def mock_call(method, endpoint, params=None, body=None):
+        if endpoint == f"/api/v2/clusters/{cluster_id}/":
+            return {"id": cluster_id, "project_id": project_id}, None
+        if endpoint == f"/api/v2/projects/{project_id}/":
+            return {"id": project_id, "organization_id": org_id}, None
+        if endpoint == f"/api/v2/organizations/{org_id}/files/":
+            return {"id": file_id, "upload_url": "https://upload"}, None
+        return {"id": "1", "status": "SUCCEEDED"}, None
+
+    uploaded = {}
+
+    def mock_put(url, data):
+        uploaded["length"] = len(data)
+        uploaded["data"] = data.read()
+        return mock.Mock(status_code=200)
+
+    mock_request.side_effect = mock_call
+    with mock.patch("requests.Session.put", side_effect=mock_put):
+        call_command(
+            "croud",
+            "clusters",
+            "import-jobs",
+            "create",
+            "from-file",
+            "--cluster-id",
+            cluster_id,
+            "--file-path",
+            str(file_path),
+            "--compress",
+            "--file-format",
+            "csv",
+            "--table",
+            "my-table",
+        )
+
+    assert uploaded["length"] == len(uploaded["data"]) < len(content)
+    assert gzip.decompress(uploaded["data"]) == content
+    assert_rest(
+        mock_request,
+        RequestMethod.POST,
+        f"/api/v2/organizations/{org_id}/files/",
+        body={"name": f"{file_path}.gz"},
+        any_times=True,
+    )
+    assert_rest(
+        mock_request,
+        RequestMethod.POST,
+        f"/api/v2/clusters/{cluster_id}/import-jobs/",
+        body={
+            "type": "file",
+            "file": {"id": file_id},
+            "format": "csv",
+            "destination": {"table": "my-table"},
+            "compression": "gzip",
+        },
+        any_times=True,
+    )
+
+
+def _bulk_import_mock_call(cluster_id, project_id, org_id, failing_file=None):
+    def mock_call(method, endpoint, params=None, body=None):
+        if endpoint == f"/api/v2/clusters/{cluster_id}/":
+            return {"id": cluster_id, "project_id": project_id}, None
+        if endpoint == f"/api/v2/projects/{project_id}/":
+            return {"id": project_id, "organization_id": org_id}, None
+        if endpoint == f"/api/v2/organizations/{org_id}/files/":
+            file_id = "file-" + os.path.basename(body["name"])
+            return {"id": file_id, "upload_url": "https://upload"}, None
+        if endpoint == f"/api/v2/clusters/{cluster_id}/import-jobs/":
+            return {"id": "job-" + body["file"]["id"], "status": "REGISTERED"}, None
+        job_id = endpoint.rstrip("/").rsplit("/", 1)[-1]
+        if failing_file and job_id == f"job-file-{failing_file}":
+            return {
+                "id": job_id,
+                "status": "FAILED",
+                "progress": {"records": 0, "message": "Invalid CSV"},
+            }, None
+        return {
+            "id": job_id,
+            "status": "SUCCEEDED",
+            "progress": {"records": 100, "message": "Done"},
+        }, None
+
+    return mock_call
+
+
+@mock.patch.object(Client, "request")
+def test_import_job_create_from_file_directory(mock_request, tmp_path, capsys):
+    cluster_id = gen_uuid()
+    project_id = gen_uuid()
+    org_id = gen_uuid()
+    data_path = tmp_path / "data"
+    (data_path / "subdir").mkdir(parents=True)
+    for name in ["a.csv", "b.csv", "c.csv", ".hidden"]:
+        (data_path / name).write_text("id\n1\n")
+    mock_request.side_effect = _bulk_import_mock_call(
+        cluster_id, project_id, org_id, failing_file="b.csv"
+    )
+
+    with mock.patch(
+        "requests.Session.put", return_value=mock.Mock(status_code=200)
+    ) as mock_put:
+        call_command(
+            "croud",
+            "clusters",
+            "import-jobs",
+            "create",
+            "from-file",
+            "--cluster-id",
+            cluster_id,
+            "--file-path",
+            str(data_path),
+            "--file-format",
+            "csv",
+            "--table",
+            "my-table",
+            "--concurrency",
+            "2",
+        )
+
+    assert mock_put.call_count == 3
+    for name in ["a.csv", "b.csv", "c.csv"]:
+        assert_rest(
+            mock_request,
+            RequestMethod.POST,
+            f"/api/v2/clusters/{cluster_id}/import-jobs/",
+            body={
+                "type": "file",
+                "file": {"id": f"file-{name}"},
+                "format": "csv",
+                "destination": {"table": "my-table"},
+            },
+            any_times=True,
+        )
+        assert_rest(
+            mock_request,
+            RequestMethod.GET,
+            f"/api/v2/clusters/{cluster_id}/import-jobs/job-file-{name}/",
+            any_times=True,
+        )
+    output, err_output = capsys.readouterr()
+    assert "Importing 3 files..." in err_output
+    assert "Status: 1 FAILED, 2 SUCCEEDED" in err_output
+    assert "Done importing 200 records" in err_output
+    assert "The import did not succeed for 1 of 3 files." in err_output
+    assert "Invalid CSV" in output
+    assert ".hidden" not in output
+
+
+@mock.patch.object(Client, "request")
+def test_import_job_create_from_file_glob(mock_request, tmp_path, capsys):
+    cluster_id = gen_uuid()
+    project_id = gen_uuid()
+    org_id = gen_uuid()
+    for name in ["a.csv", "b.csv", "c.json"]:
+        (tmp_path / name).write_text("id\n1\n")
+    mock_request.side_effect = _bulk_import_mock_call(cluster_id, project_id, org_id)
+
+    with mock.patch(
+        "requests.Session.put", return_value=mock.Mock(status_code=200)
+    ) as mock_put:
+        call_command(
+            "croud",
+            "clusters",
+            "import-jobs",
+            "create",
+            "from-file",
+            "--cluster-id",
+            cluster_id,
+            "--file-path",
+            str(tmp_path / "*.csv"),
+            "--file-format",
+            "csv",
+            "--table",
+            "my-table",
+        )
+
+    assert mock_put.call_count == 2
+    _, err_output = capsys.readouterr()
+    assert "Import completed for 2 files." in err_output
+
+
+def _bulk_import_from_glob(tmp_path, cluster_id, *extra_args):
+    call_command(
+        "croud",
+        "clusters",
+        "import-jobs",
+        "create",
+        "from-file",
+        "--cluster-id",
+        cluster_id,
+        "--file-path",
+        str(tmp_path / "*.csv"),
+        "--file-format",
+        "csv",
+        "--table",
+        "my-table",
+        *extra_args,
+    )
+
+
+@mock.patch.object(Client, "request")
+def test_import_job_create_from_file_upload_exception(mock_request, tmp_path, capsys):
+    cluster_id = gen_uuid()
+    for name in ["a.csv", "b.csv"]:
+        (tmp_path / name).write_text("id\n1\n")
+    mock_request.side_effect = _bulk_import_mock_call(
+        cluster_id, gen_uuid(), gen_uuid()
+    )
+
+    def put(url, data):
+        if data.name.endswith("a.csv"):
+            raise requests.ConnectionError("Connection refused")
+        return mock.Mock(status_code=200)
+
+    with mock.patch("requests.Session.put", side_effect=put):
+        _bulk_import_from_glob(tmp_path, cluster_id, "-o", "json")
+
+    output, err_output = capsys.readouterr()
+    results = {r["file"]: r for r in json.loads(output)}
+    assert results[str(tmp_path / "a.csv")]["status"] == "FAILED"
+    assert results[str(tmp_path / "a.csv")]["message"] == "Connection refused"
+    assert results[str(tmp_path / "b.csv")]["status"] == "SUCCEEDED"
+    assert f"{tmp_path / 'b.csv'}: Uploading the file..." in err_output
+    assert "The import did not succeed for 1 of 2 files." in err_output
+
+
+@mock.patch("croud.__main__.HALO")
+@mock.patch("croud.clusters.commands.HALO")
+@mock.patch("time.sleep")
+@mock.patch.object(Client, "request")
+def test_import_job_create_from_file_status_request_error(
+    mock_request, mock_sleep, _halo, _main_halo, tmp_path, capsys
+):
+    cluster_id = gen_uuid()
+    for name in ["a.csv", "b.csv"]:
+        (tmp_path / name).write_text("id\n1\n")
+    bulk_import = _bulk_import_mock_call(cluster_id, gen_uuid(), gen_uuid())
+    polls = {"job-file-a.csv": 0, "job-file-b.csv": 0}
+
+    def mock_call(method, endpoint, params=None, body=None):
+        job_id = endpoint.rstrip("/").rsplit("/", 1)[-1]
+        if method == RequestMethod.GET and job_id in polls:
+            polls[job_id] += 1
+            if job_id == "job-file-a.csv" and polls[job_id] == 1:
+                return None, {"message": "Service unavailable."}
+        return bulk_import(method, endpoint, params=params, body=body)
+
+    mock_request.side_effect = mock_call
+    with mock.patch("requests.Session.put", return_value=mock.Mock(status_code=200)):
+        _bulk_import_from_glob(tmp_path, cluster_id, "-o", "json")
+
+    # The job stays pending after a failed status request
+    assert polls == {"job-file-a.csv": 2, "job-file-b.csv": 1}
+    assert mock_sleep.call_count == 1
+    output, err_output = capsys.readouterr()
+    assert [r["status"] for r in json.loads(output)] == ["SUCCEEDED", "SUCCEEDED"]
+    assert "Import completed for 2 files." in err_output
+
+
+@mock.patch.object(Client, "request")
+def test_import_job_create_from_file_interrupted(mock_request, tmp_path):
+    cluster_id = gen_uuid()
+    for i in range(10):
+        (tmp_path / f"{i}.csv").write_text("id\n1\n")
+    mock_request.side_effect = _bulk_import_mock_call(
+        cluster_id, gen_uuid(), gen_uuid()
+    )
+
+    with mock.patch(
+        "requests.Session.put", side_effect=KeyboardInterrupt
+    ) as mock_put, pytest.raises(KeyboardInterrupt):
+        _bulk_import_from_glob(tmp_path, cluster_id, "--concurrency", "1")
+    # The queued files are not uploaded anymore. The worker may start the next
+    # upload before the queue is cancelled, but not all of them.
+    assert mock_put.call_count < 10
+
+
+@mock.patch.object(Client, "request")
+def test_import_job_create_from_file_no_files(mock_request, tmp_path, capsys):
+    call_command(
+        "croud",
+        "clusters",
+        "import-jobs",
+        "create",
+        "from-file",
+        "--cluster-id",
+        gen_uuid(),
+        "--file-path",
+        str(tmp_path / "*.csv"),
+        "--file-format",
+        "csv",
+        "--table",
+        "my-table",
+    )
+    mock_request.assert_not_called()
+    _, err_output = capsys.readouterr()
+    assert "No files found at" in err_output
+
+
+@pytest.mark.parametrize(
+    "args,message",
+    [
+        (["--file-id", "1"], "--compress can only be used together with --file-path"),
+        (
+            ["--file-path", "data.csv.gz", "--compression", "gzip"],
+            "The file is already compressed, --compress is not needed",
+        ),
+    ],
+)
+@mock.patch.object(Client, "request")
+def test_import_job_create_from_file_compress_invalid(
+    mock_request, args, message, capsys
+):
+    call_command(
+        "croud",
+        "clusters",
+        "import-jobs",
+        "create",
+        "from-file",
+        "--cluster-id",
+        gen_uuid(),
+        "--compress",
+        "--file-format",
+        "csv",
+        "--table",
+        "my-table",
+        *args,
+    )
+    mock_request.assert_not_called()
+    _, err_output = capsys.readouterr()
+    assert message in err_output
+
+
 @mock.patch.object(
     Client, "request", return_value=({"id": "1", "status": "SUCCEEDED"}, None)
 )
@@ -1980,8 +2609,86 @@ def test_export_job_delete(mock_request):
     )
 
 
+@pytest.mark.parametrize("compression", ["gzip", None])
+@mock.patch.object(Client, "request")
+def test_export_job_create_to_stdout(mock_request, compression, capsysbinary):
+    cluster_id = gen_uuid()
+    project_id = gen_uuid()
+    org_id = gen_uuid()
+    file_id = gen_uuid()
+    export_job_id = gen_uuid()
+    content = b"id,name\n1,foo\n"
+    finished_job = {
+        "id": export_job_id,
+        "status": "SUCCEEDED",
+        "compression": compression,
+        "destination": {"file": {"id": file_id}},
+        "progress": {"message": "Export finished successfully.", "records": 1},
+    }
+    mock_request.side_effect = [
+        ({"id": export_job_id, "status": "REGISTERED"}, None),
+        (finished_job, None),
+        (finished_job, None),
+        ({"project_id": project_id}, None),
+        ({"organization_id": org_id}, None),
+        ({"download_url": "https://s3-presigned-url.s3.amazonaws.com/bla"}, None),
+    ]
+
+    mock_response = mock.MagicMock()
+    mock_response.__enter__.return_value = mock_response
+    mock_response.status_code = 200
+    mock_response.headers = {}
+    mock_response.iter_content.return_value = [
+        gzip.compress(content) if compression else content
+    ]
+    cmd = [
+        "croud",
+        "clusters",
+        "export-jobs",
+        "create",
+        "--cluster-id",
+        cluster_id,
+        "--file-format",
+        "csv",
+        "--table",
+        "my-table",
+        "--save-as",
+        "-",
+        "--decompress",
+    ]
+    if compression:
+        cmd += ["--compression", compression]
+    with mock.patch("requests.Session.get", return_value=mock_response) as mock_get:
+        call_command(*cmd)
+
+    assert mock_get.call_args[0][0] == "https://s3-presigned-url.s3.amazonaws.com/bla"
+    output, err_output = capsysbinary.readouterr()
+    assert output == content
+    assert f"Export job {export_job_id} created.".encode() in err_output
+
+
+@mock.patch.object(Client, "request")
+def test_export_job_create_decompress_requires_stdout(mock_request, capsys):
+    call_command(
+        "croud",
+        "clusters",
+        "export-jobs",
+        "create",
+        "--cluster-id",
+        gen_uuid(),
+        "--file-format",
+        "csv",
+        "--table",
+        "my-table",
+        "--decompress",
+    )
+    mock_request.assert_not_called()
+    _, err_output = capsys.readouterr()
+    assert "--decompress can only be used together with --save-as -" in err_output
+
+
 @pytest.mark.parametrize("save_file", [True, False])
-@mock.patch("croud.clusters.commands.copyfileobj")
+@mock.patch("croud.clusters.download.copyfileobj")
 @mock.patch.object(Client, "request")
 def test_export_job_create(mock_client_request, mock_copy, save_file):
     cluster_id = gen_uuid()
@@ -2038,7 +2745,7 @@ def test_export_job_create(mock_client_request, mock_copy, save_file):
     mock_response.headers = {"Content-Length": 123}
     mock_response.status_code = 200
 
-    with mock.patch("requests.get", return_value=mock_response):
+    with mock.patch("requests.Session.get", return_value=mock_response):
         with mock.patch("builtins.open", mock.mock_open(read_data="id,name,path")):
             cmd = [
                 "croud",
@@ -2132,3 +2839,115 @@ def test_clusters_subscription_update(mock_request):
             "new_subscription_id": new_subscription_id,
         },
     )
+
+
+@mock.patch.object(Client, "request")
+def test_get_org_id_from_cluster_id_uses_index(mock_request, config, tmp_path):
+    cluster_id = gen_uuid()
+    project_id = gen_uuid()
+    org_id = gen_uuid()
+
+    def mock_call(method, endpoint, params=None, body=None):
+        if endpoint == f"/api/v2/clusters/{cluster_id}/":
+            return {"id": cluster_id, "project_id": project_id}, None
+        if endpoint == f"/api/v2/projects/{project_id}/":
+            return {"id": project_id, "organization_id": org_id}, None
+        return None, {"message": "Not found"}
+
+    mock_request.side_effect = mock_call
+    client = Client(config.endpoint, cache=HttpCache(tmp_path))
+    assert _get_org_id_from_cluster_id(client, cluster_id) == org_id
+    assert _get_org_id_from_cluster_id(client, cluster_id) == org_id
+    assert mock_request.call_count == 2
+
+    # Without cache, the index is not used
+    client = Client(config.endpoint)
+    assert _get_org_id_from_cluster_id(client, cluster_id) == org_id
+    assert mock_request.call_count == 4
+
+    # With --no-cache, the index is not read
+    client = Client(config.endpoint, cache=HttpCache(tmp_path), cache_reads=False)
+    assert _get_org_id_from_cluster_id(client, cluster_id) == org_id
+    assert mock_request.call_count == 6
+
+
+@mock.patch.object(Client, "request")
+def test_clusters_get_and_delete_maintain_index(mock_request, config):
+    cluster_id = gen_uuid()
+    cluster = {
+        "id": cluster_id,
+        "name": "my-cluster",
+        "fqdn": "my-cluster.aks1.eastus2.azure.cratedb.net.",
+        "project_id": gen_uuid(),
+    }
+    mock_request.return_value = (cluster, None)
+    call_command("croud", "clusters", "get", cluster_id)
+
+    args = mock.Mock(cluster_id=cluster_id, region=None, sudo=False, no_cache=False)
+    client = _get_gc_client(args)
+    assert (
+        str(client.base_url) == "https://my-cluster.gc.aks1.eastus2.azure.cratedb.net"
+    )
+    assert mock_request.call_count == 1
+
+    mock_request.return_value = (None, None)
+    call_command("croud", "clusters", "delete", "--cluster-id", cluster_id, "-y")
+    mock_request.return_value = (cluster, None)
+    _get_gc_client(args)
+    assert mock_request.call_count == 3
+
+
+def test_poll_intervals():
+    intervals = _poll_intervals()
+    values = [next(intervals) for _ in range(20)]
+    assert 0.75 <= values[0] <= 1.0
+    assert values[3] > values[0]
+    assert all(value <= POLL_MAX_INTERVAL for value in values)
+    assert values[-1] >= POLL_MAX_INTERVAL * 0.75
+
+
+@mock.patch("croud.clusters.commands.HALO")
+@mock.patch("time.sleep")
+def test_wait_for_completed_operation_polls_adaptively(mock_sleep, _halo, capsys):
+    statuses = iter(["IN_PROGRESS"] * 3 + ["SUCCEEDED"])
+
+    def status_func(**kwargs):
+        return next(statuses), None, None
+
+    _wait_for_completed_operation(
+        client=mock.Mock(),
+        cluster_id=gen_uuid(),
+        request_params={},
+        operation_status_func=status_func,
+    )
+    intervals = [c.args[0] for c in mock_sleep.call_args_list]
+    assert len(intervals) == 3
+    assert intervals[0] <= 1.0
+    assert sum(intervals) < 10
+    _, err_output = capsys.readouterr()
+    assert "Operation completed." in err_output
+
+
+@mock.patch("croud.clusters.commands.HALO")
+@mock.patch("time.sleep")
+@mock.patch("time.monotonic")
+def test_wait_for_completed_operation_timeout(
+    mock_monotonic, mock_sleep, _halo, capsys
+):
+    clock = [1000.0]
+    mock_monotonic.side_effect = lambda: clock[0]
+    mock_sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+
+    def status_func(**kwargs):
+        return "IN_PROGRESS", None, None
+
+    with mock.patch.dict("os.environ", {"CROUD_OPERATION_TIMEOUT": "60"}):
+        _wait_for_completed_operation(
+            client=mock.Mock(),
+            cluster_id=gen_uuid(),
+            request_params={},
+            operation_status_func=status_func,
+        )
+    assert clock[0] == pytest.approx(1060.0)
+    _, err_output = capsys.readouterr()
+    assert "Timed out after 60 seconds" in err_output
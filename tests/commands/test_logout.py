@@ -19,6 +19,7 @@
 
 from unittest import mock
 
+from croud.http_cache import HttpCache
 from tests.util import call_command
 
 
@@ -29,3 +30,12 @@ def test_logout(mock_print_info, config):
 
     assert config.token is None
     mock_print_info.assert_called_once_with("You have been logged out.")
+
+
+@mock.patch("croud.logout.print_info")
+def test_logout_clears_cache(mock_print_info, config):
+    cache = HttpCache.for_profile(config.name)
+    cache.put(f"{config.endpoint}/api/v2/users/me/", None, {"uid": "123"})
+    call_command("croud", "logout")
+
+    assert cache.get(f"{config.endpoint}/api/v2/users/me/") is None
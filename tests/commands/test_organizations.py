@@ -17,6 +17,7 @@
 # with Crate these terms will supersede the license and you may use the
 # software solely pursuant to the terms of the relevant commercial agreement.
 
+import json
 import uuid
 from datetime import datetime, timedelta
 from unittest import mock
@@ -24,6 +25,7 @@ from unittest import mock
 import pytest
 
 from croud.api import Client, RequestMethod
+from croud.organizations.auditlogs import commands as auditlogs_commands
 from croud.organizations.users.commands import (
     role_fqn_transform as organization_role_fqn_transform,
 )
@@ -301,6 +303,408 @@ def test_organizations_auditlogs_list_pagination(mock_request: mock.Mock):
     )
 
 
+AUDITLOG_EVENTS = [
+    {
+        "id": "1",
+        "action": "organization.create",
+        "actor": {"id": "user-1"},
+        "created": "2019-10-11T12:13:14",
+    },
+    {
+        "id": "2",
+        "action": "project.create",
+        "actor": {"id": None},
+        "created": "2019-10-11T12:13:15",
+    },
+]
+
+
+@mock.patch.object(
+    Client,
+    "request",
+    side_effect=[
+        ([AUDITLOG_EVENTS[0]], None),
+        ([AUDITLOG_EVENTS[1]], None),
+        ([], None),
+    ],
+)
+def test_organizations_auditlogs_list_stream_jsonl(mock_request, capsys):
+    org_id = gen_uuid()
+
+    call_command(
+        "croud",
+        "organizations",
+        "auditlogs",
+        "list",
+        "--org-id",
+        org_id,
+        "--action",
+        "organization.create",
+        "--stream",
+        "jsonl",
+    )
+    assert mock_request.call_args_list == [
+        mock.call(
+            RequestMethod.GET,
+            f"/api/v2/organizations/{org_id}/auditlogs/",
+            params={"action": "organization.create"},
+        ),
+        mock.call(
+            RequestMethod.GET,
+            f"/api/v2/organizations/{org_id}/auditlogs/",
+            params={"action": "organization.create", "last": "1"},
+        ),
+        mock.call(
+            RequestMethod.GET,
+            f"/api/v2/organizations/{org_id}/auditlogs/",
+            params={"action": "organization.create", "last": "2"},
+        ),
+    ]
+
+    out, _ = capsys.readouterr()
+    assert [json.loads(line) for line in out.splitlines()] == AUDITLOG_EVENTS
+
+
+@pytest.mark.parametrize("output_format", ["ndjson", "csv"])
+@mock.patch.object(Client, "request")
+def test_organizations_auditlogs_list_prints_pages_while_fetching(
+    mock_request, output_format, capsys
+):
+    written = []
+
+    def mock_call(method, endpoint, params=None):
+        if "last" not in params:
+            return [AUDITLOG_EVENTS[0]], None
+        if params["last"] == "1":
+            return [AUDITLOG_EVENTS[1]], None
+        # The events of the first page have been printed already
+        written.append(capsys.readouterr().out)
+        return [], None
+
+    mock_request.side_effect = mock_call
+    call_command(
+        "croud",
+        "organizations",
+        "auditlogs",
+        "list",
+        "--org-id",
+        gen_uuid(),
+        "-o",
+        output_format,
+    )
+    out = written[0] + capsys.readouterr().out
+    if output_format == "ndjson":
+        assert json.loads(written[0].splitlines()[0]) == AUDITLOG_EVENTS[0]
+        assert [json.loads(line) for line in out.splitlines()] == AUDITLOG_EVENTS
+    else:
+        assert written[0].splitlines()[:2] == [
+            "action,actor,created",
+            "organization.create,user-1,2019-10-11T12:13:14",
+        ]
+        assert out.splitlines()[2] == "project.create,SYSTEM,2019-10-11T12:13:15"
+
+
+@mock.patch.object(
+    Client,
+    "request",
+    side_effect=[(AUDITLOG_EVENTS, None), ([], None)],
+)
+def test_organizations_auditlogs_list_stream_csv(mock_request, capsys):
+    call_command(
+        "croud",
+        "organizations",
+        "auditlogs",
+        "list",
+        "--org-id",
+        gen_uuid(),
+        "--stream",
+        "csv",
+    )
+
+    out, _ = capsys.readouterr()
+    assert out.splitlines() == [
+        "id,action,actor,created",
+        "1,organization.create,user-1,2019-10-11T12:13:14",
+        "2,project.create,SYSTEM,2019-10-11T12:13:15",
+    ]
+
+
+@mock.patch.object(
+    Client,
+    "request",
+    side_effect=[(AUDITLOG_EVENTS, None), (None, {"message": "Bad request."})],
+)
+def test_organizations_auditlogs_list_stream_error(mock_request, capsys):
+    call_command(
+        "croud",
+        "organizations",
+        "auditlogs",
+        "list",
+        "--org-id",
+        gen_uuid(),
+        "--stream",
+        "jsonl",
+    )
+
+    out, err = capsys.readouterr()
+    assert len(out.splitlines()) == 2
+    assert "Bad request." in err
+
+
+def test_organizations_auditlogs_list_cache_and_offline(tmp_path, capsys):
+    org_id = gen_uuid()
+    store_path = tmp_path / "auditlogs.sqlite3"
+
+    with mock.patch(
+        "croud.organizations.auditlogs.store.default_store_path",
+        return_value=store_path,
+    ):
+        with mock.patch.object(
+            Client, "request", side_effect=[(AUDITLOG_EVENTS, None), ([], None)]
+        ):
+            call_command(
+                "croud",
+                "organizations",
+                "auditlogs",
+                "list",
+                "--org-id",
+                org_id,
+                "--cache",
+            )
+        capsys.readouterr()
+
+        with mock.patch.object(Client, "request") as mock_request:
+            call_command(
+                "croud",
+                "organizations",
+                "auditlogs",
+                "list",
+                "--org-id",
+                org_id,
+                "--offline",
+                "--actor",
+                "user-1",
+                "-o",
+                "json",
+            )
+            mock_request.assert_not_called()
+
+    out, _ = capsys.readouterr()
+    assert json.loads(out) == [AUDITLOG_EVENTS[0]]
+
+
+@mock.patch.object(Client, "request")
+def test_organizations_auditlogs_list_actor_requires_offline(mock_request, capsys):
+    call_command(
+        "croud",
+        "organizations",
+        "auditlogs",
+        "list",
+        "--org-id",
+        gen_uuid(),
+        "--actor",
+        "user-1",
+    )
+    mock_request.assert_not_called()
+    _, err = capsys.readouterr()
+    assert "Filtering by actor is only supported with --offline." in err
+
+
+def test_organizations_auditlogs_sync(tmp_path, capsys):
+    org_id = gen_uuid()
+    output = tmp_path / "auditlogs.jsonl"
+    # The API returns events newest first
+    newest_first = list(reversed(AUDITLOG_EVENTS))
+
+    with mock.patch.object(
+        Client, "request", side_effect=[(newest_first, None), ([], None)]
+    ) as mock_request:
+        call_command(
+            "croud",
+            "organizations",
+            "auditlogs",
+            "sync",
+            "--org-id",
+            org_id,
+            "--output",
+            str(output),
+        )
+    assert mock_request.call_args_list[0] == mock.call(
+        RequestMethod.GET, f"/api/v2/organizations/{org_id}/auditlogs/", params={}
+    )
+    lines = output.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == AUDITLOG_EVENTS
+
+    checkpoint = json.loads((tmp_path / "auditlogs.jsonl.checkpoint").read_text())
+    assert checkpoint == {
+        org_id: {
+            "id": "2",
+            "ids": ["2"],
+            "created": "2019-10-11T12:13:15",
+            "offset": output.stat().st_size,
+        }
+    }
+
+    # Simulate a partial write of an interrupted run
+    with output.open("a") as fp:
+        fp.write('{"id": "3", "act')
+
+    new_event = {
+        "id": "3",
+        "action": "cluster.create",
+        "actor": {"id": "user-1"},
+        "created": "2019-10-11T12:13:16",
+    }
+    with mock.patch.object(
+        Client,
+        "request",
+        side_effect=[([new_event, AUDITLOG_EVENTS[1]], None), ([], None)],
+    ) as mock_request:
+        call_command(
+            "croud",
+            "organizations",
+            "auditlogs",
+            "sync",
+            "--org-id",
+            org_id,
+            "--output",
+            str(output),
+        )
+    assert mock_request.call_args_list[0] == mock.call(
+        RequestMethod.GET,
+        f"/api/v2/organizations/{org_id}/auditlogs/",
+        params={"from": "2019-10-11T12:13:15"},
+    )
+    lines = output.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == AUDITLOG_EVENTS + [new_event]
+
+    _, err = capsys.readouterr()
+    assert "Appended 1 new audit events" in err
+
+
+def _sync_auditlogs(org_id, output, pages, *extra_args):
+    with mock.patch.object(
+        Client, "request", side_effect=[(page, None) for page in pages + [[]]]
+    ):
+        call_command(
+            "croud",
+            "organizations",
+            "auditlogs",
+            "sync",
+            "--org-id",
+            org_id,
+            "--output",
+            str(output),
+            *extra_args,
+        )
+
+
+@pytest.mark.parametrize("synced_before", [False, True])
+def test_organizations_auditlogs_sync_interrupted(tmp_path, synced_before):
+    org_id = gen_uuid()
+    output = tmp_path / "auditlogs.jsonl"
+    newest_first = list(reversed(AUDITLOG_EVENTS))
+    if synced_before:
+        _sync_auditlogs(org_id, output, [newest_first[1:]])
+    store_checkpoints = auditlogs_commands._store_checkpoints
+
+    def interrupt_after_write(path, checkpoints):
+        # The pending offset is stored, the run is interrupted before the
+        # checkpoint of the written events is
+        if "pending_offset" not in checkpoints[org_id]:
+            raise KeyboardInterrupt()
+        store_checkpoints(path, checkpoints)
+
+    with mock.patch.object(
+        auditlogs_commands, "_store_checkpoints", side_effect=interrupt_after_write
+    ):
+        with pytest.raises(KeyboardInterrupt):
+            _sync_auditlogs(org_id, output, [newest_first])
+    assert len(output.read_text().splitlines()) == 2
+
+    _sync_auditlogs(org_id, output, [newest_first])
+    lines = output.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == AUDITLOG_EVENTS
+    checkpoint = json.loads((tmp_path / "auditlogs.jsonl.checkpoint").read_text())
+    assert checkpoint[org_id]["offset"] == output.stat().st_size
+    assert "pending_offset" not in checkpoint[org_id]
+
+
+def test_organizations_auditlogs_sync_same_timestamp(tmp_path, capsys):
+    org_id = gen_uuid()
+    output = tmp_path / "auditlogs.jsonl"
+    created = "2019-10-11T12:13:15"
+    events = [
+        {"id": str(i), "action": "cluster.create", "created": created} for i in range(4)
+    ]
+    _sync_auditlogs(org_id, output, [events[1::-1]])
+    # Events with the timestamp of the checkpoint that were not synced yet
+    # show up in the next run
+    _sync_auditlogs(org_id, output, [events[2::-1]])
+    _sync_auditlogs(org_id, output, [events[::-1]])
+    _sync_auditlogs(org_id, output, [events[::-1]])
+
+    lines = output.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == events
+    checkpoint = json.loads((tmp_path / "auditlogs.jsonl.checkpoint").read_text())
+    assert checkpoint[org_id]["ids"] == ["0", "1", "2", "3"]
+    _, err = capsys.readouterr()
+    assert "No new audit events." in err
+
+
+def test_organizations_auditlogs_sync_old_checkpoint(tmp_path):
+    org_id = gen_uuid()
+    output = tmp_path / "auditlogs.jsonl"
+    output.write_text(json.dumps(AUDITLOG_EVENTS[1]) + "\n")
+    (tmp_path / "auditlogs.jsonl.checkpoint").write_text(
+        json.dumps(
+            {
+                org_id: {
+                    "id": "2",
+                    "created": "2019-10-11T12:13:15",
+                    "offset": output.stat().st_size,
+                }
+            }
+        )
+    )
+    new_event = {
+        "id": "3",
+        "action": "cluster.create",
+        "created": "2019-10-11T12:13:16",
+    }
+    _sync_auditlogs(org_id, output, [[new_event, AUDITLOG_EVENTS[1]]])
+    lines = output.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [AUDITLOG_EVENTS[1], new_event]
+
+
+def test_organizations_auditlogs_sync_from_with_checkpoint(tmp_path, capsys):
+    org_id = gen_uuid()
+    output = tmp_path / "auditlogs.jsonl"
+    _sync_auditlogs(org_id, output, [list(reversed(AUDITLOG_EVENTS))])
+    capsys.readouterr()
+    _sync_auditlogs(org_id, output, [], "--from", "2019-01-01T00:00:00")
+    _, err = capsys.readouterr()
+    assert "Ignoring --from, since events are synced from the checkpoint" in err
+
+
+@mock.patch.object(Client, "request", return_value=([], None))
+def test_organizations_auditlogs_sync_no_new_events(mock_request, tmp_path, capsys):
+    output = tmp_path / "auditlogs.jsonl"
+    call_command(
+        "croud",
+        "organizations",
+        "auditlogs",
+        "sync",
+        "--org-id",
+        gen_uuid(),
+        "--output",
+        str(output),
+    )
+    assert not output.exists()
+    _, err = capsys.readouterr()
+    assert "No new audit events." in err
+
+
 @pytest.mark.parametrize(
     "added,message",
     [(True, "User added to organization."), (False, "Role altered for user.")],
@@ -453,6 +857,127 @@ def test_organizations_files_create(mock_request, mock_isfile):
     )
 
 
+def _files_create(org_id, file_path):
+    call_command(
+        "croud",
+        "organizations",
+        "files",
+        "create",
+        "--org-id",
+        org_id,
+        "--file-path",
+        str(file_path),
+        "--name",
+        "my-file",
+    )
+
+
+@mock.patch.object(Client, "request")
+def test_organizations_files_create_retries_upload(mock_request, tmp_path, capsys):
+    org_id = gen_uuid()
+    file_id = gen_uuid()
+    file_path = tmp_path / "data.json"
+    file_path.write_text('{"a": 1}\n')
+    upload_url = "https://s3-presigned-url.s3.amazonaws.com/upload"
+
+    def mock_call(method, endpoint, params=None, body=None):
+        if method == RequestMethod.POST:
+            return {"id": file_id, "upload_url": upload_url}, None
+        if endpoint.endswith("/files/"):
+            return [{"id": file_id, "status": "UPLOADED"}], None
+        return {"id": file_id, "status": "UPLOADING"}, None
+
+    mock_request.side_effect = mock_call
+    with mock.patch(
+        "requests.Session.put", return_value=mock.Mock(status_code=500)
+    ) as mock_put:
+        _files_create(org_id, file_path)
+    assert mock_put.call_args[0][0] == upload_url
+    _, err_output = capsys.readouterr()
+    assert "There was an error while trying to upload the file" in err_output
+
+    # The second attempt reuses the file that has already been created
+    mock_request.reset_mock()
+    with mock.patch(
+        "requests.Session.put", return_value=mock.Mock(status_code=200)
+    ) as mock_put:
+        _files_create(org_id, file_path)
+    assert mock_put.call_args[0][0] == upload_url
+    mock_request.assert_any_call(
+        RequestMethod.GET,
+        f"/api/v2/organizations/{org_id}/files/{file_id}/",
+        params=None,
+    )
+    assert RequestMethod.POST not in [c.args[0] for c in mock_request.call_args_list]
+    _, err_output = capsys.readouterr()
+    assert "Retrying the upload of the existing file..." in err_output
+
+    # Once the upload succeeded, a new file is created again
+    mock_request.reset_mock()
+    with mock.patch("requests.Session.put", return_value=mock.Mock(status_code=200)):
+        _files_create(org_id, file_path)
+    mock_request.assert_any_call(
+        RequestMethod.POST,
+        f"/api/v2/organizations/{org_id}/files/",
+        params=None,
+        body={"name": "my-file"},
+    )
+
+
+@mock.patch.object(Client, "request")
+def test_organizations_files_create_already_uploaded(mock_request, tmp_path, capsys):
+    org_id = gen_uuid()
+    file_id = gen_uuid()
+    file_path = tmp_path / "data.json"
+    file_path.write_text('{"a": 1}\n')
+
+    def mock_call(method, endpoint, params=None, body=None):
+        if method == RequestMethod.POST:
+            return {"id": file_id, "upload_url": "https://upload"}, None
+        if endpoint.endswith("/files/"):
+            return [{"id": file_id, "status": "UPLOADED"}], None
+        return {"id": file_id, "status": "UPLOADED"}, None
+
+    mock_request.side_effect = mock_call
+    with mock.patch("requests.Session.put", side_effect=KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            _files_create(org_id, file_path)
+
+    with mock.patch("requests.Session.put") as mock_put:
+        _files_create(org_id, file_path)
+    mock_put.assert_not_called()
+    _, err_output = capsys.readouterr()
+    assert "The file has already been uploaded." in err_output
+
+
+@mock.patch.object(Client, "request")
+def test_organizations_files_create_changed_file(mock_request, tmp_path):
+    org_id = gen_uuid()
+    file_path = tmp_path / "data.json"
+    file_path.write_text('{"a": 1}\n')
+    file_id = gen_uuid()
+    mock_request.side_effect = lambda method, *args, **kwargs: (
+        ({"id": file_id, "upload_url": "https://u"}, None)
+        if method == RequestMethod.POST
+        else ([{"id": file_id}], None)
+    )
+
+    with mock.patch("requests.Session.put", return_value=mock.Mock(status_code=403)):
+        _files_create(org_id, file_path)
+    with mock.patch("requests.Session.put", return_value=mock.Mock(status_code=500)):
+        _files_create(org_id, file_path)
+    file_path.write_text('{"a": 1}\n{"a": 2}\n')
+    with mock.patch("requests.Session.put", return_value=mock.Mock(status_code=200)):
+        _files_create(org_id, file_path)
+    # The file entry is never reused for an expired upload URL or a changed file
+    assert [c.args[0] for c in mock_request.call_args_list] == [
+        RequestMethod.POST,
+        RequestMethod.POST,
+        RequestMethod.POST,
+        RequestMethod.GET,
+    ]
+
+
 @mock.patch.object(Client, "request", return_value=({}, None))
 def test_organizations_secrets_list(mock_request):
     org_id = gen_uuid()
@@ -23,6 +23,7 @@ from unittest import mock
 import pytest
 import urllib3
 
+import croud.api
 import croud.config
 from croud.api import Client
 from croud.config.configuration import Configuration
@@ -39,6 +40,20 @@ def reset_environment():
             os.environ.pop(key)
 
 
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    """Keep cached API responses and audit logs out of the user's cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def http_adapter():
+    """Retry failed requests without waiting in between."""
+    with mock.patch.dict(os.environ, {"CROUD_HTTP_BACKOFF_FACTOR": "0"}):
+        with mock.patch.object(croud.api, "_HTTP_ADAPTER", None):
+            yield
+
+
 @pytest.fixture(scope="session")
 def fake_cratedb_cloud():
     with FakeCrateDBCloud() as cloud:
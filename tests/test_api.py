@@ -19,12 +19,23 @@
 
 import argparse
 import re
+import threading
+import time
 from platform import python_version
+from unittest import mock
 
 import pytest
 
 import croud
-from croud.api import Client
+from croud.api import (
+    AsyncClient,
+    Client,
+    RequestMethod,
+    gather,
+    get_http_adapter,
+    http_session,
+)
+from croud.http_cache import HttpCache
 
 
 def test_send_success_sets_data_with_key(client: Client):
@@ -131,3 +142,182 @@ def test_auth_with_key_and_secret(config):
     resp_data, errors = client.get("/client-headers")
     assert isinstance(resp_data, dict)
     assert resp_data["Authorization"] == "Basic c29tZS1rZXk6c29tZS1zZWNyZXQ="
+
+
+def test_sessions_share_http_adapter(config):
+    client1 = Client(config.endpoint, _verify_ssl=False)
+    client2 = Client(config.endpoint, _verify_ssl=False)
+    adapter = get_http_adapter()
+    assert client1.session.get_adapter(config.endpoint) is adapter
+    assert client2.session.get_adapter(config.endpoint) is adapter
+    assert http_session().get_adapter("https://example.com") is adapter
+    assert http_session() is http_session()
+
+
+def test_retry_idempotent_request(client: Client):
+    resp_data, errors = client.get("/flaky", params={"key": "get", "fail": 2})
+    assert resp_data == {"attempts": 3}
+    assert errors is None
+
+
+def test_retry_gives_up_after_max_retries(client: Client):
+    resp_data, errors = client.get("/flaky", params={"key": "max", "fail": 10})
+    assert resp_data is None
+    assert errors == {"message": "Unavailable."}
+
+
+def test_no_retry_for_post_request(client: Client):
+    resp_data, errors = client.post("/flaky", params={"key": "post", "fail": 1})
+    assert resp_data is None
+    assert errors == {"message": "Unavailable."}
+    resp_data, errors = client.post("/flaky", params={"key": "post", "fail": 1})
+    assert resp_data == {"attempts": 2}
+
+
+def test_async_client_request(client: Client):
+    with AsyncClient(client) as async_client:
+        (data1, errors1), (data2, errors2) = gather(
+            async_client.get("/data/no-key"), async_client.get("/errors/400")
+        )
+    assert data1 == {"key": "value"}
+    assert errors1 is None
+    assert data2 is None
+    assert errors2 == {"message": "Bad request.", "errors": {"key": "Error on 'key'"}}
+
+
+def test_async_client_methods(client: Client):
+    with AsyncClient(client) as async_client:
+        responses = gather(
+            async_client.delete("/path"),
+            async_client.get("/path", params={"b": "2"}),
+            async_client.patch("/path"),
+            async_client.post("/path"),
+            async_client.put("/path"),
+        )
+    assert [errors["method"] for _, errors in responses] == [
+        "DELETE",
+        "GET",
+        "PATCH",
+        "POST",
+        "PUT",
+    ]
+    assert responses[1][1]["query"] == {"b": ["2"]}
+
+
+def test_gather_runs_requests_concurrently():
+    barrier = threading.Barrier(5, timeout=5)
+
+    def request(*args, **kwargs):
+        # Only passes if all requests are in flight at the same time
+        barrier.wait()
+        return {"thread": threading.get_ident()}, None
+
+    client = mock.Mock(spec=Client, request=request)
+    start = time.monotonic()
+    with AsyncClient(client, max_concurrency=5) as async_client:
+        responses = gather(*(async_client.get(f"/{i}") for i in range(5)))
+    assert time.monotonic() - start < 5
+    assert len({data["thread"] for data, _ in responses}) == 5
+
+
+def test_gather_keeps_order():
+    def request(method, endpoint, **kwargs):
+        time.sleep(0.01 * (5 - int(endpoint[1:])))
+        return {"endpoint": endpoint}, None
+
+    client = mock.Mock(spec=Client, request=request)
+    with AsyncClient(client) as async_client:
+        responses = gather(*(async_client.get(f"/{i}") for i in range(5)))
+    assert [data["endpoint"] for data, _ in responses] == [f"/{i}" for i in range(5)]
+
+
+@pytest.fixture
+def cached_client(client: Client, tmp_path):
+    client.cache = HttpCache(tmp_path)
+    with mock.patch.object(
+        client.session, "request", wraps=client.session.request
+    ) as request:
+        yield client, request
+
+
+def test_cache_fresh_response(cached_client):
+    client, request = cached_client
+    assert client.get("/api/v2/regions/") == (
+        [{"name": "bregenz.a1", "description": "Bregenz"}],
+        None,
+    )
+    assert client.get("/api/v2/regions/") == (
+        [{"name": "bregenz.a1", "description": "Bregenz"}],
+        None,
+    )
+    assert request.call_count == 1
+
+
+def test_cache_revalidates_stale_response(cached_client):
+    client, request = cached_client
+    client.get("/api/v2/regions/")
+    with mock.patch("croud.http_cache.time.time", return_value=time.time() + 7200):
+        data, errors = client.get("/api/v2/regions/")
+    assert data == [{"name": "bregenz.a1", "description": "Bregenz"}]
+    assert errors is None
+    assert request.call_count == 2
+    assert request.call_args[1]["headers"] == {"If-None-Match": '"regions-v1"'}
+    # The revalidated response is fresh again
+    client.get("/api/v2/regions/")
+    assert request.call_count == 2
+
+
+def test_cache_ignores_other_endpoints(cached_client):
+    client, request = cached_client
+    client.get("/data/no-key")
+    client.get("/data/no-key")
+    assert request.call_count == 2
+
+
+def test_cache_cleared_by_modifying_request(cached_client):
+    client, request = cached_client
+    client.get("/api/v2/regions/")
+    client.request(RequestMethod.POST, "/data/no-key")
+    client.get("/api/v2/regions/")
+    assert request.call_count == 3
+    assert "If-None-Match" not in request.call_args[1].get("headers", {})
+
+
+def test_cache_varies_by_sudo_and_region(cached_client):
+    client, request = cached_client
+    client.get("/api/v2/regions/")
+    client.session.headers["X-Auth-Sudo"] = "1"
+    client.get("/api/v2/regions/")
+    client.session.headers["X-Region"] = "westeurope.azure"
+    client.get("/api/v2/regions/")
+    assert request.call_count == 3
+    del client.session.headers["X-Auth-Sudo"]
+    client.session.headers["X-Region"] = "bregenz.a1"
+    client.get("/api/v2/regions/")
+    assert request.call_count == 3
+
+
+def test_cache_without_reads(cached_client):
+    client, request = cached_client
+    client.get("/api/v2/regions/")
+    client.cache_reads = False
+    client.get("/api/v2/regions/")
+    assert request.call_count == 2
+    assert "If-None-Match" not in request.call_args[1].get("headers", {})
+
+    # Modifying requests still invalidate the cache
+    client.request(RequestMethod.POST, "/data/no-key")
+    client.cache_reads = True
+    client.get("/api/v2/regions/")
+    assert request.call_count == 4
+
+
+def test_client_from_args_cache(config):
+    args = argparse.Namespace(sudo=False, region=None, no_cache=False)
+    client = Client.from_args(args)
+    assert isinstance(client.cache, HttpCache)
+    assert client.cache_reads is True
+    args = argparse.Namespace(sudo=False, region=None, no_cache=True)
+    client = Client.from_args(args)
+    assert isinstance(client.cache, HttpCache)
+    assert client.cache_reads is False
@@ -0,0 +1,56 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+from croud.organizations.auditlogs.store import AuditLogStore
+
+
+def make_event(id, created, action="cluster.create", actor_id="user-1"):
+    return {
+        "id": id,
+        "action": action,
+        "actor": {"id": actor_id},
+        "created": created,
+    }
+
+
+def test_query_filters(tmp_path):
+    events = [
+        make_event("1", "2024-01-01T00:00:00", action="organization.create"),
+        make_event("2", "2024-01-02T00:00:00", actor_id=None),
+        make_event("3", "2024-01-03T00:00:00"),
+    ]
+    with AuditLogStore(tmp_path / "store.sqlite3") as store:
+        store.add("org-1", events)
+        store.add("org-2", [make_event("4", "2024-01-04T00:00:00")])
+
+        assert store.query("org-1") == list(reversed(events))
+        assert store.query("org-1", action="organization.create") == [events[0]]
+        assert store.query("org-1", actor_id="user-1") == [events[2], events[0]]
+        assert store.query(
+            "org-1", from_="2024-01-02T00:00:00", to="2024-01-03T00:00:00"
+        ) == [events[1]]
+
+
+def test_add_replaces_existing_events(tmp_path):
+    path = tmp_path / "store.sqlite3"
+    with AuditLogStore(path) as store:
+        store.add("org-1", [make_event("1", "2024-01-01T00:00:00")])
+    with AuditLogStore(path) as store:
+        store.add("org-1", [make_event("1", "2024-01-01T00:00:00", action="x")])
+        assert [e["action"] for e in store.query("org-1")] == ["x"]
@@ -0,0 +1,66 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+from croud.clusters.index import ClusterIndex
+
+
+def test_add_and_get(tmp_path):
+    index = ClusterIndex(tmp_path / "index.json")
+    assert index.get("cluster-1", "name") is None
+    index.add(
+        [{"id": "cluster-1", "name": "c1", "project_id": "p1", "num_nodes": 3}],
+        organization_id="o1",
+    )
+    assert index.get("cluster-1", "name") == "c1"
+    assert index.get("cluster-1", "project_id") == "p1"
+    assert index.get("cluster-1", "organization_id") == "o1"
+    assert index.get("cluster-1", "num_nodes") is None
+
+    # The index is persisted
+    index = ClusterIndex(tmp_path / "index.json")
+    assert index.get("cluster-1", "organization_id") == "o1"
+
+
+def test_add_keeps_known_fields(tmp_path):
+    index = ClusterIndex(tmp_path / "index.json")
+    index.add([{"id": "cluster-1", "project_id": "p1"}], organization_id="o1")
+    index.add([{"id": "cluster-1", "fqdn": "c1.cratedb.net."}])
+    assert index.entries == {
+        "cluster-1": {
+            "project_id": "p1",
+            "organization_id": "o1",
+            "fqdn": "c1.cratedb.net.",
+        }
+    }
+
+
+def test_remove(tmp_path):
+    index = ClusterIndex(tmp_path / "index.json")
+    index.add([{"id": "cluster-1", "name": "c1"}, {"id": "cluster-2", "name": "c2"}])
+    index.remove("cluster-1")
+    index.remove("cluster-3")
+    assert ClusterIndex(tmp_path / "index.json").entries == {
+        "cluster-2": {"name": "c2"}
+    }
+
+
+def test_invalid_index_file(tmp_path):
+    (tmp_path / "index.json").write_text("{")
+    index = ClusterIndex(tmp_path / "index.json")
+    assert index.get("cluster-1", "name") is None
@@ -21,7 +21,7 @@ import pytest
 import yaml
 from marshmallow.exceptions import ValidationError
 
-from croud.config.configuration import ConfigSchema, ProfileSchema
+from croud.config.schemas import ConfigSchema, ProfileSchema
 
 
 @pytest.mark.parametrize(
@@ -74,7 +74,12 @@ def test_load_profile_schema_valid(data):
     endpoint: http://localhost:8000
     format: invalid
     """,
-            {"format": ["Must be one of: table, wide, json, yaml."]},
+            {
+                "format": [
+                    "Must be one of: "
+                    "table, wide, json, json-compact, yaml, ndjson, csv."
+                ]
+            },
         ),
     ],
 )
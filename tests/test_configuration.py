@@ -16,8 +16,11 @@
 # However, if you have executed another commercial license agreement
 # with Crate these terms will supersede the license and you may use the
 # software solely pursuant to the terms of the relevant commercial agreement.
+import json
 import os
 import pathlib
+import subprocess
+import sys
 from unittest import mock
 
 import pytest
@@ -25,6 +28,7 @@ import pytest
 from croud.config import WeakConfigProxy
 from croud.config.configuration import Configuration
 from croud.config.exceptions import InvalidConfiguration, InvalidProfile
+from croud.config.schemas import ConfigSchema
 from croud.config.util import clean_dict
 
 
@@ -150,6 +154,122 @@ profiles:
         }
 
 
+VALID_CONFIGURATION = """\
+default-format: table
+current-profile: cratedb.cloud
+profiles:
+  cratedb.cloud:
+    auth-token: NULL
+    endpoint: https://console.cratedb.cloud
+    region: _any_
+"""
+
+
+def _write_config(tmp_path, content, mtime_ns=1_000_000_000):
+    file_path = tmp_path / "test.yaml"
+    file_path.write_text(content)
+    os.utime(file_path, ns=(mtime_ns, mtime_ns))
+    return file_path
+
+
+def _load_config(tmp_path):
+    with mock.patch(
+        "croud.config.configuration.user_config_dir", return_value=str(tmp_path)
+    ):
+        return Configuration("test.yaml").config
+
+
+def test_load_stores_compiled_configuration(tmp_path):
+    _write_config(tmp_path, VALID_CONFIGURATION)
+    config = _load_config(tmp_path)
+    cache_path = tmp_path / ".test.yaml.cache.json"
+    assert cache_path.exists()
+    assert cache_path.stat().st_mode & 0o777 == 0o600  # only user access
+    assert not (tmp_path / ".test.yaml.cache.json.tmp").exists()
+
+    with mock.patch(
+        "croud.config.configuration._load_yaml", side_effect=AssertionError
+    ), mock.patch.object(ConfigSchema, "load", side_effect=AssertionError):
+        assert _load_config(tmp_path) == config
+
+
+def test_load_compiled_configuration_changed_file(tmp_path):
+    _write_config(tmp_path, VALID_CONFIGURATION)
+    _load_config(tmp_path)
+    _write_config(
+        tmp_path, VALID_CONFIGURATION.replace("table", "json"), mtime_ns=2_000_000_000
+    )
+    assert _load_config(tmp_path)["default-format"] == "json"
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_load_without_parsing_does_not_import_yaml(tmp_path, cached):
+    if cached:
+        _write_config(tmp_path, VALID_CONFIGURATION)
+        _load_config(tmp_path)
+    code = (
+        "import sys; from pathlib import Path; "
+        "from croud.config.configuration import Configuration; "
+        f"Configuration('test.yaml', Path({str(tmp_path)!r})).config; "
+        "print(sorted({m.split('.')[0] for m in sys.modules} "
+        "& {'yaml', 'marshmallow'}))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_load_compiled_configuration_touched_file(tmp_path):
+    _write_config(tmp_path, VALID_CONFIGURATION)
+    config = _load_config(tmp_path)
+    file_path = _write_config(tmp_path, VALID_CONFIGURATION, mtime_ns=2_000_000_000)
+    with mock.patch.object(ConfigSchema, "load", side_effect=AssertionError):
+        assert _load_config(tmp_path) == config
+    # The cache is refreshed with the new modification time
+    cached = json.loads((tmp_path / ".test.yaml.cache.json").read_text())
+    assert cached["mtime_ns"] == file_path.stat().st_mtime_ns
+
+
+def test_load_compiled_configuration_racy_file(tmp_path):
+    # A file that is modified right after it has been cached, without a change
+    # of its size or modification time, must not be served from the cache
+    file_path = tmp_path / "test.yaml"
+    file_path.write_text(VALID_CONFIGURATION)
+    _load_config(tmp_path)
+    stat = file_path.stat()
+    file_path.write_text(VALID_CONFIGURATION.replace("table", "yaml "))
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert _load_config(tmp_path)["default-format"] == "yaml"
+
+
+@pytest.mark.parametrize(
+    "cached",
+    [
+        "{",
+        "[]",
+        '{"version": "0.0.0"}',
+    ],
+)
+def test_load_compiled_configuration_invalid_cache(tmp_path, cached):
+    _write_config(tmp_path, VALID_CONFIGURATION)
+    (tmp_path / ".test.yaml.cache.json").write_text(cached)
+    assert _load_config(tmp_path)["default-format"] == "table"
+    cached = json.loads((tmp_path / ".test.yaml.cache.json").read_text())
+    assert cached["config"]["default-format"] == "table"
+
+
+def test_dump_stores_compiled_configuration(tmp_path):
+    with mock.patch(
+        "croud.config.configuration.user_config_dir", return_value=str(tmp_path)
+    ):
+        config = Configuration("test.yaml")
+        config.set_current_format("json")
+        cached = json.loads((tmp_path / ".test.yaml.cache.json").read_text())
+        assert cached["config"] == config.config
+        assert cached["config"]["profiles"]["cratedb.cloud"]["format"] == "json"
+
+
 def test_use_profile(config):
     config.add_profile("new", endpoint="http://localhost:8000")
     config.use_profile("new")
@@ -232,3 +352,62 @@ def test_config_from_environment(mocker, tmp_path):
     config = Configuration("croud.yaml", tmp_path)
     assert config.key == "api_key"
     assert config.secret == "api_secret"
+
+
+def test_transaction_writes_once(tmp_path):
+    config = Configuration("croud.yaml", tmp_path)
+    with mock.patch.object(config, "dump", wraps=config.dump) as mock_dump:
+        with config.transaction():
+            config.add_profile("test", endpoint="http://localhost:8000")
+            with config.transaction():
+                config.set_auth_token("test", "token")
+            config.use_profile("test")
+            mock_dump.assert_not_called()
+            assert not (tmp_path / "croud.yaml").exists()
+    mock_dump.assert_called_once_with()
+    assert Configuration("croud.yaml", tmp_path).config == config.config
+
+
+def test_transaction_without_changes(tmp_path):
+    config = Configuration("croud.yaml", tmp_path)
+    with config.transaction():
+        assert config.name == "cratedb.cloud"
+    assert not (tmp_path / "croud.yaml").exists()
+
+
+def test_transaction_writes_on_error(tmp_path):
+    config = Configuration("croud.yaml", tmp_path)
+    with pytest.raises(SystemExit):
+        with config.transaction():
+            config.set_current_auth_token("token")
+            sys.exit(1)
+    assert Configuration("croud.yaml", tmp_path).token == "token"
+
+
+def test_dump_replaces_file_atomically(tmp_path):
+    config = Configuration("croud.yaml", tmp_path)
+    config.set_current_auth_token("token")
+    assert (tmp_path / "croud.yaml").stat().st_mode & 0o777 == 0o600
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        ".croud.yaml.cache.json",
+        "croud.yaml",
+    ]
+
+    # A failed write leaves the previous file in place
+    with mock.patch("yaml.safe_dump", return_value="current-profile: ["):
+        with mock.patch("os.replace", side_effect=OSError):
+            with pytest.raises(OSError):
+                config.set_current_auth_token("other-token")
+    assert Configuration("croud.yaml", tmp_path).token == "token"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_dump_follows_symlink(tmp_path):
+    target = tmp_path / "dotfiles" / "croud.yaml"
+    target.parent.mkdir()
+    Configuration("croud.yaml", target.parent).dump()
+    (tmp_path / "croud.yaml").symlink_to(target)
+
+    Configuration("croud.yaml", tmp_path).set_current_auth_token("token")
+    assert (tmp_path / "croud.yaml").is_symlink()
+    assert Configuration("croud.yaml", target.parent).token == "token"
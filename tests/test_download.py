@@ -0,0 +1,208 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import gzip
+import hashlib
+import io
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+
+from croud.clusters.download import _download_range, download_file, stream_file
+from croud.clusters.exceptions import DownloadFailed
+
+CONTENT = os.urandom(10_000)
+
+
+class FileServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FileRequestHandler)
+        self.content = CONTENT
+        self.etag = f'"{hashlib.md5(CONTENT).hexdigest()}"'
+        self.ranges = True
+        self.failing_offsets = set()
+        self.requested_ranges = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/file"
+
+
+class FileRequestHandler(BaseHTTPRequestHandler):
+    server: FileServer
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        content = self.server.content
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match and self.server.ranges:
+            start, end = int(match.group(1)), int(match.group(2))
+            self.server.requested_ranges.append((start, end))
+            if start in self.server.failing_offsets:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = content[start : end + 1]
+            self.send_response(206)
+        else:
+            body = content
+            self.send_response(200)
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = FileServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def small_segments():
+    with mock.patch("croud.clusters.download.SEGMENT_SIZE", 1000):
+        yield
+
+
+def test_download_segments(server, tmp_path):
+    path = tmp_path / "file.bin"
+    download_file(server.url, path, workers=4)
+    assert path.read_bytes() == CONTENT
+    assert sorted(server.requested_ranges) == [
+        (i * 1000, i * 1000 + 999) for i in range(10)
+    ]
+    assert sorted(os.listdir(tmp_path)) == ["file.bin"]
+
+
+def test_download_resume(server, tmp_path):
+    path = tmp_path / "file.bin"
+    server.failing_offsets = {3000, 7000}
+    with pytest.raises(DownloadFailed, match="Run the command again to resume it"):
+        download_file(server.url, path, workers=2)
+    assert not path.exists()
+    assert (tmp_path / "file.bin.part.json").exists()
+
+    server.failing_offsets = set()
+    server.requested_ranges = []
+    download_file(server.url, path, workers=2)
+    assert path.read_bytes() == CONTENT
+    assert len(server.requested_ranges) < 10
+    assert (3000, 3999) in server.requested_ranges
+    assert (7000, 7999) in server.requested_ranges
+    assert sorted(os.listdir(tmp_path)) == ["file.bin"]
+
+
+def test_download_interrupted(server, tmp_path):
+    path = tmp_path / "file.bin"
+    calls = []
+
+    def interrupt(url, part_path, start, end, progress, stopped):
+        calls.append(start)
+        raise KeyboardInterrupt
+
+    with mock.patch("croud.clusters.download._download_range", side_effect=interrupt):
+        with pytest.raises(KeyboardInterrupt):
+            download_file(server.url, path, workers=1)
+    # The queued segments are not downloaded anymore
+    assert calls == [0]
+    assert (tmp_path / "file.bin.part").exists()
+
+    download_file(server.url, path, workers=1)
+    assert path.read_bytes() == CONTENT
+
+
+def test_download_range_stopped(server, tmp_path):
+    part_path = tmp_path / "file.bin.part"
+    part_path.write_bytes(bytes(len(CONTENT)))
+    stopped = threading.Event()
+    stopped.set()
+    with pytest.raises(DownloadFailed, match="aborted"):
+        _download_range(server.url, part_path, 0, 999, mock.Mock(), stopped)
+
+
+def test_download_changed_file_is_not_resumed(server, tmp_path):
+    path = tmp_path / "file.bin"
+    server.failing_offsets = {0}
+    with pytest.raises(DownloadFailed):
+        download_file(server.url, path)
+
+    server.failing_offsets = set()
+    server.content = CONTENT[::-1]
+    server.etag = '"other-version"'
+    download_file(server.url, path)
+    assert path.read_bytes() == CONTENT[::-1]
+
+
+def test_download_checksum_mismatch(server, tmp_path):
+    path = tmp_path / "file.bin"
+    server.etag = f'"{hashlib.md5(b"something else").hexdigest()}"'
+    with pytest.raises(DownloadFailed, match="checksum"):
+        download_file(server.url, path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_without_ranges(server, tmp_path):
+    path = tmp_path / "file.bin"
+    server.ranges = False
+    download_file(server.url, path)
+    assert path.read_bytes() == CONTENT
+    assert server.requested_ranges == []
+
+
+def test_stream_file(server):
+    output = io.BytesIO()
+    stream_file(server.url, output)
+    assert output.getvalue() == CONTENT
+    assert server.requested_ranges == []
+
+
+@mock.patch("croud.clusters.download.BUFFER_SIZE", 100)
+def test_stream_file_decompress(server):
+    # Several gzip members, as written by concatenating compressed files
+    server.content = gzip.compress(CONTENT[:5000]) + gzip.compress(CONTENT[5000:])
+    output = io.BytesIO()
+    stream_file(server.url, output, decompress=True)
+    assert output.getvalue() == CONTENT
+
+
+def test_stream_file_decompress_invalid(server):
+    output = io.BytesIO()
+    with pytest.raises(DownloadFailed, match="The download failed"):
+        stream_file(server.url, output, decompress=True)
+
+
+def test_stream_file_error():
+    with mock.patch("requests.Session.get") as mock_get:
+        mock_get.return_value.__enter__.return_value.status_code = 403
+        with pytest.raises(DownloadFailed, match="status code 403"):
+            stream_file("https://download", io.BytesIO())
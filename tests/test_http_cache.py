@@ -0,0 +1,95 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import os
+import time
+
+import pytest
+
+from croud.http_cache import HttpCache, default_cache_path
+
+
+@pytest.mark.parametrize(
+    "endpoint,ttl",
+    [
+        ("/api/v2/products/", 3600),
+        ("/api/v2/regions/", 3600),
+        ("/api/v2/organizations/", 300),
+        ("/api/v2/users/me/", 300),
+        ("/api/v2/projects/some-project-id/", 300),
+        ("/api/v2/projects/", None),
+        ("/api/v2/clusters/some-cluster-id/", None),
+        ("/api/v2/organizations/some-org-id/", None),
+    ],
+)
+def test_ttl(endpoint, ttl):
+    assert HttpCache.ttl(endpoint) == ttl
+
+
+def test_put_and_get(tmp_path):
+    cache = HttpCache(tmp_path)
+    assert cache.get("https://cloud/a/", {"b": "c"}) is None
+    cache.put("https://cloud/a/", {"b": "c"}, [{"key": "value"}], '"etag"')
+    entry = cache.get("https://cloud/a/", {"b": "c"})
+    assert entry is not None
+    assert entry.body == [{"key": "value"}]
+    assert entry.etag == '"etag"'
+    assert entry.is_fresh(10)
+    assert not entry.is_fresh(0)
+    assert cache.get("https://cloud/a/", None) is None
+
+
+def test_key_includes_vary_headers(tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.put("https://cloud/a/", None, "sudo", headers={"X-Auth-Sudo": "1"})
+    assert cache.get("https://cloud/a/") is None
+    assert cache.get("https://cloud/a/", None, {"X-Region": "a"}) is None
+    entry = cache.get("https://cloud/a/", None, {"X-Auth-Sudo": "1", "Other": "x"})
+    assert entry is not None
+    assert entry.body == "sudo"
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(tmp_path)
+    for i in range(3):
+        cache.put(f"https://cloud/{i}/", None, "x" * 50)
+        path = cache._path(f"https://cloud/{i}/", None)
+        os.utime(path, (time.time() - 10 + i, time.time() - 10 + i))
+    # Leave room for exactly three entries
+    cache.max_size = path.stat().st_size * 3 + 10
+    # Using an entry makes it the most recently used one
+    assert cache.get("https://cloud/0/") is not None
+    cache.put("https://cloud/3/", None, "x" * 50)
+    assert cache.get("https://cloud/0/") is not None
+    assert cache.get("https://cloud/1/") is None
+    assert cache.get("https://cloud/2/") is not None
+    assert cache.get("https://cloud/3/") is not None
+
+
+def test_clear(tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.put("https://cloud/a/", None, {})
+    cache.clear()
+    assert cache.get("https://cloud/a/") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_for_profile():
+    cache = HttpCache.for_profile("my/profile")
+    assert cache.directory == default_cache_path() / "my%2Fprofile"
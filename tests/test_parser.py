@@ -18,6 +18,8 @@
 # software solely pursuant to the terms of the relevant commercial agreement.
 
 import io
+import subprocess
+import sys
 from argparse import Namespace
 from unittest import mock
 
@@ -28,6 +30,8 @@ from croud.parser import (
     Argument,
     CroudCliArgumentParser,
     CroudCliHelpFormatter,
+    LazyResolver,
+    PrintCompletionAction,
     create_parser,
 )
 from tests.util import assert_ellipsis_match
@@ -37,6 +41,10 @@ def noop(args: Namespace):
     pass
 
 
+def noop_with_parser(args: Namespace, parser: CroudCliArgumentParser):
+    args.parser = parser
+
+
 class TestParser:
     def test_parser_instance_help(self):
         tree = {"help": "help text", "commands": {}}
@@ -158,7 +166,11 @@ Optional Arguments:
         args = parser.parse_args(argv)
         assert args.resolver == noop
         assert args == Namespace(
-            output_fmt=None, region=None, sudo=False, resolver=noop
+            output_fmt=None,
+            region=None,
+            sudo=False,
+            no_cache=False,
+            resolver=noop,
         )
 
     def test_commands_with_args(self):
@@ -229,3 +241,141 @@ Optional Arguments:
         argv = ["cmd", "--sudo"]
         args = parser.parse_args(argv)
         assert args.sudo is True
+
+    def test_lazy_resolver(self):
+        tree = {
+            "help": "help text",
+            "commands": {
+                "cmd": {"resolver": LazyResolver("tests.test_parser", "noop")}
+            },
+        }
+        parser = create_parser(tree)
+
+        args = parser.parse_args(["cmd"])
+        with mock.patch("tests.test_parser.noop") as resolver:
+            args.resolver(args)
+        resolver.assert_called_once_with(args)
+
+    def test_lazy_resolver_with_parser(self):
+        tree = {
+            "help": "help text",
+            "commands": {
+                "cmd": {
+                    "resolver": LazyResolver("tests.test_parser", "noop_with_parser")
+                }
+            },
+        }
+        parser = create_parser(tree)
+
+        args = parser.parse_args(["cmd"])
+        args.resolver(args)
+        assert isinstance(args.parser, CroudCliArgumentParser)
+        assert args.parser.prog == "croud cmd"
+
+
+def test_parse_args_does_not_import_shtab():
+    code = (
+        "import sys; from croud.__main__ import get_parser; "
+        "from croud.parser import PrintCompletionAction; "
+        "parser = get_parser(['me']); "
+        "parser.add_argument('--print-completion', action=PrintCompletionAction); "
+        "parser.parse_args(['me']); "
+        "print('shtab' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_main_does_not_import_commands():
+    code = (
+        "import sys, croud.__main__; "
+        "print(sorted(m for m in sys.modules if m.endswith('.commands') "
+        "or m in ('requests', 'tabulate', 'tqdm', 'halo', 'shtab')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+class TestPartialParser:
+    tree = {
+        "help": "help text",
+        "commands": {
+            "cmd_a": {
+                "help": "Command A",
+                "commands": {
+                    "list": {
+                        "resolver": noop,
+                        "extra_args": [Argument("-a", type=int, required=True)],
+                    },
+                },
+            },
+            "cmd_b": {
+                "help": "Command B",
+                "resolver": noop,
+                "extra_args": [Argument("-b", type=int, required=True)],
+            },
+        },
+    }
+
+    def test_only_selected_commands_are_built(self):
+        argv = ["cmd_a", "list", "-a", "1"]
+        parser = create_parser(self.tree, argv)
+
+        args = parser.parse_args(argv)
+        assert args.resolver == noop
+        assert args.a == 1
+
+        (subparsers,) = parser._subparsers._group_actions
+        cmd_b = subparsers.choices["cmd_b"]
+        assert [action.dest for action in cmd_b._actions] == ["help"]
+
+    def test_help_lists_all_commands(self):
+        parser = create_parser(self.tree, ["cmd_a"])
+
+        fp = io.StringIO()
+        parser.print_help(file=fp)
+        usage = fp.getvalue()
+        assert "Command A" in usage
+        assert "Command B" in usage
+
+
+@pytest.mark.parametrize("shell", ["bash", "zsh", "tcsh", "fish", "powershell"])
+def test_print_completion_uses_parser_factory(shell, capsys):
+    tree = {
+        "help": "help text",
+        "commands": {"cmd": {"help": "Command", "resolver": noop}},
+    }
+    parser = create_parser(tree, [])
+    parser.add_argument(
+        "--print-completion",
+        action=PrintCompletionAction,
+        parser_factory=lambda: create_parser(tree),
+    )
+
+    with pytest.raises(SystemExit) as ex_info:
+        parser.parse_args(["--print-completion", shell])
+    assert ex_info.value.code == 0
+    out, _ = capsys.readouterr()
+    assert "--output-fmt" in out
+
+
+@pytest.mark.parametrize(
+    "argv,has_no_cache",
+    [
+        (["clusters", "list"], True),
+        (["config", "show"], False),
+        (["config", "profiles", "use", "p"], False),
+        (["login", "--idp", "github"], False),
+        (["organizations", "auditlogs", "list"], False),
+        (["organizations", "auditlogs", "sync", "--output", "events.jsonl"], False),
+    ],
+)
+def test_no_cache_argument(argv, has_no_cache):
+    from croud.__main__ import get_parser
+
+    args = get_parser(argv).parse_args(argv)
+    assert ("no_cache" in args) is has_no_cache
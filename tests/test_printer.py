@@ -19,13 +19,20 @@
 
 # type: ignore
 
+from unittest import mock
+
 import pytest
 
 from croud.printer import (
+    CompactJsonFormatPrinter,
+    CsvFormatPrinter,
     JsonFormatPrinter,
+    NdjsonFormatPrinter,
     TableFormatPrinter,
     WideTableFormatPrinter,
     YamlFormatPrinter,
+    iter_json,
+    print_format,
     print_response,
 )
 
@@ -57,6 +64,78 @@ def test_json_format(rows, expected):
     assert out == expected
 
 
+@pytest.fixture(params=["fast", "stdlib"])
+def json_encoder(request):
+    if request.param == "fast":
+        yield
+    else:
+        with mock.patch("croud.printer.get_fast_json_encoder", return_value=None):
+            yield
+
+
+NESTED = {"a": "foo", "b": [1, 2.5, None], "c": {"d": True}}
+
+
+@pytest.mark.usefixtures("json_encoder")
+def test_json_format_nested():
+    out = JsonFormatPrinter().format_rows([NESTED, {}])
+    assert out == (
+        "[\n"
+        "  {\n"
+        '    "a": "foo",\n'
+        '    "b": [\n'
+        "      1,\n"
+        "      2.5,\n"
+        "      null\n"
+        "    ],\n"
+        '    "c": {\n'
+        '      "d": true\n'
+        "    }\n"
+        "  },\n"
+        "  {}\n"
+        "]"
+    )
+
+
+@pytest.mark.usefixtures("json_encoder")
+def test_json_compact_format():
+    out = CompactJsonFormatPrinter().format_rows([NESTED, {}])
+    assert out == '[{"a":"foo","b":[1,2.5,null],"c":{"d":true}},{}]'
+
+
+@pytest.mark.usefixtures("json_encoder")
+def test_json_format_non_ascii():
+    # Non-ASCII characters are not escaped, whichever encoder is used
+    assert JsonFormatPrinter().format_rows({"a": "Zürich"}) == '{\n  "a": "Zürich"\n}'
+    assert CompactJsonFormatPrinter().format_rows(["Zürich"]) == '["Zürich"]'
+
+
+@pytest.mark.usefixtures("json_encoder")
+@mock.patch("croud.printer.JSON_CHUNK_SIZE", 16)
+def test_iter_json_chunks():
+    rows = [dict(NESTED, id=i) for i in range(100)]
+    chunks = list(iter_json(rows, compact=True))
+    assert len(chunks) > 1
+    assert all(len(chunk) < 16 * 4 for chunk in chunks)
+    assert b"".join(chunks).decode() == CompactJsonFormatPrinter().format_rows(rows)
+
+
+def test_json_format_unsupported_by_fast_encoder():
+    def encode(data, compact):
+        raise TypeError("Dict key must be str")
+
+    with mock.patch("croud.printer.get_fast_json_encoder", return_value=encode):
+        assert JsonFormatPrinter().format_rows({1: "a"}) == '{\n  "1": "a"\n}'
+
+
+@pytest.mark.usefixtures("json_encoder")
+def test_print_json_format(capsys):
+    print_format([NESTED], "json-compact")
+    print_format({"x": 1}, "json")
+    output, _ = capsys.readouterr()
+    assert output == ('[{"a":"foo","b":[1,2.5,null],"c":{"d":true}}]\n{\n  "x": 1\n}\n')
+
+
 @pytest.mark.parametrize(
     "rows,expected",
     (
@@ -81,6 +160,29 @@ def test_yaml_format(rows, expected):
     assert out == expected
 
 
+@pytest.mark.parametrize("libyaml", [True, False])
+def test_yaml_format_list(libyaml):
+    import yaml
+
+    rows = [
+        {"id": i, "name": f"name : {i}", "tags": ["a", "b"], "nested": {"x": None}}
+        for i in range(3)
+    ] + [[], "text", None]
+    if libyaml and not yaml.__with_libyaml__:
+        pytest.skip("libyaml is not available")
+    with mock.patch.dict(yaml.__dict__):
+        if not libyaml:
+            yaml.__dict__.pop("CSafeDumper", None)
+        out = YamlFormatPrinter().format_rows(rows)
+    assert out == yaml.dump(rows, default_flow_style=False)
+
+
+def test_print_yaml_format(capsys):
+    print_format([{"a": 1}, {"b": [2]}], "yaml")
+    output, _ = capsys.readouterr()
+    assert output == "- a: 1\n- b:\n  - 2\n\n"
+
+
 @pytest.mark.parametrize(
     "rows,keys,transforms,expected",
     (
@@ -226,6 +328,69 @@ def test_wide_format(rows, keys, transforms, expected):
     assert out == expected
 
 
+@pytest.mark.parametrize(
+    "rows,expected",
+    (
+        (None, ""),
+        ([], ""),
+        ({"a": "foo", "b": 1}, '{"a": "foo", "b": 1}'),
+        (
+            [{"a": "foo", "b": {"x": [1, 2]}}, {"b": None, "a": True}],
+            '{"a": "foo", "b": {"x": [1, 2]}}\n{"b": null, "a": true}',
+        ),
+        ({"a": "Zürich"}, '{"a": "Zürich"}'),
+    ),
+)
+def test_ndjson_format(rows, expected):
+    out = NdjsonFormatPrinter().format_rows(rows)
+    assert out == expected
+
+
+@pytest.mark.parametrize(
+    "rows,keys,transforms,expected",
+    (
+        (None, ["a", "b"], None, ""),
+        ([], ["a", "b"], None, "a,b"),
+        ([], None, None, ""),
+        (
+            {"a": "foo, bar", "b": 1.5, "c": True, "d": "ignored"},
+            ["a", "b", "c"],
+            None,
+            'a,b,c\n"foo, bar",1.5,TRUE',
+        ),
+        (
+            [
+                {"a": {"x": 1}, "b": [1, 2], "c": None},
+                {"c": False, "b": [3], "a": {"y": "z"}},
+            ],
+            None,
+            {"b": sum},
+            'a,b,c\n"{""x"": 1}",3,\n"{""y"": ""z""}",3,FALSE',
+        ),
+        (
+            [{"k1": "v01", "k2": "v02"}, {"k1": "v11"}],
+            ["k1", "k2", "k3"],
+            None,
+            "k1,k2,k3\nv01,v02,\nv11,,",
+        ),
+    ),
+)
+def test_csv_format(rows, keys, transforms, expected):
+    out = CsvFormatPrinter(keys=keys, transforms=transforms).format_rows(rows)
+    assert out == expected
+
+
+def test_stream_format_prints_generator(capsys):
+    def rows():
+        for i in range(3):
+            yield {"id": i}
+
+    CsvFormatPrinter(keys=["id"]).print_rows(rows())
+    NdjsonFormatPrinter().print_rows(rows())
+    output, _ = capsys.readouterr()
+    assert output == 'id\n0\n1\n2\n{"id": 0}\n{"id": 1}\n{"id": 2}\n'
+
+
 def test_print_response(capsys):
     data = {"email": "test@crate.io", "username": "Google_1234"}
     errors = None
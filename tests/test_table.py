@@ -0,0 +1,105 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import random
+
+import pytest
+from tabulate import tabulate
+
+from croud.printer import TableFormatPrinter
+from croud.tools.table import render_table
+
+VALUES = [
+    None,
+    "",
+    True,
+    False,
+    0,
+    -5,
+    12345678901234,
+    1.5,
+    -0.25,
+    1e20,
+    1e-7,
+    float("nan"),
+    float("inf"),
+    "True",
+    "abc",
+    " padded ",
+    "12",
+    " 7",
+    "1,000",
+    "1,000.5",
+    "1.",
+    "1E-3",
+    ".5",
+    "nan",
+    "-inf",
+    "infinity",
+    "1_000",
+    "0x10",
+    "1e400",
+    "2024-01-01T12:00:00",
+    "6f0e-1a",
+    "007",
+]
+
+
+def _tabulate(headers, columns):
+    return tabulate(
+        list(zip(*columns)), headers=headers, tablefmt="psql", missingval="NULL"
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_render_table_matches_tabulate(seed):
+    rnd = random.Random(seed)
+    for _ in range(100):
+        num_columns = rnd.randint(1, 4)
+        num_rows = rnd.randint(0, 5)
+        headers = [
+            rnd.choice(["a", "bb", "long header", "7"]) for _ in range(num_columns)
+        ]
+        columns = []
+        for _ in range(num_columns):
+            values = rnd.sample(VALUES, rnd.randint(1, 5))
+            columns.append([rnd.choice(values) for _ in range(num_rows)])
+        lines = render_table(headers, columns)
+        assert "\n".join(lines) == _tabulate(headers, columns)
+
+
+@pytest.mark.parametrize(
+    "headers,columns",
+    [
+        (["a"], [["grüße"]]),
+        (["a"], [["\x1b[31mred\x1b[0m"]]),
+        (["a"], [["two\nlines"]]),
+        (["a"], [[b"bytes"]]),
+        (["ä"], [["a"]]),
+        ([], []),
+    ],
+)
+def test_render_table_unsupported(headers, columns):
+    assert render_table(headers, columns) is None
+
+
+def test_table_format_falls_back_to_tabulate():
+    rows = [{"name": "grüße", "n": 1}, {"name": "日本", "n": 22}]
+    out = TableFormatPrinter().format_rows(rows)
+    assert out == _tabulate(["name", "n"], [["grüße", "日本"], [1, 22]])
@@ -0,0 +1,60 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import gzip
+import os
+from unittest import mock
+
+import pytest
+
+from croud.organizations.uploads import GzipReader
+
+CONTENT = b"".join(b'{"id": %d}\n' % i for i in range(10_000))
+
+
+@pytest.fixture
+def file_path(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+@mock.patch("croud.organizations.uploads.GZIP_CHUNK_SIZE", 4096)
+def test_gzip_reader(file_path):
+    progress = []
+    with GzipReader(file_path, callback=progress.append) as reader:
+        size = len(reader)
+        chunks = list(iter(lambda: reader.read(1000), b""))
+        assert reader.tell() == size
+    data = b"".join(chunks)
+    assert len(data) == size
+    assert all(len(chunk) == 1000 for chunk in chunks[:-1])
+    assert gzip.decompress(data) == CONTENT
+    assert sum(progress) == len(CONTENT)
+
+
+def test_gzip_reader_rewind(file_path):
+    with GzipReader(file_path) as reader:
+        first = reader.read()
+        assert reader.read() == b""
+        reader.seek(0)
+        assert reader.read() == first
+        assert reader.seek(0, os.SEEK_CUR) == len(first)
+        with pytest.raises(OSError):
+            reader.seek(10)
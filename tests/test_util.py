@@ -27,6 +27,7 @@ from croud.util import (
     can_launch_browser,
     confirm_prompt,
     get_platform_info,
+    grand_central_jwt_token,
     is_wsl,
     open_page_in_browser,
     org_id_config_fallback,
@@ -181,3 +182,18 @@ def test_org_id_config_fallback_sudo(config_value, arg_value, expected, config,
         command(args)
         out, _ = capsys.readouterr()
         assert expected in out
+
+
+@mock.patch("croud.api.Client.get", return_value=({"token": "t", "expiry": "e"}, None))
+def test_grand_central_jwt_token_single_write(mock_get, config):
+    @grand_central_jwt_token
+    def command(args: Namespace):
+        pass
+
+    args = Namespace(cluster_id="cluster-1", region=None, sudo=False)
+    with mock.patch.object(config, "dump", wraps=config.dump) as mock_dump:
+        command(args)
+    mock_dump.assert_called_once_with()
+    assert config.gc_jwt_token == "t"
+    assert config.gc_cluster_id == "cluster-1"
+    assert config.gc_jwt_token_expiry == "e"
@@ -0,0 +1,115 @@
+# Licensed to CRATE Technology GmbH ("Crate") under one or more contributor
+# license agreements.  See the NOTICE file distributed with this work for
+# additional information regarding copyright ownership.  Crate licenses
+# this file to you under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.  You may
+# obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# However, if you have executed another commercial license agreement
+# with Crate these terms will supersede the license and you may use the
+# software solely pursuant to the terms of the relevant commercial agreement.
+
+import os
+import pathlib
+import subprocess
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional
+
+# Benchmarks are opt-in, since timings are meaningless on a busy machine.
+# ``CROUD_BENCHMARKS=1`` compares the timings against the stored baselines,
+# ``CROUD_BENCHMARKS=update`` stores the measured timings as new baselines.
+BENCHMARK_MODE = os.getenv("CROUD_BENCHMARKS", "")
+# A measurement fails if it exceeds its baseline by more than this factor.
+BENCHMARK_TOLERANCE = float(os.getenv("CROUD_BENCHMARK_TOLERANCE", "1.5"))
+
+# The self-signed certificate of the fake cloud, which ``requests`` verifies
+# the connections of child processes against.
+FAKE_CLOUD_CA_BUNDLE = pathlib.Path(__file__).parent / "server.crt"
+
+
+def measure(func: Callable[[], object], *, repeat: int = 5, number: int = 1) -> float:
+    """
+    Return the best time in seconds of ``repeat`` runs of ``number`` calls
+    to ``func``, divided by ``number``.
+    """
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def run_python(
+    code: str, *, env: Optional[Dict[str, str]] = None, args: List[str] = None
+) -> subprocess.CompletedProcess:
+    """
+    Run ``code`` in a fresh Python interpreter.
+    """
+    environ = {
+        **os.environ,
+        "REQUESTS_CA_BUNDLE": str(FAKE_CLOUD_CA_BUNDLE),
+        **(env or {}),
+    }
+    return subprocess.run(
+        [sys.executable, *(args or []), "-c", code],
+        env=environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_python(
+    code: str, *, env: Optional[Dict[str, str]] = None, repeat: int = 5
+) -> float:
+    """
+    Return the best wall clock time in seconds of running ``code`` in a fresh
+    Python interpreter.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_python(code, env=env)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def import_time(module: str, *, repeat: int = 5) -> float:
+    """
+    Return the best cumulative import time in seconds of ``module`` (including
+    its dependencies) as reported by ``python -X importtime``.
+    """
+    timings = []
+    for _ in range(repeat):
+        result = run_python(f"import {module}", args=["-X", "importtime"])
+        for line in result.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            _, cumulative, name = line.rsplit("|", 2)
+            if name.strip() == module:
+                timings.append(int(cumulative) / 1_000_000)
+                break
+    return min(timings)
+
+
+def _reference_workload() -> None:
+    # A fixed amount of pure Python work
+    data = [str(i * 7919 % 10007) for i in range(20_000)]
+    index = {value: i for i, value in enumerate(sorted(data))}
+    "".join(value for value in data if index[value] % 2)
+
+
+def reference_time(kind: str = "cpu") -> float:
+    """
+    Return the best time in seconds of a reference workload, which timings are
+    compared relative to: a fixed amount of pure Python work (``cpu``), or the
+    startup of a bare Python interpreter (``startup``).
+    """
+    if kind == "startup":
+        return measure_python("pass")
+    return measure(_reference_workload, repeat=5)
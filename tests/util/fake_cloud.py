@@ -28,6 +28,8 @@ from urllib import parse
 __ssl = __import__("ssl")
 _original_sslcontext = __ssl.SSLContext
 
+FAKE_ORG_ID = "d9c2f5d1-6e77-4a5d-9d2f-0f4f3e5a1b2c"
+
 
 class Response:
     __slots__ = ("bytes", "status", "headers")
@@ -100,6 +102,9 @@ class FakeCrateDBCloudServer(HTTPServer):
 
 
 class FakeCrateDBCloudRequestHandler(BaseHTTPRequestHandler):
+    # Number of requests seen per ``/flaky`` key, across handler instances
+    flaky_attempts: Dict[str, int] = {}
+
     def __init__(self, *args, **kwargs):
         self.body = None
         self.cookies = {}
@@ -112,6 +117,10 @@ class FakeCrateDBCloudRequestHandler(BaseHTTPRequestHandler):
             "/redirect": self.redirect,
             "/new-token": self.new_token,
             "/client-headers": self.client_headers,
+            "/flaky": self.flaky,
+            "/api/v2/regions/": self.regions,
+            "/api/v2/clusters/": self.clusters,
+            f"/api/v2/organizations/{FAKE_ORG_ID}/auditlogs/": self.auditlogs,
         }
         super().__init__(*args, **kwargs)
 
@@ -191,6 +200,19 @@ class FakeCrateDBCloudRequestHandler(BaseHTTPRequestHandler):
             return Response(status=204)
         return Response(status=302, headers={"Location": "/"})
 
+    def flaky(self) -> Response:
+        # Fail the first ``fail`` requests for a given ``key`` with a 503
+        key = self.query["key"][0]
+        attempts = self.flaky_attempts.get(key, 0) + 1
+        self.flaky_attempts[key] = attempts
+        if attempts <= int(self.query["fail"][0]):
+            return Response(
+                json_data={"message": "Unavailable."},
+                status=503,
+                headers={"Retry-After": "0"},
+            )
+        return Response(json_data={"attempts": attempts})
+
     def redirect(self) -> Response:
         return Response(status=301, headers={"Location": "/?rd=%2Fredirect"})
 
@@ -202,6 +224,54 @@ class FakeCrateDBCloudRequestHandler(BaseHTTPRequestHandler):
     def client_headers(self) -> Response:
         return Response(json_data=dict(self.headers.items()))
 
+    def regions(self) -> Response:
+        etag = '"regions-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            return Response(status=304, headers={"ETag": etag})
+        return Response(
+            json_data=[{"name": "bregenz.a1", "description": "Bregenz"}],
+            headers={"ETag": etag},
+        )
+
+    def clusters(self) -> Response:
+        if self.is_authorized:
+            return Response(
+                json_data=[
+                    {
+                        "id": f"cluster-{i}",
+                        "name": f"cluster-{i}",
+                        "num_nodes": 3,
+                        "crate_version": "5.10.1",
+                        "project_id": "project-1",
+                        "username": "admin",
+                        "suspended": False,
+                        "fqdn": f"cluster-{i}.aks1.eastus2.azure.cratedb.net.",
+                        "channel": "stable",
+                    }
+                    for i in range(25)
+                ]
+            )
+        return Response(status=302, headers={"Location": "/"})
+
+    def auditlogs(self) -> Response:
+        if not self.is_authorized:
+            return Response(status=302, headers={"Location": "/"})
+        if "last" in self.query:
+            # There is only a single page of audit log events
+            return Response(json_data=[])
+        return Response(
+            json_data=[
+                {
+                    "id": f"event-{i}",
+                    "action": "cluster.create",
+                    "actor": {"id": "user-1", "username": "jane"},
+                    "created": "2024-01-01T12:00:00",
+                    "context": {"cluster_id": f"cluster-{i}"},
+                }
+                for i in range(100)
+            ]
+        )
+
     @property
     def is_authorized(self) -> bool:
         if "session" in self.cookies: